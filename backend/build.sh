@@ -8,6 +8,15 @@ pip install -r requirements.txt
 # Run migrations
 python manage.py migrate
 
+# Fail the deploy if a hot pickup query stopped using its index
+python manage.py check --database default
+
+# Reconcile the pickup counters with the pickup table
+python manage.py rebuild_pickup_counters
+
+# Refresh recent admin analytics rollups (all days only on the first deploy)
+python manage.py rebuild_pickup_rollups --initial --days 2
+
 # Collect static files
 python manage.py collectstatic --noinput
 
@@ -59,6 +59,7 @@ TEMPLATES = [
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.template.context_processors.csrf',
+                'registration.context_processors.notifications',
             ],
         },
     },
@@ -223,6 +224,83 @@ try:
 except Exception:
     pass  # Best effort - will fail later if needed
 
+# Geo-matching
+# Cell size (in degrees) of the in-memory collector grid index and how often
+# each process reloads it from the database when it cannot see the version
+# bumped by other processes (per-process cache)
+COLLECTOR_INDEX_CELL_SIZE_DEG = float(os.environ.get('COLLECTOR_INDEX_CELL_SIZE_DEG', '0.05'))
+COLLECTOR_INDEX_MAX_AGE_SECONDS = int(os.environ.get('COLLECTOR_INDEX_MAX_AGE_SECONDS', '300'))
+
+# How often each process rebuilds the offline gazetteer (admin-area centroids)
+GAZETTEER_MAX_AGE_SECONDS = int(os.environ.get('GAZETTEER_MAX_AGE_SECONDS', '3600'))
+
+# Administrative areas: how long each process trusts its cached hierarchy
+# without seeing a version bump, and how long browsers may reuse dropdown
+# responses before revalidating them with their ETag
+ADMIN_HIERARCHY_MAX_AGE_SECONDS = int(os.environ.get('ADMIN_HIERARCHY_MAX_AGE_SECONDS', '3600'))
+ADMIN_HIERARCHY_BROWSER_MAX_AGE_SECONDS = int(os.environ.get('ADMIN_HIERARCHY_BROWSER_MAX_AGE_SECONDS', '60'))
+
+# Pickup assignment: active pickups allowed per collector, extra cost (km)
+# per queued pickup, radius used for collectors without one, and nearest
+# collectors considered per pickup
+PICKUP_ASSIGNMENT_CAPACITY = int(os.environ.get('PICKUP_ASSIGNMENT_CAPACITY', '10'))
+PICKUP_ASSIGNMENT_WORKLOAD_WEIGHT_KM = float(os.environ.get('PICKUP_ASSIGNMENT_WORKLOAD_WEIGHT_KM', '2.0'))
+PICKUP_ASSIGNMENT_MAX_DISTANCE_KM = float(os.environ.get('PICKUP_ASSIGNMENT_MAX_DISTANCE_KM', '15.0'))
+PICKUP_ASSIGNMENT_MAX_CANDIDATES = int(os.environ.get('PICKUP_ASSIGNMENT_MAX_CANDIDATES', '8'))
+
+# How long each process reuses its map cluster grids before reloading points
+# (saves do not invalidate them)
+MAP_CLUSTER_MAX_AGE_SECONDS = int(os.environ.get('MAP_CLUSTER_MAX_AGE_SECONDS', '60'))
+
+# Live collector positions: location pings are kept in the cache for
+# LIVE_POSITION_TTL_SECONDS and written to the database in batches every
+# LIVE_POSITION_FLUSH_INTERVAL_SECONDS (keep it below the TTL)
+LIVE_POSITION_CACHE_ALIAS = 'default'
+LIVE_POSITION_TTL_SECONDS = int(os.environ.get('LIVE_POSITION_TTL_SECONDS', '120'))
+LIVE_POSITION_FLUSH_INTERVAL_SECONDS = int(os.environ.get('LIVE_POSITION_FLUSH_INTERVAL_SECONDS', '30'))
+LIVE_POSITION_FLUSH_BATCH_SIZE = int(os.environ.get('LIVE_POSITION_FLUSH_BATCH_SIZE', '500'))
+
+# Cache (in-process memory by default). Assignment and fan-out job progress,
+# live positions and the collector index version live here, so with more
+# than one worker process set CACHE_BACKEND/CACHE_LOCATION to a shared
+# backend such as Redis; `manage.py check` fails (registration.E002) when
+# WEB_CONCURRENCY > 1 with the in-process cache
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'isuku-default'),
+    }
+}
+
+# List pages: default and maximum rows per page (keyset pagination)
+LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', '25'))
+LIST_MAX_PAGE_SIZE = int(os.environ.get('LIST_MAX_PAGE_SIZE', '100'))
+
+# How long each user's unread notification count and latest list stay cached
+# (they are also dropped whenever one of their notifications changes)
+NOTIFICATION_CACHE_SECONDS = int(os.environ.get('NOTIFICATION_CACHE_SECONDS', '300'))
+# Notifications inserted per statement by bulk announcements
+NOTIFICATION_FANOUT_BATCH_SIZE = int(os.environ.get('NOTIFICATION_FANOUT_BATCH_SIZE', '5000'))
+
+# Rows fetched per database round trip when streaming pickup exports
+PICKUP_EXPORT_CHUNK_SIZE = int(os.environ.get('PICKUP_EXPORT_CHUNK_SIZE', '2000'))
+
+# Waste classifier micro-batching: concurrent uploads wait up to
+# CLASSIFIER_MAX_WAIT_MS to share one forward pass of up to CLASSIFIER_MAX_BATCH_SIZE images
+CLASSIFIER_MAX_BATCH_SIZE = int(os.environ.get('CLASSIFIER_MAX_BATCH_SIZE', '16'))
+CLASSIFIER_MAX_WAIT_MS = float(os.environ.get('CLASSIFIER_MAX_WAIT_MS', '5'))
+# Classification results remembered per process for repeated uploads (0 disables)
+CLASSIFIER_CACHE_SIZE = int(os.environ.get('CLASSIFIER_CACHE_SIZE', '1024'))
+# Unix socket of `manage.py run_classifier_server`; empty classifies inside each web worker
+CLASSIFIER_SOCKET = os.environ.get('CLASSIFIER_SOCKET', '')
+CLASSIFIER_SOCKET_TIMEOUT_SECONDS = float(os.environ.get('CLASSIFIER_SOCKET_TIMEOUT_SECONDS', '30'))
+# Quantized TorchScript classifier written by `manage.py export_waste_classifier`;
+# loaded instead of the float model when the file exists
+CLASSIFIER_OPTIMIZED_MODEL_PATH = os.environ.get(
+    'CLASSIFIER_OPTIMIZED_MODEL_PATH', str(BASE_DIR / 'ml_models' / 'waste_classifier_int8.pt')
+)
+
 # Email Configuration
 # For development: emails are printed to console (check your terminal)
 # For production: configure SMTP settings below
@@ -2,7 +2,8 @@ from django.contrib import admin
 from .models import (
     Province, District, Sector, Cell, Village,
     Household, Collector, Admin,
-    WasteCategory, WastePickupRequest, Notification, OTP
+    WasteCategory, WastePickupRequest, Notification, OTP,
+    HouseholdStats, CollectorStats, DailyPickupRollup
 )
 
 
@@ -81,3 +82,24 @@ class OTPAdmin(admin.ModelAdmin):
     list_filter = ['is_verified', 'created_at']
     search_fields = ['phoneNumber', 'otp']
     readonly_fields = ['created_at', 'expires_at']
+
+
+@admin.register(HouseholdStats)
+class HouseholdStatsAdmin(admin.ModelAdmin):
+    list_display = ['household', 'total_count', 'pending_count', 'completed_count', 'total_weight', 'last_pickup_at']
+    search_fields = ['household__user__username']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(CollectorStats)
+class CollectorStatsAdmin(admin.ModelAdmin):
+    list_display = ['collector', 'total_count', 'scheduled_count', 'completed_count', 'total_weight', 'last_pickup_at']
+    search_fields = ['collector__user__username']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(DailyPickupRollup)
+class DailyPickupRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'district', 'waste_category', 'created_count', 'completed_count', 'cancelled_count', 'completed_weight']
+    list_filter = ['province', 'waste_category']
+    date_hierarchy = 'date'
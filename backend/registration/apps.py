@@ -5,3 +5,6 @@ class RegistrationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'registration'
 
+    def ready(self):
+        # Register signal handlers and system checks
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,494 @@
+"""
+Batch assignment of pending pickups to collectors.
+
+Pickups are matched by solving a capacity-constrained min-cost assignment:
+giving a collector one more pickup costs the travel distance plus a penalty
+for every pickup already queued for that collector, so work is spread across
+the fleet instead of piling onto whoever happens to be closest. Each pickup
+only considers its nearest collectors in range, so the problem stays sparse.
+Runs started from the admin quick action go to a background worker and
+report their result in the cache under their job id; the status endpoint
+can only find them from other worker processes if that cache is shared.
+"""
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .geocoding import calculate_distance_matrix, find_nearby_collectors
+from .rollups import record_status_update
+from .counters import rebuild_collector_stats, rebuild_household_stats
+
+# SciPy provides the exact solver; without it a greedy pass is used
+try:
+    from scipy.sparse import coo_matrix, csr_matrix
+    from scipy.sparse.csgraph import connected_components, min_weight_full_bipartite_matching
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+    logging.warning("SciPy not available. Batch pickup assignment will use the greedy solver.")
+
+logger = logging.getLogger(__name__)
+
+# Statuses that count towards a collector's current workload
+ACTIVE_STATUSES = ['Scheduled', 'In Progress']
+
+# Maximum active pickups per collector
+DEFAULT_CAPACITY = 10
+
+# Extra cost (in km) for each pickup already queued for a collector
+DEFAULT_WORKLOAD_WEIGHT_KM = 2.0
+
+# Fallback radius for collectors without a service radius
+DEFAULT_MAX_DISTANCE_KM = 15.0
+
+# Nearest collectors in range considered for each pickup
+DEFAULT_MAX_CANDIDATES = 8
+
+# Pickups whose distances to every collector are computed at once
+DISTANCE_CHUNK_SIZE = 1024
+
+# Larger neighbourhoods are solved in slices of this many pickups
+MAX_COMPONENT_PICKUPS = 2000
+
+# How long finished job results stay readable
+PROGRESS_TIMEOUT_SECONDS = 24 * 3600
+
+# Cost of leaving a pickup unassigned; above any real pair so the most
+# pickups are assigned first, then at the lowest cost
+UNASSIGNED_COST = 1e9
+
+
+def get_assignment_settings() -> Dict[str, float]:
+    """Read the assignment tuning knobs from Django settings"""
+    return {
+        'capacity': getattr(settings, 'PICKUP_ASSIGNMENT_CAPACITY', DEFAULT_CAPACITY),
+        'workload_weight_km': getattr(settings, 'PICKUP_ASSIGNMENT_WORKLOAD_WEIGHT_KM', DEFAULT_WORKLOAD_WEIGHT_KM),
+        'max_distance_km': getattr(settings, 'PICKUP_ASSIGNMENT_MAX_DISTANCE_KM', DEFAULT_MAX_DISTANCE_KM),
+        'max_candidates': getattr(settings, 'PICKUP_ASSIGNMENT_MAX_CANDIDATES', DEFAULT_MAX_CANDIDATES),
+    }
+
+
+def get_collector_workloads(collector_ids: Sequence[int]) -> Dict[int, int]:
+    """Count active (scheduled or in progress) pickups per collector"""
+    from .models import WastePickupRequest
+
+    rows = WastePickupRequest.objects.filter(
+        collector_id__in=list(collector_ids),
+        status__in=ACTIVE_STATUSES
+    ).values('collector_id').annotate(active=Count('id'))
+    return {row['collector_id']: row['active'] for row in rows}
+
+
+def candidate_edges(pickup_lats: Sequence, pickup_lons: Sequence,
+                    collector_lats: Sequence, collector_lons: Sequence,
+                    radii: np.ndarray, max_candidates: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pair each pickup with its nearest collectors within their service radius.
+
+    Distances are computed DISTANCE_CHUNK_SIZE pickups at a time, so memory
+    stays bounded however many pickups are pending.
+
+    Returns:
+        (pickup indices, collector indices, distances in km), one entry per pair
+    """
+    collector_lats = np.asarray(collector_lats, dtype=np.float64)
+    collector_lons = np.asarray(collector_lons, dtype=np.float64)
+    k = min(max_candidates, len(collector_lats))
+
+    rows, cols, dists = [], [], []
+    for start in range(0, len(pickup_lats), DISTANCE_CHUNK_SIZE):
+        distances = calculate_distance_matrix(
+            pickup_lats[start:start + DISTANCE_CHUNK_SIZE], pickup_lons[start:start + DISTANCE_CHUNK_SIZE],
+            collector_lats, collector_lons
+        )
+        distances[distances > radii[np.newaxis, :]] = np.inf
+        if k < distances.shape[1]:
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+        chunk_rows = np.repeat(np.arange(len(distances)), nearest.shape[1])
+        chunk_cols = nearest.reshape(-1)
+        chunk_dists = distances[chunk_rows, chunk_cols]
+        keep = np.isfinite(chunk_dists)
+        rows.append(chunk_rows[keep] + start)
+        cols.append(chunk_cols[keep])
+        dists.append(chunk_dists[keep])
+
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(dists)
+
+
+def _match(rows: np.ndarray, cols: np.ndarray, dists: np.ndarray, num_pickups: int,
+           loads: np.ndarray, remaining: np.ndarray, workload_weight_km: float) -> List[Tuple[int, int]]:
+    """
+    Min-cost matching of one group of pickups on a sparse slot graph.
+
+    Each collector is expanded into one column per free slot; the n-th slot
+    costs ``workload_weight_km * (load + n)`` on top of the distance, which
+    makes the slot expansion equivalent to a min-cost flow with convex costs.
+    Every pickup also gets its own "unassigned" column, so a full matching
+    always exists.
+    """
+    # No collector needs more slots than it has candidate pickups
+    slots = np.minimum(remaining, np.bincount(cols, minlength=len(remaining)))
+    slot_start = np.concatenate([[0], np.cumsum(slots)[:-1]])
+    slot_owner = np.repeat(np.arange(len(slots)), slots)
+    num_slots = int(slots.sum())
+
+    # One entry per (pickup, collector slot)
+    edge = np.repeat(np.arange(len(cols)), slots[cols])
+    first = np.concatenate([[0], np.cumsum(slots[cols])[:-1]])
+    rank = np.arange(len(edge)) - np.repeat(first, slots[cols])
+    edge_cols = cols[edge]
+    # +1 keeps every weight non-zero; the sparse solver drops zero entries
+    cost = dists[edge] + workload_weight_km * (loads[edge_cols] + rank) + 1.0
+
+    graph = csr_matrix(
+        (np.concatenate([cost, np.full(num_pickups, UNASSIGNED_COST)]),
+         (np.concatenate([rows[edge], np.arange(num_pickups)]),
+          np.concatenate([slot_start[edge_cols] + rank, num_slots + np.arange(num_pickups)]))),
+        shape=(num_pickups, num_slots + num_pickups)
+    )
+    row_ind, col_ind = min_weight_full_bipartite_matching(graph)
+    ok = col_ind < num_slots
+    return list(zip(row_ind[ok].tolist(), slot_owner[col_ind[ok]].tolist()))
+
+
+def _solve_optimal(rows: np.ndarray, cols: np.ndarray, dists: np.ndarray, num_pickups: int,
+                   loads: np.ndarray, remaining: np.ndarray, workload_weight_km: float) -> List[Tuple[int, int]]:
+    """
+    Solve the assignment exactly over the candidate pairs.
+
+    Independent neighbourhoods are solved separately. A neighbourhood with
+    more than MAX_COMPONENT_PICKUPS pickups is solved in slices from south
+    to north, each slice taking the capacity the previous ones left.
+    """
+    num_collectors = len(remaining)
+    graph = coo_matrix(
+        (np.ones(len(rows)), (rows, cols + num_pickups)),
+        shape=(num_pickups + num_collectors, num_pickups + num_collectors)
+    )
+    _, labels = connected_components(graph, directed=False)
+    edge_labels = labels[rows]
+    loads = loads.copy()
+    remaining = remaining.copy()
+
+    pairs = []
+    for component in np.unique(edge_labels):
+        in_component = np.flatnonzero(edge_labels == component)
+        p_idx = np.unique(rows[in_component])
+        c_idx = np.unique(cols[in_component])
+        for start in range(0, len(p_idx), MAX_COMPONENT_PICKUPS):
+            # p_idx follows the pickup order, which the caller sorts by latitude
+            slice_p = p_idx[start:start + MAX_COMPONENT_PICKUPS]
+            edges = in_component[np.isin(rows[in_component], slice_p)]
+            local = _match(
+                np.searchsorted(slice_p, rows[edges]), np.searchsorted(c_idx, cols[edges]), dists[edges],
+                len(slice_p), loads[c_idx], remaining[c_idx], workload_weight_km
+            )
+            for p, c in local:
+                collector = c_idx[c]
+                loads[collector] += 1
+                remaining[collector] -= 1
+                pairs.append((int(slice_p[p]), int(collector)))
+
+    return pairs
+
+
+def _solve_greedy(rows: np.ndarray, cols: np.ndarray, dists: np.ndarray, num_pickups: int,
+                  loads: np.ndarray, remaining: np.ndarray, workload_weight_km: float) -> List[Tuple[int, int]]:
+    """Assign the cheapest candidate pairs first while capacity remains"""
+    used = np.zeros(len(remaining), dtype=np.int64)
+    assigned = np.zeros(num_pickups, dtype=bool)
+
+    pairs = []
+    while len(rows):
+        cost = dists + workload_weight_km * (loads[cols] + used[cols])
+        order = np.argsort(cost, kind='stable')
+        progressed = False
+        touched = set()
+        for k in order.tolist():
+            p, c = rows[k], cols[k]
+            # Costs of a collector change once it takes a pickup; re-rank afterwards
+            if c in touched:
+                continue
+            if assigned[p] or used[c] >= remaining[c]:
+                continue
+            pairs.append((int(p), int(c)))
+            assigned[p] = True
+            used[c] += 1
+            touched.add(c)
+            progressed = True
+        if not progressed:
+            break
+        keep = ~assigned[rows] & (used[cols] < remaining[cols])
+        rows, cols, dists = rows[keep], cols[keep], dists[keep]
+
+    return pairs
+
+
+def plan_assignments(pickup_lats: Sequence, pickup_lons: Sequence,
+                     collector_lats: Sequence, collector_lons: Sequence,
+                     collector_radii: Sequence, collector_loads: Sequence,
+                     capacity: int = DEFAULT_CAPACITY,
+                     workload_weight_km: float = DEFAULT_WORKLOAD_WEIGHT_KM,
+                     max_distance_km: float = DEFAULT_MAX_DISTANCE_KM,
+                     max_candidates: int = DEFAULT_MAX_CANDIDATES) -> List[Tuple[int, int]]:
+    """
+    Compute pickup-to-collector assignments without touching the database.
+
+    Args:
+        pickup_lats, pickup_lons: Pickup coordinates
+        collector_lats, collector_lons: Collector coordinates
+        collector_radii: Service radius per collector (falsy uses max_distance_km)
+        collector_loads: Active pickups already queued per collector
+        capacity: Maximum active pickups per collector
+        workload_weight_km: Extra cost per queued pickup
+        max_distance_km: Radius for collectors without a service radius
+        max_candidates: Nearest collectors with spare capacity considered per pickup
+
+    Returns:
+        List of (pickup_index, collector_index) pairs
+    """
+    if not len(pickup_lats) or not len(collector_lats):
+        return []
+
+    radii = np.array([float(r) if r else max_distance_km for r in collector_radii], dtype=np.float64)
+    loads = np.asarray(collector_loads, dtype=np.int64)
+    remaining = np.maximum(capacity - loads, 0)
+
+    # Only collectors with spare capacity take part
+    free = np.flatnonzero(remaining > 0)
+    if not len(free):
+        return []
+    # South to north, so slices of large neighbourhoods are compact
+    order = np.argsort(np.asarray(pickup_lats, dtype=np.float64), kind='stable')
+    rows, cols, dists = candidate_edges(
+        np.asarray(pickup_lats, dtype=np.float64)[order], np.asarray(pickup_lons, dtype=np.float64)[order],
+        np.asarray(collector_lats, dtype=np.float64)[free], np.asarray(collector_lons, dtype=np.float64)[free],
+        radii[free], max_candidates
+    )
+    if not len(rows):
+        return []
+
+    solver = _solve_optimal if SCIPY_AVAILABLE else _solve_greedy
+    pairs = solver(rows, cols, dists, len(order), loads[free], remaining[free], workload_weight_km)
+    return [(int(order[p]), int(free[c])) for p, c in pairs]
+
+
+def assign_pending_pickups(capacity: Optional[int] = None,
+                           workload_weight_km: Optional[float] = None,
+                           max_distance_km: Optional[float] = None,
+                           max_candidates: Optional[int] = None,
+                           dry_run: bool = False) -> Dict[str, object]:
+    """
+    Assign every unassigned pending pickup with a location in one batch.
+
+    Args:
+        capacity: Maximum active pickups per collector
+        workload_weight_km: Extra cost per queued pickup
+        max_distance_km: Radius for collectors without a service radius
+        max_candidates: Nearest collectors considered per pickup
+        dry_run: Plan without writing to the database
+
+    Returns:
+        Dictionary summarising the run:
+        {
+            'pickups': 120,          # candidate pickups
+            'collectors': 14,        # available collectors
+            'assigned': 97,          # pickups scheduled by this run
+            'solver': 'optimal',
+            'assignments': {collector_id: [pickup_id, ...]},
+        }
+    """
+    from .models import Collector, WastePickupRequest
+
+    defaults = get_assignment_settings()
+    capacity = defaults['capacity'] if capacity is None else capacity
+    workload_weight_km = defaults['workload_weight_km'] if workload_weight_km is None else workload_weight_km
+    max_distance_km = defaults['max_distance_km'] if max_distance_km is None else max_distance_km
+    max_candidates = defaults['max_candidates'] if max_candidates is None else max_candidates
+
+    pickups = list(WastePickupRequest.objects.filter(
+        status='Pending',
+        collector__isnull=True,
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).values_list('id', 'latitude', 'longitude'))
+
+    collectors = list(Collector.objects.filter(
+        is_available=True,
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).annotate(
+        active=Count('assigned_pickups', filter=Q(assigned_pickups__status__in=ACTIVE_STATUSES))
+    ).values_list('id', 'latitude', 'longitude', 'service_radius', 'active'))
+
+    result = {
+        'pickups': len(pickups),
+        'collectors': len(collectors),
+        'assigned': 0,
+        'solver': 'optimal' if SCIPY_AVAILABLE else 'greedy',
+        'assignments': {},
+    }
+    if not pickups or not collectors:
+        return result
+
+    pickup_ids, pickup_lats, pickup_lons = zip(*pickups)
+    collector_ids, collector_lats, collector_lons, radii, loads = zip(*collectors)
+
+    pairs = plan_assignments(
+        pickup_lats, pickup_lons,
+        collector_lats, collector_lons, radii, loads,
+        capacity=capacity,
+        workload_weight_km=workload_weight_km,
+        max_distance_km=max_distance_km,
+        max_candidates=max_candidates,
+    )
+
+    assignments = {}
+    for p, c in pairs:
+        assignments.setdefault(collector_ids[c], []).append(pickup_ids[p])
+    result['assignments'] = assignments
+
+    if dry_run:
+        result['assigned'] = len(pairs)
+        return result
+
+    now = timezone.now()
+    assigned = 0
+    with transaction.atomic():
+        for collector_id, ids in assignments.items():
+            # Skip pickups claimed by a collector since they were loaded
+            assigned += WastePickupRequest.objects.filter(
+                id__in=ids,
+                status='Pending',
+                collector__isnull=True
+            ).update(collector_id=collector_id, status='Scheduled', updated_at=now)
+
+        # update() sends no signals, so bring the counters and rollups up to date
+        scheduled = WastePickupRequest.objects.filter(
+            id__in=[pickup_id for ids in assignments.values() for pickup_id in ids],
+            status='Scheduled',
+            updated_at=now
+        )
+        rebuild_household_stats(set(scheduled.values_list('household_id', flat=True)))
+        rebuild_collector_stats(assignments.keys())
+        record_status_update(scheduled.values_list('id', flat=True), 'Pending', 'Scheduled')
+    result['assigned'] = assigned
+
+    logger.info(
+        f"Batch assignment scheduled {assigned} of {len(pickups)} pickups "
+        f"across {len(assignments)} collectors ({result['solver']} solver)"
+    )
+    return result
+
+
+def _progress_key(job_id: str) -> str:
+    return f'pickup-assignment:{job_id}'
+
+
+def get_assignment_progress(job_id: str) -> Optional[Dict[str, object]]:
+    """
+    Progress of a background assignment job.
+
+    Returns:
+        {'id': ..., 'status': 'queued'|'running'|'done'|'failed', 'pickups': 120,
+         'collectors': 14, 'assigned': 97, 'created_at': ..., 'finished_at': ..., 'error': None}
+        or None for an unknown (or expired) job
+    """
+    return cache.get(_progress_key(job_id))
+
+
+def _save_progress(progress: Dict[str, object]):
+    cache.set(_progress_key(progress['id']), progress, PROGRESS_TIMEOUT_SECONDS)
+
+
+def _run_in_background(job_id: str):
+    close_old_connections()
+    progress = get_assignment_progress(job_id) or {'id': job_id, 'created_at': timezone.now().isoformat()}
+    progress['status'] = 'running'
+    _save_progress(progress)
+    try:
+        result = assign_pending_pickups()
+        progress.update(
+            status='done', pickups=result['pickups'], collectors=result['collectors'],
+            assigned=result['assigned'], solver=result['solver'],
+        )
+    except Exception as e:
+        logger.error(f"Batch pickup assignment {job_id} failed: {e}")
+        progress.update(status='failed', error=str(e))
+    finally:
+        progress['finished_at'] = timezone.now().isoformat()
+        _save_progress(progress)
+        # The worker thread has its own connection; do not leak it
+        connection.close()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # One worker: runs never overlap, so they cannot claim the same pickups
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pickup-assignment')
+    return _executor
+
+
+def start_assignment() -> str:
+    """Queue ``assign_pending_pickups`` on the background worker and return the job id"""
+    job_id = uuid.uuid4().hex[:12]
+    _save_progress({
+        'id': job_id, 'status': 'queued', 'pickups': None, 'collectors': None, 'assigned': None,
+        'created_at': timezone.now().isoformat(), 'finished_at': None, 'error': None,
+    })
+    transaction.on_commit(lambda: _get_executor().submit(_run_in_background, job_id))
+    return job_id
+
+
+def choose_collector(latitude: float, longitude: float,
+                     capacity: Optional[int] = None,
+                     workload_weight_km: Optional[float] = None,
+                     max_distance_km: Optional[float] = None):
+    """
+    Pick the best collector for a single pickup using the batch cost model.
+
+    Returns:
+        Collector instance, or None if nobody nearby has spare capacity
+    """
+    defaults = get_assignment_settings()
+    capacity = defaults['capacity'] if capacity is None else capacity
+    workload_weight_km = defaults['workload_weight_km'] if workload_weight_km is None else workload_weight_km
+    max_distance_km = defaults['max_distance_km'] if max_distance_km is None else max_distance_km
+
+    nearby = find_nearby_collectors(latitude, longitude, max_distance_km=max_distance_km)
+    if not nearby:
+        return None
+
+    workloads = get_collector_workloads([item['collector'].id for item in nearby])
+    best = None
+    best_cost = None
+    for item in nearby:
+        load = workloads.get(item['collector'].id, 0)
+        if load >= capacity:
+            continue
+        cost = item['distance_km'] + workload_weight_km * load
+        if best_cost is None or cost < best_cost:
+            best = item['collector']
+            best_cost = cost
+    return best
@@ -0,0 +1,63 @@
+"""
+System checks for the registration app.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from django.db import DatabaseError, connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+@register(Tags.database)
+def pickup_query_indexes(app_configs, databases=None, **kwargs):
+    """
+    Fail when a hot pickup query stops using its index.
+
+    Runs with ``manage.py check --database default``. Skipped while
+    migrations are pending, since the indexes may not exist yet.
+    """
+    from .query_plans import SUPPORTED_VENDORS, explain_hot_queries
+
+    errors = []
+    for alias in databases or ():
+        connection = connections[alias]
+        if connection.vendor not in SUPPORTED_VENDORS:
+            continue
+        try:
+            executor = MigrationExecutor(connection)
+            if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+                continue
+            results = list(explain_hot_queries(alias))
+        except DatabaseError:
+            continue
+        for name, index, plan, used in results:
+            if not used:
+                errors.append(Error(
+                    f'{name} does not use {index} on {alias}',
+                    hint=f'Plan: {plan}. Run `manage.py explain_pickup_queries --verbose-plans`.',
+                    id='registration.E001',
+                ))
+    return errors
+
+
+@register(Tags.caches)
+def shared_cache_for_workers(app_configs, **kwargs):
+    """
+    Fail when several worker processes would each keep their own cache.
+
+    Background job progress, live positions and the collector index version
+    are read by whichever worker serves the next request, so they need a
+    cache shared by every process.
+    """
+    if getattr(settings, 'WEB_CONCURRENCY', 1) <= 1:
+        return []
+    aliases = {'default', getattr(settings, 'LIVE_POSITION_CACHE_ALIAS', 'default')}
+    errors = []
+    for alias in sorted(aliases):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+        if backend.endswith('LocMemCache'):
+            errors.append(Error(
+                f'Cache {alias!r} is in-process memory but WEB_CONCURRENCY is {settings.WEB_CONCURRENCY}',
+                hint='Set CACHE_BACKEND/CACHE_LOCATION to a shared cache such as Redis, or run one worker process.',
+                id='registration.E002',
+            ))
+    return errors
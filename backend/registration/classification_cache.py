@@ -0,0 +1,190 @@
+"""
+In-process cache of waste classification results for repeated uploads.
+
+Households often upload the same photo, or a re-encoded copy of it, several
+times while filling in the pickup form. Results are looked up first by the
+SHA-256 of the uploaded bytes (before decoding) and then by a perceptual
+key of the decoded thumbnail, which survives re-compression and resizing.
+
+The perceptual key is the mean colour, quantized to COLOUR_STEP levels per
+channel, plus a 64-bit difference hash (dHash). dHash only sees the
+structure of the greyscale image, while the classifier decides largely by
+colour, so two photos only match when their colours agree as well. Near
+dHash matches within MAX_DISTANCE bits are found through four 16-bit bands
+of the hash: two hashes that differ in at most three bits share at least
+one band exactly, so a lookup only compares against the few entries in
+matching bands. Entries are evicted least recently used beyond
+CLASSIFIER_CACHE_SIZE.
+"""
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from PIL import Image, ImageStat
+
+DEFAULT_MAX_ENTRIES = 1024
+
+# Largest Hamming distance between dHashes treated as the same photo; must
+# stay below BANDS for the band lookup to find every match
+MAX_DISTANCE = 3
+
+BANDS = 4
+BAND_BITS = 64 // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Width of the mean colour buckets (0-255 per channel)
+COLOUR_STEP = 8
+
+# (quantized mean colour, dHash)
+PerceptualKey = Tuple[Tuple[int, int, int], int]
+
+
+def content_hash(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """64-bit dHash: whether each pixel of a 9x8 greyscale thumbnail is brighter than its right neighbour"""
+    pixels = list(image.convert('L').resize((9, 8), Image.BILINEAR).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            value = (value << 1) | (left > pixels[row * 9 + col + 1])
+    return value
+
+
+def colour_signature(image: Image.Image) -> Tuple[int, int, int]:
+    """Mean RGB colour, quantized to COLOUR_STEP-wide buckets"""
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return tuple(int(channel) // COLOUR_STEP for channel in ImageStat.Stat(image).mean)
+
+
+def perceptual_key(image: Image.Image) -> PerceptualKey:
+    return colour_signature(image), perceptual_hash(image)
+
+
+def _bands(key: PerceptualKey):
+    colour, phash = key
+    return [(colour, band, (phash >> (band * BAND_BITS)) & BAND_MASK) for band in range(BANDS)]
+
+
+class ClassificationCache:
+    """Thread-safe LRU of classification results keyed by content hash and perceptual key"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_distance: int = MAX_DISTANCE):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS}")
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        # perceptual key -> result, least recently used first
+        self._results: 'OrderedDict[PerceptualKey, Dict]' = OrderedDict()
+        # sha256 -> perceptual key, least recently used first
+        self._digests: 'OrderedDict[str, PerceptualKey]' = OrderedDict()
+        # (colour, band, band value) -> perceptual keys
+        self._band_index: Dict[tuple, set] = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_exact(self, digest: str) -> Optional[Dict]:
+        """Result for identical upload bytes; does not count a miss"""
+        with self._lock:
+            key = self._digests.get(digest)
+            if key is None or key not in self._results:
+                return None
+            self._digests.move_to_end(digest)
+            self._results.move_to_end(key)
+            self.exact_hits += 1
+            return copy.deepcopy(self._results[key])
+
+    def get_similar(self, key: PerceptualKey) -> Optional[Dict]:
+        """
+        Result for a photo of the same colour bucket whose dHash is within
+        ``max_distance`` bits; counts a miss otherwise
+        """
+        with self._lock:
+            match = key if key in self._results else self._nearest(key)
+            if match is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end(match)
+            self.perceptual_hits += 1
+            return copy.deepcopy(self._results[match])
+
+    def put(self, digest: str, key: PerceptualKey, result: Dict):
+        with self._lock:
+            if key not in self._results:
+                for band in _bands(key):
+                    self._band_index.setdefault(band, set()).add(key)
+            self._results[key] = copy.deepcopy(result)
+            self._results.move_to_end(key)
+            self._digests[digest] = key
+            self._digests.move_to_end(digest)
+            while len(self._results) > self.max_entries:
+                self._evict()
+            # Several uploads can map to one photo; keep the digests bounded too
+            while len(self._digests) > self.max_entries * 2:
+                self._digests.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._digests.clear()
+            self._band_index.clear()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.exact_hits + self.perceptual_hits + self.misses
+            return {
+                'entries': len(self._results),
+                'max_entries': self.max_entries,
+                'exact_hits': self.exact_hits,
+                'perceptual_hits': self.perceptual_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.exact_hits + self.perceptual_hits) / lookups, 4) if lookups else None,
+            }
+
+    def _nearest(self, key: PerceptualKey) -> Optional[PerceptualKey]:
+        best, best_distance = None, self.max_distance + 1
+        phash = key[1]
+        for band in _bands(key):
+            for candidate in self._band_index.get(band, ()):
+                distance = bin(candidate[1] ^ phash).count('1')
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+        return best
+
+    def _evict(self):
+        key, _ = self._results.popitem(last=False)
+        for band in _bands(key):
+            bucket = self._band_index.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._band_index[band]
+        self.evictions += 1
+        # Digests pointing at it are dropped lazily: get_exact misses on them
+
+
+_classification_cache = None
+_classification_cache_lock = threading.Lock()
+
+
+def get_classification_cache() -> ClassificationCache:
+    """Get or create the process-wide classification cache"""
+    global _classification_cache
+    if _classification_cache is None:
+        with _classification_cache_lock:
+            if _classification_cache is None:
+                _classification_cache = ClassificationCache(
+                    getattr(settings, 'CLASSIFIER_CACHE_SIZE', DEFAULT_MAX_ENTRIES)
+                )
+    return _classification_cache
@@ -0,0 +1,183 @@
+"""
+Micro-batching in front of the waste classifier.
+
+Upload requests hand their decoded image to a single inference thread,
+which waits up to CLASSIFIER_MAX_WAIT_MS for other requests to arrive,
+stacks up to CLASSIFIER_MAX_BATCH_SIZE preprocessed tensors and runs one
+forward pass for all of them. Preprocessing stays on the request threads,
+so it runs in parallel while the model works on the previous batch.
+When the model is not used (no PyTorch, or a custom model whose outputs do
+not map to waste categories) requests are classified by colour directly,
+since there is no forward pass to share. Repeated uploads are
+answered from the classification cache before any of this.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from PIL import Image
+
+from .classification_cache import ClassificationCache, content_hash, get_classification_cache, perceptual_key
+from .waste_classifier import WasteClassifier, decode_image, get_waste_classifier
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT_MS = 5
+
+# Longest a request waits for its batch before giving up
+DEFAULT_TIMEOUT_SECONDS = 30
+
+
+class _Request:
+    __slots__ = ('image', 'tensor', 'future')
+
+    def __init__(self, image, tensor):
+        self.image = image
+        self.tensor = tensor
+        self.future = Future()
+
+
+class BatchingClassifier:
+    """
+    Collects concurrent ``classify`` calls into batches for one classifier.
+
+    Results are the same dicts ``WasteClassifier.classify`` returns.
+    """
+
+    def __init__(self, classifier: WasteClassifier, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, cache: Optional[ClassificationCache] = None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+        self.classifier = classifier
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: 'queue.Queue[_Request]' = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        # Batches run and images classified, for sizing the settings
+        self.batches = 0
+        self.images = 0
+
+    @property
+    def batching(self) -> bool:
+        """Whether calls go through the batch queue (only when the model is used)"""
+        return self.classifier.uses_model
+
+    def submit(self, image: Image.Image) -> Future:
+        """Queue an image; the future resolves to its classification result"""
+        if not self.batching:
+            future = Future()
+            future.set_result(self.classifier.classify(image))
+            return future
+
+        try:
+            tensor = self.classifier.preprocess_image(image)
+        except Exception as e:
+            logger.error(f"Classification error: {e}")
+            future = Future()
+            future.set_result(self.classifier._error_result(e))
+            return future
+
+        request = _Request(image, tensor)
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future
+
+    def classify(self, image: Image.Image, timeout: Optional[float] = DEFAULT_TIMEOUT_SECONDS) -> Dict[str, any]:
+        """Classify an image as part of the next batch, blocking until done"""
+        return self.submit(image).result(timeout)
+
+    def classify_from_bytes(self, image_bytes: bytes) -> Dict[str, any]:
+        """Same as ``WasteClassifier.classify_from_bytes``, cached and batched"""
+        cache = self.cache
+        if cache is not None:
+            digest = content_hash(image_bytes)
+            result = cache.get_exact(digest)
+            if result is not None:
+                return result
+
+        try:
+            # Decode here, on the request thread, not on the inference thread
+            image = decode_image(image_bytes)
+        except Exception as e:
+            logger.error(f"Error processing image bytes: {e}")
+            return {
+                'category': 'General Waste',
+                'confidence': 0.0,
+                'success': False,
+                'error': str(e)
+            }
+
+        if cache is not None:
+            key = perceptual_key(image)
+            result = cache.get_similar(key)
+            if result is None:
+                result = self.classify(image)
+                if not result.get('success'):
+                    return result
+            # Also stored for near matches, so identical re-uploads hit on the digest
+            cache.put(digest, key, result)
+            return result
+        return self.classify(image)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._worker_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(
+                        target=self._run, name='waste-classifier-batcher', daemon=True
+                    )
+                    self._worker.start()
+
+    def _next_batch(self) -> List[_Request]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Take whatever is already queued even after the deadline
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self.classifier.classify_batch(
+                    [request.image for request in batch],
+                    [request.tensor for request in batch],
+                )
+            except Exception as e:
+                logger.error(f"Batch classification error: {e}")
+                results = [self.classifier._error_result(e)] * len(batch)
+            self.batches += 1
+            self.images += len(batch)
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+
+_batching_classifier = None
+_batching_classifier_lock = threading.Lock()
+
+
+def get_batching_classifier() -> BatchingClassifier:
+    """Get or create the batching classifier singleton around ``get_waste_classifier()``"""
+    global _batching_classifier
+    if _batching_classifier is None:
+        with _batching_classifier_lock:
+            if _batching_classifier is None:
+                _batching_classifier = BatchingClassifier(
+                    get_waste_classifier(),
+                    max_batch_size=getattr(settings, 'CLASSIFIER_MAX_BATCH_SIZE', DEFAULT_MAX_BATCH_SIZE),
+                    max_wait_ms=getattr(settings, 'CLASSIFIER_MAX_WAIT_MS', DEFAULT_MAX_WAIT_MS),
+                    cache=get_classification_cache() if getattr(settings, 'CLASSIFIER_CACHE_SIZE', 1) > 0 else None,
+                )
+    return _batching_classifier
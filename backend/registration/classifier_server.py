@@ -0,0 +1,176 @@
+"""
+Out-of-process waste classifier.
+
+``manage.py run_classifier_server`` loads the model once and serves
+classifications over a Unix socket; every web worker process sends its
+uploads there instead of loading its own copy of the model. The server
+handles each connection on its own thread, so uploads from all web workers
+are decoded in parallel (Pillow releases the GIL while decoding), share the
+micro-batches of ``classifier_batching`` and one classification cache.
+
+Wire format: each message is a 4-byte big-endian length followed by the
+payload. A request payload is a one-byte operation (``C`` classify, ``S``
+stats) followed by the image bytes for ``C``; the response is JSON.
+
+Set CLASSIFIER_SOCKET to the socket path to use the server. When it is
+unreachable, ``classify_image_bytes`` falls back to classifying in-process.
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+from typing import Dict, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+OP_CLASSIFY = b'C'
+OP_STATS = b'S'
+
+_LENGTH = struct.Struct('>I')
+
+# Uploads are capped at 10MB by the view; leave room for the operation byte
+MAX_MESSAGE_BYTES = 11 * 1024 * 1024
+
+DEFAULT_TIMEOUT_SECONDS = 30
+
+
+class ClassifierUnavailable(ConnectionError):
+    """Raised when the classifier server cannot be reached or answers badly"""
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1024 * 1024))
+        if not chunk:
+            raise ConnectionError('Connection closed mid-message')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(sock: socket.socket, payload: bytes):
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def recv_message(sock: socket.socket) -> bytes:
+    (size,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ConnectionError(f'Message of {size} bytes exceeds {MAX_MESSAGE_BYTES}')
+    return _recv_exactly(sock, size)
+
+
+class ClassifierClient:
+    """Talks to ``run_classifier_server``; one short-lived connection per call"""
+
+    def __init__(self, socket_path: str, timeout: float = DEFAULT_TIMEOUT_SECONDS):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _call(self, payload: bytes) -> Dict[str, any]:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                send_message(sock, payload)
+                return json.loads(recv_message(sock))
+        except (OSError, ValueError) as e:
+            raise ClassifierUnavailable(f'Classifier server at {self.socket_path}: {e}') from e
+
+    def classify_from_bytes(self, image_bytes: bytes) -> Dict[str, any]:
+        """Same result as ``WasteClassifier.classify_from_bytes``"""
+        return self._call(OP_CLASSIFY + image_bytes)
+
+    def stats(self) -> Dict[str, any]:
+        """The server's cache and batching counters"""
+        return self._call(OP_STATS)
+
+
+def get_classifier_client() -> Optional[ClassifierClient]:
+    """Client for CLASSIFIER_SOCKET, or None when no server is configured"""
+    socket_path = getattr(settings, 'CLASSIFIER_SOCKET', '')
+    if not socket_path:
+        return None
+    return ClassifierClient(
+        socket_path, getattr(settings, 'CLASSIFIER_SOCKET_TIMEOUT_SECONDS', DEFAULT_TIMEOUT_SECONDS)
+    )
+
+
+def classifier_stats(classifier) -> Dict[str, any]:
+    """Cache and batching counters of a ``BatchingClassifier``"""
+    return {
+        'cache': classifier.cache.stats() if classifier.cache is not None else None,
+        'batching': {
+            'enabled': classifier.batching,
+            'batches': classifier.batches,
+            'images': classifier.images,
+        },
+    }
+
+
+def classify_image_bytes(image_bytes: bytes) -> Dict[str, any]:
+    """
+    Classify an upload on the classifier server if one is configured,
+    otherwise (or if it is down) in this process
+    """
+    client = get_classifier_client()
+    if client is not None:
+        try:
+            return client.classify_from_bytes(image_bytes)
+        except ClassifierUnavailable as e:
+            logger.warning(f"{e}. Classifying in-process.")
+
+    from .classifier_batching import get_batching_classifier
+    return get_batching_classifier().classify_from_bytes(image_bytes)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            payload = recv_message(self.request)
+        except (OSError, ConnectionError) as e:
+            logger.warning(f"Bad classifier request: {e}")
+            return
+
+        op, body = payload[:1], payload[1:]
+        if op == OP_CLASSIFY:
+            try:
+                response = self.server.classifier.classify_from_bytes(body)
+            except Exception as e:
+                # Answer the client instead of leaving it to time out
+                logger.error(f"Classification error: {e}")
+                response = {'success': False, 'error': str(e)}
+        elif op == OP_STATS:
+            response = dict(classifier_stats(self.server.classifier), success=True)
+        else:
+            response = {'success': False, 'error': f'Unknown operation {op!r}'}
+        try:
+            send_message(self.request, json.dumps(response).encode())
+        except OSError as e:
+            logger.warning(f"Could not send classifier response: {e}")
+
+
+class ClassifierServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix-socket server around one ``BatchingClassifier``"""
+
+    daemon_threads = True
+    # Connections waiting to be accepted; the default of 5 refuses bursts of uploads
+    request_queue_size = 128
+
+    def __init__(self, socket_path: str, classifier):
+        if os.path.exists(socket_path):
+            # Left behind by a previous run
+            os.unlink(socket_path)
+        self.classifier = classifier
+        super().__init__(socket_path, _Handler)
+        # Web workers may run as another user of the same group
+        os.chmod(socket_path, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
@@ -0,0 +1,237 @@
+"""
+Server-side map clustering.
+
+Points are bucketed into a pyramid of square latitude/longitude grids, one
+grid per map zoom level, built once and reused for MAP_CLUSTER_MAX_AGE_SECONDS.
+Saves do not drop it: at map zoom levels a few moved or new points only
+show up a minute later, which is cheaper than rescanning the table on the
+next request after every write. A map request only reads the cells inside
+its bounding box at its zoom level, so the response size depends on the
+viewport, not on how many pickups exist.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+LAYERS = ('pickups', 'collectors')
+
+# Pickup statuses shown on the map
+MAP_PICKUP_STATUSES = ['Pending', 'Scheduled', 'In Progress']
+
+# Deeper zoom levels reuse the finest grid (~80m cells)
+MIN_ZOOM = 0
+MAX_ZOOM = 16
+
+# Grid cells per 256px map tile width (~32px per cluster on screen)
+CELLS_PER_TILE = 8
+
+# Upper bound on clusters returned; larger viewports are coarsened
+DEFAULT_MAX_CLUSTERS = 500
+
+DEFAULT_MAX_AGE_SECONDS = 60
+
+
+def cell_size_for_zoom(zoom: int) -> float:
+    """Grid cell size in degrees for a web-map zoom level"""
+    return 360.0 / (2 ** zoom * CELLS_PER_TILE)
+
+
+def _cell_keys(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Pack (row, col) into one sortable int64 key"""
+    return (rows << 32) + (cols + (1 << 31))
+
+
+class _ZoomGrid:
+    """Aggregates for every occupied cell at one zoom level, sorted by (row, col)"""
+
+    def __init__(self, zoom: int, rows: np.ndarray, cols: np.ndarray, counts: np.ndarray,
+                 lat_sums: np.ndarray, lon_sums: np.ndarray, breakdown: np.ndarray,
+                 sample_ids: np.ndarray):
+        # Rows/cols may repeat; merge them into one entry per cell
+        keys, inverse = np.unique(_cell_keys(rows, cols), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        size = len(keys)
+
+        self.zoom = zoom
+        self.cell_size = cell_size_for_zoom(zoom)
+        self.rows = keys >> 32
+        self.cols = (keys & 0xFFFFFFFF) - (1 << 31)
+        self.counts = np.bincount(inverse, weights=counts, minlength=size).astype(np.int32)
+        self.lat_sums = np.bincount(inverse, weights=lat_sums, minlength=size)
+        self.lon_sums = np.bincount(inverse, weights=lon_sums, minlength=size)
+        self.breakdown = np.zeros((size, breakdown.shape[1]), dtype=np.int32)
+        np.add.at(self.breakdown, inverse, breakdown)
+        # Any member id, reported for single-point cells
+        self.sample_ids = np.zeros(size, dtype=np.int64)
+        self.sample_ids[inverse] = sample_ids
+
+    @classmethod
+    def from_points(cls, zoom: int, lats: np.ndarray, lons: np.ndarray,
+                    categories: np.ndarray, num_categories: int, ids: np.ndarray) -> '_ZoomGrid':
+        cell_size = cell_size_for_zoom(zoom)
+        breakdown = np.zeros((len(ids), num_categories), dtype=np.int32)
+        breakdown[np.arange(len(ids)), categories] = 1
+        return cls(
+            zoom,
+            np.floor(lats / cell_size).astype(np.int64),
+            np.floor(lons / cell_size).astype(np.int64),
+            np.ones(len(ids)), lats, lons, breakdown, ids
+        )
+
+    def coarsen(self) -> '_ZoomGrid':
+        """Grid for the next zoom level out; each cell merges a 2x2 block"""
+        return _ZoomGrid(
+            self.zoom - 1, self.rows // 2, self.cols // 2, self.counts,
+            self.lat_sums, self.lon_sums, self.breakdown, self.sample_ids
+        )
+
+    def __len__(self):
+        return len(self.counts)
+
+    def select(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Indices of the cells overlapping a bounding box"""
+        min_row = int(np.floor(min_lat / self.cell_size))
+        max_row = int(np.floor(max_lat / self.cell_size))
+        min_col = int(np.floor(min_lon / self.cell_size))
+        max_col = int(np.floor(max_lon / self.cell_size))
+        start, stop = np.searchsorted(self.rows, [min_row, max_row + 1])
+        cols = self.cols[start:stop]
+        return start + np.flatnonzero((cols >= min_col) & (cols <= max_col))
+
+
+class ClusterPyramid:
+    """
+    Multi-resolution grid over one layer of map points.
+
+    The finest level is built from the points; every coarser level is
+    built from the one below it, so the whole pyramid costs little more
+    than a single pass over the points.
+    """
+
+    def __init__(self, lats: Sequence, lons: Sequence, categories: Sequence[str], ids: Sequence[int]):
+        self.category_names: List[str] = sorted(set(categories))
+        codes = {name: code for code, name in enumerate(self.category_names)}
+        self.total = len(ids)
+
+        self.grids: Dict[int, _ZoomGrid] = {}
+        if self.total:
+            grid = _ZoomGrid.from_points(
+                MAX_ZOOM,
+                np.asarray(lats, dtype=np.float64),
+                np.asarray(lons, dtype=np.float64),
+                np.array([codes[name] for name in categories], dtype=np.int64),
+                len(self.category_names),
+                np.asarray(ids, dtype=np.int64),
+            )
+            self.grids[MAX_ZOOM] = grid
+            for zoom in range(MAX_ZOOM - 1, MIN_ZOOM - 1, -1):
+                grid = self.grids[zoom] = grid.coarsen()
+        self.built_at = time.monotonic()
+
+    def clusters(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                 zoom: int, max_clusters: int = DEFAULT_MAX_CLUSTERS) -> Tuple[int, List[Dict[str, object]]]:
+        """
+        Clusters inside a bounding box.
+
+        Falls back to coarser zoom levels until at most ``max_clusters``
+        cells are returned.
+
+        Returns:
+            (zoom level actually used, list of cluster dictionaries)
+        """
+        zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+        if not self.total:
+            return zoom, []
+
+        grid = self.grids[zoom]
+        selected = grid.select(min_lat, min_lon, max_lat, max_lon)
+        while len(selected) > max_clusters and zoom > MIN_ZOOM:
+            zoom -= 1
+            grid = self.grids[zoom]
+            selected = grid.select(min_lat, min_lon, max_lat, max_lon)
+
+        counts = grid.counts[selected]
+        lats = grid.lat_sums[selected] / counts
+        lons = grid.lon_sums[selected] / counts
+        breakdown = grid.breakdown[selected]
+
+        clusters = []
+        for i in range(len(selected)):
+            cluster = {
+                'count': int(counts[i]),
+                'latitude': round(float(lats[i]), 6),
+                'longitude': round(float(lons[i]), 6),
+                'categories': {
+                    self.category_names[code]: int(n)
+                    for code, n in enumerate(breakdown[i].tolist()) if n
+                },
+            }
+            if counts[i] == 1:
+                cluster['id'] = int(grid.sample_ids[selected[i]])
+            clusters.append(cluster)
+        return zoom, clusters
+
+
+def _load_layer(layer: str):
+    """Load (lats, lons, categories, ids) for a map layer"""
+    from .live_positions import get_live_positions
+    from .models import Collector, WastePickupRequest
+
+    if layer == 'pickups':
+        rows = WastePickupRequest.objects.filter(
+            status__in=MAP_PICKUP_STATUSES,
+            latitude__isnull=False,
+            longitude__isnull=False
+        ).values_list('latitude', 'longitude', 'waste_category__name', 'id')
+    else:
+        rows = Collector.objects.filter(
+            latitude__isnull=False,
+            longitude__isnull=False
+        ).values_list('latitude', 'longitude', 'is_available', 'id')
+
+    lats, lons, categories, ids = [], [], [], []
+    for lat, lon, category, row_id in rows.iterator(chunk_size=5000):
+        lats.append(float(lat))
+        lons.append(float(lon))
+        if layer == 'collectors':
+            category = 'Available' if category else 'Unavailable'
+        categories.append(category or 'Uncategorized')
+        ids.append(row_id)
+
+    if layer == 'collectors':
+        # Recent pings may not have been written to the database yet
+        live = get_live_positions(ids)
+        for i, collector_id in enumerate(ids):
+            if collector_id in live:
+                lats[i], lons[i] = live[collector_id]
+    return lats, lons, categories, ids
+
+
+_pyramids: Dict[str, ClusterPyramid] = {}
+_pyramids_lock = threading.Lock()
+
+
+def get_cluster_pyramid(layer: str) -> ClusterPyramid:
+    """Get or build the process-wide pyramid for a layer"""
+    if layer not in LAYERS:
+        raise ValueError(f"Unknown map layer: {layer}")
+    max_age = getattr(settings, 'MAP_CLUSTER_MAX_AGE_SECONDS', DEFAULT_MAX_AGE_SECONDS)
+    pyramid = _pyramids.get(layer)
+    if pyramid is None or time.monotonic() - pyramid.built_at > max_age:
+        with _pyramids_lock:
+            pyramid = _pyramids.get(layer)
+            if pyramid is None or time.monotonic() - pyramid.built_at > max_age:
+                pyramid = _pyramids[layer] = ClusterPyramid(*_load_layer(layer))
+    return pyramid
+
+
+def invalidate_cluster_pyramid(layer: Optional[str] = None):
+    """Drop a cached pyramid (or all of them) so the next request rebuilds it"""
+    with _pyramids_lock:
+        if layer is None:
+            _pyramids.clear()
+        else:
+            _pyramids.pop(layer, None)
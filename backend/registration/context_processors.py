@@ -0,0 +1,28 @@
+"""
+Template context processors
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .notifications import get_unread_summary
+
+
+def notifications(request):
+    """
+    Unread notifications for the page header.
+
+    Adds ``unread_notification_count`` and ``unread_notifications`` (latest
+    unread first). Both are lazy, so pages that do not show them cost nothing;
+    the names differ from view context keys because processors are applied
+    after the view's context.
+    """
+    def summary():
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return {'count': 0, 'latest': []}
+        return get_unread_summary(user.id)
+
+    cached = SimpleLazyObject(summary)
+    return {
+        'unread_notification_count': SimpleLazyObject(lambda: cached['count']),
+        'unread_notifications': SimpleLazyObject(lambda: cached['latest']),
+    }
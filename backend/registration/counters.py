@@ -0,0 +1,167 @@
+"""
+Denormalized pickup counters per household and per collector.
+
+Dashboards read one HouseholdStats/CollectorStats row instead of scanning
+the pickup history. When a save or delete changes a counted field, the
+rows of the households and collectors involved (before and after the
+change) are recounted from the pickup table once the transaction commits.
+Recounting under a lock on the counter rows, rather than adding deltas
+computed from the state a request loaded, keeps concurrent edits of the
+same pickup from drifting the counts. ``manage.py rebuild_pickup_counters``
+reconciles every row.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+# Counter column for each pickup status
+STATUS_FIELDS = {
+    'Pending': 'pending_count',
+    'Scheduled': 'scheduled_count',
+    'In Progress': 'in_progress_count',
+    'Completed': 'completed_count',
+    'Cancelled': 'cancelled_count',
+}
+
+# Pickup fields a counter depends on
+TRACKED_FIELDS = ('household_id', 'collector_id', 'status', 'quantity', 'completed_date')
+
+REBUILD_CHUNK_SIZE = 1000
+
+# (household_id, collector_id, status, quantity, completed_date)
+Snapshot = Tuple[Optional[int], Optional[int], str, Decimal, Optional[object]]
+
+
+def _models():
+    from .models import CollectorStats, HouseholdStats
+    return {'household_id': HouseholdStats, 'collector_id': CollectorStats}
+
+
+def snapshot(pickup) -> Optional[Snapshot]:
+    """
+    Capture the counted fields of a pickup.
+
+    Reads ``__dict__`` so that deferred fields are never loaded; returns
+    None when any of them is deferred.
+    """
+    values = pickup.__dict__
+    if any(name not in values for name in TRACKED_FIELDS):
+        return None
+    quantity = values['quantity']
+    return (
+        values['household_id'],
+        values['collector_id'],
+        values['status'],
+        Decimal(str(quantity)) if quantity is not None else Decimal('0'),
+        values['completed_date'] if values['status'] == 'Completed' else None,
+    )
+
+
+def _counter_aggregates() -> Dict[str, object]:
+    aggregates = {field: Count('id', filter=Q(status=status)) for status, field in STATUS_FIELDS.items()}
+    aggregates['total_count'] = Count('id')
+    aggregates['total_weight'] = Coalesce(
+        Sum('quantity'), Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=14, decimal_places=2)
+    )
+    aggregates['last_pickup_at'] = Max('completed_date', filter=Q(status='Completed'))
+    return aggregates
+
+
+def _counter_rows(owner_field: str, owner_ids: List[int]) -> Dict[int, Dict[str, object]]:
+    """Counter values computed from the pickup table, for the owners that have pickups"""
+    from .models import WastePickupRequest
+
+    rows = WastePickupRequest.objects.filter(**{f'{owner_field}__in': owner_ids}).values(
+        owner_field
+    ).annotate(**_counter_aggregates()).order_by()
+    return {row.pop(owner_field): row for row in rows}
+
+
+def compute_counters(owner_field: str, owner_id: int):
+    """Unsaved counter row for one owner, computed from the pickup table"""
+    model = _models()[owner_field]
+    totals = _counter_rows(owner_field, [owner_id]).get(owner_id, {})
+    return model(**{owner_field: owner_id}, **totals)
+
+
+def _rebuild(owner_field: str, owner_ids: Iterable[int]) -> int:
+    """Recompute counter rows for the given owners from the pickup table"""
+    model = _models()[owner_field]
+    owner_key = owner_field[:-len('_id')]
+    counter_fields = list(_counter_aggregates()) + ['updated_at']
+    owner_ids = sorted({owner_id for owner_id in owner_ids if owner_id is not None})
+    for start in range(0, len(owner_ids), REBUILD_CHUNK_SIZE):
+        chunk = owner_ids[start:start + REBUILD_CHUNK_SIZE]
+        with transaction.atomic():
+            # Concurrent recounts of the same rows run one after another, so
+            # the last one to write has counted every committed change
+            list(model.objects.select_for_update().filter(pk__in=chunk).values_list('pk', flat=True))
+            # Owners deleted meanwhile (with their pickups) get no row
+            owner_model = model._meta.get_field(owner_key).related_model
+            chunk = list(owner_model.objects.filter(pk__in=chunk).values_list('pk', flat=True))
+            totals = _counter_rows(owner_field, chunk)
+            # Upsert: concurrent first writes for the same owner both succeed
+            model.objects.bulk_create(
+                [model(**{owner_field: owner_id}, **totals.get(owner_id, {})) for owner_id in chunk],
+                update_conflicts=True, unique_fields=[owner_key], update_fields=counter_fields,
+            )
+    return len(owner_ids)
+
+
+def rebuild_household_stats(household_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute HouseholdStats for some (or all) households; returns rows written"""
+    from .models import Household
+
+    if household_ids is None:
+        household_ids = Household.objects.values_list('id', flat=True)
+    return _rebuild('household_id', household_ids)
+
+
+def rebuild_collector_stats(collector_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute CollectorStats for some (or all) collectors; returns rows written"""
+    from .models import Collector
+
+    if collector_ids is None:
+        collector_ids = Collector.objects.values_list('id', flat=True)
+    return _rebuild('collector_id', collector_ids)
+
+
+def _recount_on_commit(household_ids: Iterable[int], collector_ids: Iterable[int]):
+    household_ids = {owner_id for owner_id in household_ids if owner_id is not None}
+    collector_ids = {owner_id for owner_id in collector_ids if owner_id is not None}
+
+    def recount():
+        rebuild_household_stats(household_ids)
+        if collector_ids:
+            rebuild_collector_stats(collector_ids)
+
+    # After commit, so the recount sees this change and every one committed before it
+    transaction.on_commit(recount)
+
+
+def record_pickup_saved(pickup, created: bool):
+    """post_save handler body: recount the owners if a counted field changed"""
+    old = None if created else getattr(pickup, '_counter_snapshot', None)
+    new = snapshot(pickup)
+    if new is not None and old == new:
+        return
+    households, collectors = [pickup.household_id], [pickup.collector_id]
+    if old is not None:
+        households.append(old[0])
+        collectors.append(old[1])
+    _recount_on_commit(households, collectors)
+    pickup._counter_snapshot = new
+
+
+def record_pickup_deleted(pickup):
+    """post_delete handler body: recount the pickup's owners"""
+    old = getattr(pickup, '_counter_snapshot', None) or snapshot(pickup)
+    households, collectors = [pickup.household_id], [pickup.collector_id]
+    if old is not None:
+        households.append(old[0])
+        collectors.append(old[1])
+    _recount_on_commit(households, collectors)
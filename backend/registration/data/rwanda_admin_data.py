@@ -394,3 +394,52 @@ RWANDA_ADMIN_DATA = {
     },
 }
 
+
+# Approximate centroids (latitude, longitude) used by the offline gazetteer.
+# Lower levels (sectors, cells, villages) inherit their district's centroid
+# until enough geolocated households exist to derive a better one.
+PROVINCE_CENTROIDS = {
+    "Kigali": (-1.9441, 30.0619),
+    "Northern Province": (-1.6000, 29.8500),
+    "Southern Province": (-2.4000, 29.7000),
+    "Eastern Province": (-1.8000, 30.4500),
+    "Western Province": (-2.0000, 29.3500),
+}
+
+DISTRICT_CENTROIDS = {
+    # Kigali
+    "Nyarugenge": (-1.9536, 30.0606),
+    "Gasabo": (-1.8833, 30.1000),
+    "Kicukiro": (-1.9700, 30.1000),
+    # Northern Province
+    "Musanze": (-1.4996, 29.6344),
+    "Burera": (-1.4667, 29.8333),
+    "Gakenke": (-1.6833, 29.7833),
+    "Gicumbi": (-1.5833, 30.0667),
+    "Rulindo": (-1.7333, 29.9833),
+    # Southern Province
+    "Nyanza": (-2.3519, 29.7509),
+    "Gisagara": (-2.6167, 29.8333),
+    "Nyaruguru": (-2.6833, 29.5167),
+    "Huye": (-2.5967, 29.7394),
+    "Nyamagabe": (-2.4667, 29.4833),
+    "Kamonyi": (-2.0000, 29.9000),
+    "Muhanga": (-2.0833, 29.7500),
+    "Ruhango": (-2.2333, 29.7833),
+    # Eastern Province
+    "Rwamagana": (-1.9487, 30.4347),
+    "Nyagatare": (-1.3000, 30.3333),
+    "Gatsibo": (-1.6000, 30.4500),
+    "Kayonza": (-1.9000, 30.5000),
+    "Kirehe": (-2.2667, 30.7167),
+    "Ngoma": (-2.1667, 30.4667),
+    "Bugesera": (-2.2000, 30.1500),
+    # Western Province
+    "Karongi": (-2.0667, 29.4000),
+    "Rutsiro": (-1.9333, 29.3333),
+    "Rubavu": (-1.6833, 29.3500),
+    "Nyabihu": (-1.6500, 29.5000),
+    "Ngororero": (-1.8667, 29.6333),
+    "Nyamasheke": (-2.3333, 29.1333),
+    "Rusizi": (-2.4833, 28.9000),
+}
@@ -0,0 +1,128 @@
+"""
+Streaming pickup exports for operations reporting.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` (a server-side
+cursor on PostgreSQL) and encoded one at a time, so an export of any size
+holds a single chunk in memory and the first bytes go out as soon as the
+first chunk arrives. In CSV exports, text cells starting with ``=``, ``+``,
+``-`` or ``@`` are prefixed with ``'`` so spreadsheets do not run them as
+formulas.
+"""
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, Optional
+
+from django.conf import settings
+
+FORMATS = ('csv', 'jsonl')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# (column name, ORM lookup)
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('status', 'status'),
+    ('waste_category', 'waste_category__name'),
+    ('quantity_kg', 'quantity'),
+    ('address', 'address'),
+    ('latitude', 'latitude'),
+    ('longitude', 'longitude'),
+    ('household_id', 'household_id'),
+    ('household_username', 'household__user__username'),
+    ('household_first_name', 'household__user__first_name'),
+    ('household_last_name', 'household__user__last_name'),
+    ('household_phone', 'household__phone_number'),
+    ('province', 'household__province__name'),
+    ('district', 'household__district__name'),
+    ('sector', 'household__sector__name'),
+    ('cell', 'household__cell__name'),
+    ('village', 'household__village__name'),
+    ('collector_id', 'collector_id'),
+    ('collector_username', 'collector__user__username'),
+    ('collector_phone', 'collector__phone_number'),
+    ('scheduled_date', 'scheduled_date'),
+    ('completed_date', 'completed_date'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+)
+
+HEADERS = [name for name, _ in EXPORT_COLUMNS]
+
+
+def filter_pickups(queryset, status: Optional[str] = None, province_id=None, district_id=None):
+    """The admin pickup filters (status, household province and district)"""
+    if status:
+        queryset = queryset.filter(status=status)
+    if province_id:
+        queryset = queryset.filter(household__province_id=province_id)
+    if district_id:
+        queryset = queryset.filter(household__district_id=district_id)
+    return queryset
+
+
+def export_rows(queryset, chunk_size: Optional[int] = None) -> Iterator[tuple]:
+    """Export tuples in ``HEADERS`` order, oldest pickup first"""
+    chunk_size = chunk_size or getattr(settings, 'PICKUP_EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    return queryset.order_by('id').values_list(
+        *(lookup for _, lookup in EXPORT_COLUMNS)
+    ).iterator(chunk_size=chunk_size)
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+# Leading characters that make spreadsheet applications evaluate a cell
+FORMULA_PREFIXES = ('=', '+', '-', '@')
+
+
+def _csv_cell(value):
+    """Plain value, with user-entered text that looks like a formula quoted"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return _plain(value)
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADERS)
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def iter_jsonl(rows) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps({name: _plain(value) for name, value in zip(HEADERS, row)}, ensure_ascii=False) + '\n'
+
+
+def iter_export(queryset, export_format: str, chunk_size: Optional[int] = None) -> Iterator[str]:
+    """
+    Encoded export lines for a pickup queryset.
+
+    Args:
+        queryset: WastePickupRequest queryset, usually run through filter_pickups
+        export_format: 'csv' or 'jsonl'
+        chunk_size: Rows fetched from the database at a time
+    """
+    if export_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    rows = export_rows(queryset, chunk_size)
+    return iter_csv(rows) if export_format == 'csv' else iter_jsonl(rows)
@@ -0,0 +1,214 @@
+"""
+Bulk notification fan-out.
+
+Sends one notification to every household and/or collector matching an
+administrative area and pickup status. Recipients are streamed as user ids
+and inserted with ``bulk_create`` in fixed-size batches, so 100k recipients
+cost a few dozen INSERT statements instead of 100k single-row saves. Jobs
+started from a request run on a background thread and report their
+progress in the cache under their job id, which must be shared between
+worker processes for any of them to answer the status endpoint.
+"""
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from typing import Dict, Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .notifications import invalidate as invalidate_summaries
+
+logger = logging.getLogger(__name__)
+
+AUDIENCES = ('households', 'collectors', 'all')
+
+DEFAULT_BATCH_SIZE = 5000
+
+# How long finished job progress stays readable
+PROGRESS_TIMEOUT_SECONDS = 24 * 3600
+
+
+def _progress_key(job_id: str) -> str:
+    return f'notification-fanout:{job_id}'
+
+
+def _filtered(queryset, filters: Dict[str, object], area_lookups: Dict[str, str], status_lookup: str):
+    for name, lookup in area_lookups.items():
+        if filters.get(name):
+            queryset = queryset.filter(**{lookup: filters[name]})
+    if filters.get('pickup_status'):
+        queryset = queryset.filter(**{status_lookup: filters['pickup_status']})
+    # Area joins through sectors/cells and status joins can repeat rows
+    return queryset.values_list('user_id', flat=True).distinct()
+
+
+def recipient_querysets(audience: str = 'households', province_id=None, district_id=None, sector_id=None,
+                        cell_id=None, village_id=None, pickup_status: Optional[str] = None):
+    """
+    User id querysets for the targeted households and/or collectors.
+
+    Args:
+        audience: 'households', 'collectors' or 'all'
+        province_id ... village_id: Only users in this area. Collectors only
+            record a province and district, so finer areas match collectors
+            working in the district that contains them.
+        pickup_status: Only households with a pickup in this status, or
+            collectors assigned a pickup in this status
+    """
+    from .models import Collector, Household
+
+    if audience not in AUDIENCES:
+        raise ValueError(f"audience must be one of: {', '.join(AUDIENCES)}")
+    filters = {
+        'province_id': province_id, 'district_id': district_id, 'sector_id': sector_id,
+        'cell_id': cell_id, 'village_id': village_id, 'pickup_status': pickup_status,
+    }
+
+    querysets = []
+    if audience in ('households', 'all'):
+        querysets.append(_filtered(
+            Household.objects.all(), filters,
+            {name: name for name in ('province_id', 'district_id', 'sector_id', 'cell_id', 'village_id')},
+            'pickup_requests__status',
+        ))
+    if audience in ('collectors', 'all'):
+        querysets.append(_filtered(
+            Collector.objects.all(), filters,
+            {
+                'province_id': 'province_id',
+                'district_id': 'district_id',
+                'sector_id': 'district__sectors__id',
+                'cell_id': 'district__sectors__cells__id',
+                'village_id': 'district__sectors__cells__villages__id',
+            },
+            'assigned_pickups__status',
+        ))
+    return querysets
+
+
+def _batches(iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def send_bulk_notification(title: str, message: str, querysets, batch_size: Optional[int] = None,
+                           on_progress=None) -> int:
+    """
+    Insert one notification per recipient in batches.
+
+    Each batch is committed on its own, so a failure part-way keeps the
+    notifications already sent; ``on_progress(sent)`` is called after each.
+
+    Returns:
+        Number of notifications created
+    """
+    from .models import Notification
+
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_FANOUT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    user_ids = chain.from_iterable(queryset.iterator(chunk_size=batch_size) for queryset in querysets)
+
+    sent = 0
+    for batch in _batches(user_ids, batch_size):
+        with transaction.atomic():
+            Notification.objects.bulk_create([
+                Notification(user_id=user_id, title=title, message=message)
+                for user_id in batch
+            ])
+        # bulk_create skips the signals that refresh the unread summaries
+        invalidate_summaries(batch)
+        sent += len(batch)
+        if on_progress is not None:
+            on_progress(sent)
+    return sent
+
+
+def get_fanout_progress(job_id: str) -> Optional[Dict[str, object]]:
+    """
+    Progress of a fan-out job.
+
+    Returns:
+        {'id': ..., 'status': 'queued'|'running'|'done'|'failed', 'total': 1200,
+         'sent': 600, 'title': ..., 'created_at': ..., 'finished_at': ..., 'error': None}
+        or None for an unknown (or expired) job
+    """
+    return cache.get(_progress_key(job_id))
+
+
+def _save_progress(progress: Dict[str, object]):
+    cache.set(_progress_key(progress['id']), progress, PROGRESS_TIMEOUT_SECONDS)
+
+
+def run_fanout(job_id: str, title: str, message: str, targeting: Dict[str, object],
+               batch_size: Optional[int] = None) -> Dict[str, object]:
+    """Run a fan-out job in the current thread, recording its progress"""
+    progress = get_fanout_progress(job_id) or {'id': job_id, 'title': title, 'created_at': timezone.now().isoformat()}
+    querysets = recipient_querysets(**targeting)
+    progress.update(status='running', total=sum(queryset.count() for queryset in querysets), sent=0, error=None)
+    _save_progress(progress)
+
+    def on_progress(sent):
+        progress['sent'] = sent
+        _save_progress(progress)
+
+    try:
+        send_bulk_notification(title, message, querysets, batch_size, on_progress)
+        progress['status'] = 'done'
+    except Exception as e:
+        logger.error(f"Notification fan-out {job_id} failed: {e}")
+        progress.update(status='failed', error=str(e))
+    progress['finished_at'] = timezone.now().isoformat()
+    _save_progress(progress)
+    return progress
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # One worker: jobs run one after another, off the request path
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notification-fanout')
+    return _executor
+
+
+def _run_in_background(job_id, title, message, targeting):
+    close_old_connections()
+    try:
+        run_fanout(job_id, title, message, targeting)
+    finally:
+        # The worker thread has its own connection; do not leak it
+        connection.close()
+
+
+def start_fanout(title: str, message: str, **targeting) -> str:
+    """
+    Queue a fan-out job on the background worker and return its id.
+
+    The job starts once the current transaction commits. Takes the same
+    targeting arguments as ``recipient_querysets``.
+
+    Raises:
+        ValueError: For an unknown audience
+    """
+    if targeting.get('audience', 'households') not in AUDIENCES:
+        raise ValueError(f"audience must be one of: {', '.join(AUDIENCES)}")
+    job_id = uuid.uuid4().hex[:12]
+    _save_progress({
+        'id': job_id, 'status': 'queued', 'total': None, 'sent': 0, 'title': title,
+        'created_at': timezone.now().isoformat(), 'finished_at': None, 'error': None,
+    })
+    transaction.on_commit(lambda: _get_executor().submit(_run_in_background, job_id, title, message, targeting))
+    return job_id
@@ -0,0 +1,351 @@
+"""
+Offline gazetteer for Rwandan administrative areas.
+
+Resolves Province/District/Sector/Cell/Village names found in free-text
+addresses to centroid coordinates without any network call. Names are
+normalized and kept in memory in a dictionary (exact hits) and a trie
+(fuzzy hits within a small edit distance).
+"""
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from .data.rwanda_admin_data import DISTRICT_CENTROIDS, PROVINCE_CENTROIDS, RWANDA_ADMIN_DATA
+
+LEVELS = ('province', 'district', 'sector', 'cell', 'village')
+
+# Words that describe a level rather than name a place
+STOPWORDS = {
+    'province', 'district', 'sector', 'cell', 'village', 'city', 'of', 'the',
+    'rwanda', 'intara', 'akarere', 'umurenge', 'akagari', 'umudugudu',
+    'st', 'street', 'road', 'rd', 'ave', 'avenue', 'kn', 'kk', 'kg',
+}
+
+# Longest run of words tried as one place name (e.g. "northern province")
+MAX_NGRAM = 3
+
+# Names shorter than this are only matched exactly
+MIN_FUZZY_LENGTH = 5
+
+DEFAULT_MAX_AGE_SECONDS = 3600
+
+
+def normalize_name(value: str) -> str:
+    """Lowercase, strip accents and drop everything except letters and digits"""
+    value = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]', '', value.lower())
+
+
+def normalize_name_words(value: str) -> str:
+    """Like normalize_name but keeps word boundaries as spaces"""
+    value = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', ' ', value.lower()).strip()
+
+
+def _name_key(name: str) -> str:
+    """Normalized name without level words, so "Kigali City" matches "Kigali" """
+    words = [w for w in normalize_name_words(name).split() if w not in STOPWORDS]
+    return ''.join(words) or normalize_name(name)
+
+
+class Place:
+    """One administrative area with its resolved centroid"""
+
+    __slots__ = ('level', 'path', 'db_id', 'latitude', 'longitude', 'inherited')
+
+    def __init__(self, level: str, path: Tuple[str, ...], db_id: Optional[int] = None):
+        self.level = level
+        self.path = path
+        self.db_id = db_id
+        self.latitude: Optional[float] = None
+        self.longitude: Optional[float] = None
+        # True when the centroid was copied from the parent area
+        self.inherited = False
+
+    @property
+    def name(self) -> str:
+        return self.path[-1]
+
+    @property
+    def depth(self) -> int:
+        return len(self.path)
+
+    def has_location(self) -> bool:
+        return self.latitude is not None and self.longitude is not None
+
+    def __repr__(self):
+        return f"Place({self.level}: {' / '.join(self.path)})"
+
+
+class _TrieNode:
+    __slots__ = ('children', 'key')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.key: Optional[str] = None
+
+
+class Gazetteer:
+    """
+    Memory-resident lookup from administrative names to centroids.
+
+    Centroids come from the static province/district table, refined by the
+    average coordinates of geolocated households in each area; areas with
+    neither inherit their parent's centroid.
+    """
+
+    def __init__(self, places: Iterable[Place]):
+        self.places: List[Place] = list(places)
+        self._by_key: Dict[str, List[Place]] = {}
+        self._by_db_id: Dict[Tuple[str, int], Place] = {}
+        self._by_path: Dict[Tuple[str, ...], Place] = {place.path: place for place in self.places}
+        self._trie = _TrieNode()
+        self._cache: Dict[str, Optional[Place]] = {}
+        self._cache_lock = threading.Lock()
+
+        for place in self.places:
+            key = _name_key(place.name)
+            self._by_key.setdefault(key, []).append(place)
+            if place.db_id is not None:
+                self._by_db_id[(place.level, place.db_id)] = place
+
+        for key in self._by_key:
+            node = self._trie
+            for ch in key:
+                node = node.children.setdefault(ch, _TrieNode())
+            node.key = key
+
+    def __len__(self):
+        return len(self.places)
+
+    def get(self, level: str, db_id: int) -> Optional[Place]:
+        """Look up a place by its database row"""
+        return self._by_db_id.get((level, db_id))
+
+    def lineage(self, place: Place) -> List[Place]:
+        """The place and its ancestors, from province down to the place itself"""
+        return [self._by_path[place.path[:depth]] for depth in range(1, place.depth + 1)
+                if place.path[:depth] in self._by_path]
+
+    def _fuzzy(self, word: str, max_edits: int) -> List[Tuple[str, int]]:
+        """Trie walk computing Levenshtein rows; returns (key, edits) pairs"""
+        results = []
+        first_row = list(range(len(word) + 1))
+
+        def walk(node, ch, prev_row):
+            row = [prev_row[0] + 1]
+            for col in range(1, len(word) + 1):
+                row.append(min(
+                    row[col - 1] + 1,
+                    prev_row[col] + 1,
+                    prev_row[col - 1] + (word[col - 1] != ch),
+                ))
+            if node.key is not None and row[-1] <= max_edits:
+                results.append((node.key, row[-1]))
+            if min(row) <= max_edits:
+                for next_ch, child in node.children.items():
+                    walk(child, next_ch, row)
+
+        # Typos rarely hit the first letter; only walking that branch keeps
+        # fuzzy lookups well under a millisecond
+        child = self._trie.children.get(word[0]) if word else None
+        if child is not None:
+            walk(child, word[0], first_row)
+        return results
+
+    def _match_terms(self, text: str) -> Dict[str, int]:
+        """Find place keys mentioned in text, mapped to their edit distance"""
+        words = [w for w in normalize_name_words(text).split() if w not in STOPWORDS]
+        matched: Dict[str, int] = {}
+
+        for size in range(MAX_NGRAM, 0, -1):
+            for start in range(len(words) - size + 1):
+                term = ''.join(words[start:start + size])
+                if term in self._by_key:
+                    matched[term] = 0
+                elif size == 1 and len(term) >= MIN_FUZZY_LENGTH and not term.isdigit():
+                    max_edits = 1 if len(term) < 8 else 2
+                    for key, edits in self._fuzzy(term, max_edits):
+                        if edits < matched.get(key, max_edits + 1):
+                            matched[key] = edits
+        return matched
+
+    def resolve(self, text: str) -> Optional[Place]:
+        """
+        Resolve free text to the most specific consistent administrative area.
+
+        Candidates score higher the deeper they are and the more of their
+        ancestors are also mentioned, so "Kiyovu, Nyarugenge" prefers the
+        Kiyovu inside Nyarugenge over namesakes elsewhere.
+        """
+        cache_key = normalize_name_words(text)
+        if cache_key in self._cache:
+            return self._cache[cache_key]
+
+        matched = self._match_terms(text)
+        best = None
+        best_score = None
+        for key, edits in matched.items():
+            for place in self._by_key[key]:
+                if not place.has_location():
+                    continue
+                ancestors = sum(1 for name in place.path[:-1] if _name_key(name) in matched)
+                score = (ancestors * 2 + place.depth - edits * 1.5, -edits, place.depth)
+                if best_score is None or score > best_score:
+                    best, best_score = place, score
+
+        with self._cache_lock:
+            if len(self._cache) > 10000:
+                self._cache.clear()
+            self._cache[cache_key] = best
+        return best
+
+    def geocode(self, text: str) -> Optional[Tuple[float, float]]:
+        """Resolve free text to (latitude, longitude), or None"""
+        place = self.resolve(text)
+        return (place.latitude, place.longitude) if place else None
+
+    def centroid_for_household(self, household) -> Optional[Tuple[float, float]]:
+        """Centroid of the most specific administrative area set on a household"""
+        for level in reversed(LEVELS):
+            db_id = getattr(household, f'{level}_id', None)
+            if db_id is not None:
+                place = self.get(level, db_id)
+                if place and place.has_location():
+                    return place.latitude, place.longitude
+        return None
+
+
+def _static_paths() -> Iterable[Tuple[str, Tuple[str, ...]]]:
+    """Yield (level, path) for every area in the bundled dataset"""
+    for province, province_data in RWANDA_ADMIN_DATA.items():
+        yield 'province', (province,)
+        for district, district_data in province_data.get('districts', {}).items():
+            yield 'district', (province, district)
+            for sector, sector_data in district_data.get('sectors', {}).items():
+                yield 'sector', (province, district, sector)
+                for cell, villages in sector_data.get('cells', {}).items():
+                    yield 'cell', (province, district, sector, cell)
+                    for village in villages:
+                        yield 'village', (province, district, sector, cell, village)
+
+
+def _database_paths() -> Iterable[Tuple[str, Tuple[str, ...], int]]:
+    """Yield (level, path, id) for every area stored in the database"""
+    from .models import Province, District, Sector, Cell, Village
+
+    provinces = dict(Province.objects.values_list('id', 'name'))
+    paths = {}
+    for province_id, name in provinces.items():
+        paths[('province', province_id)] = (name,)
+        yield 'province', (name,), province_id
+
+    parent_levels = (
+        ('district', District, 'province_id', 'province'),
+        ('sector', Sector, 'district_id', 'district'),
+        ('cell', Cell, 'sector_id', 'sector'),
+        ('village', Village, 'cell_id', 'cell'),
+    )
+    for level, model, parent_field, parent_level in parent_levels:
+        for db_id, name, parent_id in model.objects.values_list('id', 'name', parent_field).iterator(chunk_size=5000):
+            parent_path = paths.get((parent_level, parent_id))
+            if parent_path is None:
+                continue
+            path = parent_path + (name,)
+            paths[(level, db_id)] = path
+            yield level, path, db_id
+
+
+def _household_centroids() -> Dict[Tuple[str, int], Tuple[float, float]]:
+    """Average coordinates of geolocated households per administrative area"""
+    from django.db.models import Avg
+    from .models import Household
+
+    located = Household.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    centroids = {}
+    for level in LEVELS:
+        rows = located.filter(**{f'{level}__isnull': False}).values(f'{level}_id').annotate(
+            lat=Avg('latitude'), lon=Avg('longitude')
+        )
+        for row in rows:
+            centroids[(level, row[f'{level}_id'])] = (float(row['lat']), float(row['lon']))
+    return centroids
+
+
+def build_gazetteer(use_database: bool = True) -> Gazetteer:
+    """Assemble places from the bundled dataset and (optionally) the database"""
+    places: Dict[Tuple[str, ...], Place] = {}
+    for level, path in _static_paths():
+        places.setdefault(path, Place(level, path))
+
+    household_centroids = {}
+    if use_database:
+        for level, path, db_id in _database_paths():
+            place = places.get(path)
+            if place is None:
+                place = places[path] = Place(level, path)
+            place.db_id = db_id
+        household_centroids = _household_centroids()
+
+    # Resolve centroids top-down so children can inherit from parents
+    for path in sorted(places, key=len):
+        place = places[path]
+        coords = None
+        if place.db_id is not None:
+            coords = household_centroids.get((place.level, place.db_id))
+        if coords is None and place.level == 'province':
+            coords = PROVINCE_CENTROIDS.get(place.name)
+        if coords is None and place.level == 'district':
+            coords = DISTRICT_CENTROIDS.get(place.name)
+        if coords is None and len(path) > 1:
+            parent = places.get(path[:-1])
+            if parent is not None and parent.has_location():
+                coords = (parent.latitude, parent.longitude)
+                place.inherited = True
+        if coords is not None:
+            place.latitude, place.longitude = coords
+
+    return Gazetteer(places.values())
+
+
+_gazetteer = None
+_gazetteer_built_at = None
+_gazetteer_version = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """
+    Get or build the process-wide gazetteer.
+
+    Rebuilt after GAZETTEER_MAX_AGE_SECONDS (household centroids drift) and
+    as soon as the administrative areas change (hierarchy version moves).
+    """
+    global _gazetteer, _gazetteer_built_at, _gazetteer_version
+    from .hierarchy import current_version
+
+    max_age = getattr(settings, 'GAZETTEER_MAX_AGE_SECONDS', DEFAULT_MAX_AGE_SECONDS)
+    version = current_version()
+
+    def stale():
+        return (_gazetteer is None or _gazetteer_version != version
+                or time.monotonic() - _gazetteer_built_at > max_age)
+
+    if stale():
+        with _gazetteer_lock:
+            if stale():
+                _gazetteer = build_gazetteer()
+                _gazetteer_built_at = time.monotonic()
+                _gazetteer_version = version
+    return _gazetteer
+
+
+def invalidate_gazetteer():
+    """Drop the cached gazetteer so the next lookup rebuilds it"""
+    global _gazetteer
+    with _gazetteer_lock:
+        _gazetteer = None
@@ -3,7 +3,16 @@ Geocoding utilities for converting addresses to coordinates
 and calculating distances between locations
 """
 import math
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from django.db.models import Q
+
+# Mean radius of the Earth in kilometres
+EARTH_RADIUS_KM = 6371.0
+
+# Kilometres covered by one degree of latitude
+KM_PER_DEGREE = 111.32
 
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -19,7 +28,7 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
         Distance in kilometers
     """
     # Radius of Earth in kilometers
-    R = 6371.0
+    R = EARTH_RADIUS_KM
     
     # Convert latitude and longitude from degrees to radians
     lat1_rad = math.radians(float(lat1))
@@ -41,10 +50,96 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return distance
 
 
+def calculate_distances(lat: float, lon: float, lats: Sequence, lons: Sequence) -> np.ndarray:
+    """
+    Calculate Haversine distances from one point to many points at once.
+    
+    Vectorized counterpart of ``calculate_distance`` for scanning large
+    candidate sets without a Python-level loop.
+    
+    Args:
+        lat, lon: Latitude and longitude of the origin
+        lats, lons: Sequences (or arrays) of candidate latitudes and longitudes
+    
+    Returns:
+        NumPy array of distances in kilometers, aligned with the inputs
+    """
+    lat1 = math.radians(float(lat))
+    lon1 = math.radians(float(lon))
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2 = np.radians(np.asarray(lons, dtype=np.float64))
+    
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    # Clip guards against values marginally above 1 from floating point error
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def calculate_distance_matrix(lats1: Sequence, lons1: Sequence, lats2: Sequence, lons2: Sequence) -> np.ndarray:
+    """
+    Calculate pairwise Haversine distances between two sets of points.
+    
+    Args:
+        lats1, lons1: Coordinates of the row points
+        lats2, lons2: Coordinates of the column points
+    
+    Returns:
+        NumPy array of shape (len(lats1), len(lats2)) in kilometers
+    """
+    lat1 = np.radians(np.asarray(lats1, dtype=np.float64))[:, np.newaxis]
+    lon1 = np.radians(np.asarray(lons1, dtype=np.float64))[:, np.newaxis]
+    lat2 = np.radians(np.asarray(lats2, dtype=np.float64))[np.newaxis, :]
+    lon2 = np.radians(np.asarray(lons2, dtype=np.float64))[np.newaxis, :]
+    
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Calculate a lat/lon box that fully contains a circle of radius_km.
+    
+    Returns:
+        Tuple of (min_lat, max_lat, min_lon, max_lon)
+    """
+    lat = float(lat)
+    lon = float(lon)
+    dlat = radius_km / KM_PER_DEGREE
+    # Longitude degrees shrink towards the poles; use the widest latitude in range
+    max_abs_lat = min(abs(lat) + dlat, 89.0)
+    dlon = radius_km / (KM_PER_DEGREE * math.cos(math.radians(max_abs_lat)))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+def bounding_box_q(lat: float, lon: float, radius_km: float) -> Q:
+    """
+    Build a queryset filter limiting rows to the box around a point.
+    
+    The latitude range is what the coordinate indexes seek on; the
+    longitude range is checked on the same index entries.
+    
+    Args:
+        lat, lon: Centre point
+        radius_km: Search radius in kilometres
+    
+    Returns:
+        Q object to pass to ``filter()``
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    
+    # Columns store 6 decimal places; round outwards so edge rows are kept
+    return Q(
+        latitude__gte=math.floor(min_lat * 1e6) / 1e6,
+        latitude__lte=math.ceil(max_lat * 1e6) / 1e6,
+        longitude__gte=math.floor(min_lon * 1e6) / 1e6,
+        longitude__lte=math.ceil(max_lon * 1e6) / 1e6,
+    )
+
+
 def geocode_address(address: str, city: str = "", country: str = "Rwanda") -> Optional[Tuple[float, float]]:
     """
     Geocode an address to get latitude and longitude.
-    Uses a simple approach for Rwanda addresses or can be extended with API services.
+    Resolves Rwandan administrative area names (Province/District/Sector/
+    Cell/Village) with the offline gazetteer; no network call is made.
     
     Args:
         address: Street address
@@ -54,20 +149,39 @@ def geocode_address(address: str, city: str = "", country: str = "Rwanda") -> Op
     Returns:
         Tuple of (latitude, longitude) or None if geocoding fails
     """
-    # For now, return None - this can be extended with:
-    # 1. OpenStreetMap Nominatim API (free, no key required)
-    # 2. Google Geocoding API (requires API key)
-    # 3. Mapbox Geocoding API (requires API key)
+    if "rwanda" not in country.lower() and "kigali" not in city.lower():
+        return None
+    
+    from .gazetteer import get_gazetteer
+    coords = get_gazetteer().geocode(f"{address} {city}")
+    if coords:
+        return coords
     
-    # Default coordinates for Kigali, Rwanda (can be used as fallback)
+    # Default coordinates for Kigali, Rwanda when no area name is recognised
     # Kigali center: -1.9441, 30.0619
-    default_coords = (-1.9441, 30.0619)
+    return (-1.9441, 30.0619)
+
+
+def geocode_household(household) -> Optional[Tuple[float, float]]:
+    """
+    Best-effort coordinates for a household without GPS.
+    
+    Uses the household's own coordinates, then the centroid of its most
+    specific administrative area, then its street address.
     
-    # TODO: Implement actual geocoding using an API
-    # For now, return default coordinates for Rwanda addresses
-    if "rwanda" in country.lower() or "kigali" in city.lower():
-        return default_coords
+    Returns:
+        Tuple of (latitude, longitude) or None
+    """
+    if household.has_location():
+        return float(household.latitude), float(household.longitude)
     
+    from .gazetteer import get_gazetteer
+    coords = get_gazetteer().centroid_for_household(household)
+    if coords:
+        return coords
+    
+    if household.street_address:
+        return get_gazetteer().geocode(household.street_address)
     return None
 
 
@@ -84,23 +198,39 @@ def find_nearby_collectors(household_lat: float, household_lon: float,
     Returns:
         List of collectors with distance information
     """
+    from .live_positions import apply_live_positions
     from .models import Collector
+    from .spatial_index import get_collector_index
     
-    nearby_collectors = []
+    # Candidate collectors come from the in-memory grid index
+    index = get_collector_index()
+    matches = index.query(household_lat, household_lon, max_distance_km)
+    if not matches:
+        return []
     
-    # Get all available collectors with locations
-    collectors = Collector.objects.filter(
+    # No bounding box on the stored coordinates here: they can lag behind
+    # the live positions the index was queried with
+    collectors = list(Collector.objects.filter(
+        id__in=[collector_id for collector_id, _ in matches],
         is_available=True,
         latitude__isnull=False,
         longitude__isnull=False
+    ).select_related('user'))
+    if not collectors:
+        return []
+    
+    # Recheck against live positions (or the stored rows) in case the index
+    # is behind another process
+    collectors = apply_live_positions(collectors)
+    distances = calculate_distances(
+        household_lat, household_lon,
+        [collector.latitude for collector in collectors],
+        [collector.longitude for collector in collectors]
     )
     
-    for collector in collectors:
-        distance = calculate_distance(
-            household_lat, household_lon,
-            float(collector.latitude), float(collector.longitude)
-        )
-        
+    nearby_collectors = []
+    
+    for collector, distance in zip(collectors, distances.tolist()):
         # Check if collector is within service radius
         service_radius = float(collector.service_radius) if collector.service_radius else max_distance_km
         
@@ -132,27 +262,32 @@ def find_nearby_pickups(collector_lat: float, collector_lon: float,
     """
     from .models import WastePickupRequest
     
-    nearby_pickups = []
-    
-    # Get all pending/scheduled pickups with locations
-    pickups = WastePickupRequest.objects.filter(
+    # Get candidate pending/scheduled pickups inside the search box.
+    # Only ids and coordinates are loaded until the distance cut is done.
+    candidates = list(WastePickupRequest.objects.filter(
+        bounding_box_q(collector_lat, collector_lon, max_distance_km),
         status__in=['Pending', 'Scheduled'],
         latitude__isnull=False,
         longitude__isnull=False,
         collector__isnull=True  # Only unassigned pickups
-    )
+    ).values_list('id', 'latitude', 'longitude'))
+    if not candidates:
+        return []
     
-    for pickup in pickups:
-        distance = calculate_distance(
-            collector_lat, collector_lon,
-            float(pickup.latitude), float(pickup.longitude)
-        )
-        
-        if distance <= max_distance_km:
-            nearby_pickups.append({
-                'pickup': pickup,
-                'distance_km': round(distance, 2)
-            })
+    ids, lats, lons = zip(*candidates)
+    distances = calculate_distances(collector_lat, collector_lon, lats, lons)
+    
+    within = np.flatnonzero(distances <= max_distance_km)
+    distance_by_id = {ids[i]: float(distances[i]) for i in within}
+    
+    pickups = WastePickupRequest.objects.filter(
+        id__in=list(distance_by_id)
+    ).select_related('household__user', 'waste_category')
+    
+    nearby_pickups = [{
+        'pickup': pickup,
+        'distance_km': round(distance_by_id[pickup.id], 2)
+    } for pickup in pickups]
     
     # Sort by distance (closest first)
     nearby_pickups.sort(key=lambda x: x['distance_km'])
@@ -162,7 +297,10 @@ def find_nearby_pickups(collector_lat: float, collector_lon: float,
 
 def auto_assign_collector(pickup_request) -> bool:
     """
-    Automatically assign the nearest available collector to a pickup request.
+    Automatically assign a nearby collector with spare capacity to a pickup request.
+    
+    Uses the same distance-plus-workload cost as the batch assignment engine
+    so that new requests do not all pile onto the closest collector.
     
     Args:
         pickup_request: WastePickupRequest instance
@@ -173,20 +311,17 @@ def auto_assign_collector(pickup_request) -> bool:
     if not pickup_request.has_location():
         return False
     
-    # Find nearby collectors
-    nearby = find_nearby_collectors(
+    from .assignment import choose_collector
+    
+    collector = choose_collector(
         float(pickup_request.latitude),
-        float(pickup_request.longitude),
-        max_distance_km=15.0  # Search within 15km
+        float(pickup_request.longitude)
     )
     
-    if nearby:
-        # Assign the closest collector
-        closest = nearby[0]
-        pickup_request.collector = closest['collector']
+    if collector:
+        pickup_request.collector = collector
         pickup_request.status = 'Scheduled'
         pickup_request.save()
         return True
     
     return False
-
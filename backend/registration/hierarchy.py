@@ -0,0 +1,139 @@
+"""
+Cached Province > District > Sector > Cell > Village hierarchy.
+
+The administrative areas almost never change, so each process keeps the
+whole tree in memory and serves the cascading dropdowns from it. A version
+token in the Django cache is bumped whenever an area is saved or deleted
+(and at the end of ``load_rwanda_data``); processes compare it on every
+read and rebuild when it moved. The API sends a hash of the tree as its
+ETag so browsers revalidate with cheap 304 responses.
+
+With the default per-process cache a bump made by a management command is
+not visible to web workers; they pick the change up after
+ADMIN_HIERARCHY_MAX_AGE_SECONDS instead.
+"""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+LEVELS = ('province', 'district', 'sector', 'cell', 'village')
+
+# Level whose rows are the children of each level
+CHILD_LEVEL = dict(zip(LEVELS, LEVELS[1:]))
+
+VERSION_CACHE_KEY = 'admin-hierarchy-version'
+
+# Safety net for processes that cannot see version bumps (per-process cache)
+DEFAULT_MAX_AGE_SECONDS = 3600
+
+
+def current_version() -> str:
+    """Version token of the hierarchy, created on first use"""
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def bump_version():
+    """Mark every process's cached hierarchy (and gazetteer) as stale"""
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+
+
+class AdminHierarchy:
+    """
+    Immutable snapshot of the administrative areas.
+
+    Areas are plain ``{'id': ..., 'name': ...}`` dicts sorted by name, the
+    shape the dropdown endpoints already returned.
+    """
+
+    def __init__(self, version: str, provinces: List[Dict], children: Dict[str, Dict[int, List[Dict]]]):
+        self.version = version
+        self.provinces = provinces
+        self._children = children
+        self.built_at = time.monotonic()
+        # Derived from the content, so a rebuild that changed nothing keeps
+        # browser caches valid and any real change invalidates them
+        digest = hashlib.sha1(json.dumps([provinces, children], sort_keys=True).encode()).hexdigest()
+        self.etag = f'"{digest[:20]}"'
+
+    @classmethod
+    def build(cls, version: str) -> 'AdminHierarchy':
+        from .models import Cell, District, Province, Sector, Village
+
+        provinces = [{'id': pk, 'name': name} for pk, name in Province.objects.order_by('name').values_list('id', 'name')]
+        children: Dict[str, Dict[int, List[Dict]]] = {}
+        for parent_level, model, parent_field in (
+            ('province', District, 'province_id'),
+            ('district', Sector, 'district_id'),
+            ('sector', Cell, 'sector_id'),
+            ('cell', Village, 'cell_id'),
+        ):
+            by_parent: Dict[int, List[Dict]] = {}
+            for pk, name, parent_id in model.objects.order_by('name').values_list('id', 'name', parent_field):
+                by_parent.setdefault(parent_id, []).append({'id': pk, 'name': name})
+            children[parent_level] = by_parent
+        return cls(version, provinces, children)
+
+    def children(self, level: str, parent_id) -> List[Dict]:
+        """
+        Direct children of an area, e.g. ``children('province', 3)`` lists
+        its districts. Unknown or malformed ids give an empty list.
+        """
+        try:
+            parent_id = int(parent_id)
+        except (TypeError, ValueError):
+            return []
+        return self._children.get(level, {}).get(parent_id, [])
+
+    def subtree(self, level: Optional[str] = None, area_id=None) -> List[Dict]:
+        """
+        Nested areas below ``level``/``area_id`` (the whole country when
+        ``level`` is None). Each node carries its children under the plural
+        of the next level, e.g. ``{'id': 1, 'name': 'Kigali', 'districts': [...]}``.
+        """
+        if level is None:
+            return [self._node('province', area) for area in self.provinces]
+        child_level = CHILD_LEVEL.get(level)
+        if child_level is None:
+            return []
+        return [self._node(child_level, area) for area in self.children(level, area_id)]
+
+    def _node(self, level: str, area: Dict) -> Dict:
+        child_level = CHILD_LEVEL.get(level)
+        if child_level is None:
+            return dict(area)
+        return dict(area, **{
+            f'{child_level}s': [self._node(child_level, child) for child in self._children[level].get(area['id'], [])]
+        })
+
+
+_hierarchy: Optional[AdminHierarchy] = None
+_hierarchy_lock = threading.Lock()
+
+
+def get_admin_hierarchy() -> AdminHierarchy:
+    """Get the process-wide hierarchy, rebuilding it if the version moved or it expired"""
+    global _hierarchy
+    version = current_version()
+    max_age = getattr(settings, 'ADMIN_HIERARCHY_MAX_AGE_SECONDS', DEFAULT_MAX_AGE_SECONDS)
+
+    def stale(hierarchy):
+        return (hierarchy is None or hierarchy.version != version
+                or time.monotonic() - hierarchy.built_at > max_age)
+
+    hierarchy = _hierarchy
+    if stale(hierarchy):
+        with _hierarchy_lock:
+            if stale(_hierarchy):
+                _hierarchy = AdminHierarchy.build(version)
+            hierarchy = _hierarchy
+    return hierarchy
@@ -0,0 +1,261 @@
+"""
+Live collector positions.
+
+Location pings are absorbed by the Django cache instead of being written to
+the database one by one. Reads overlay the cached positions on the stored
+rows, and positions expire from the cache when a collector stops pinging.
+
+The first ping after a collector was quiet, and any ping for a collector
+without stored coordinates, is written to the Collector table right away,
+so other processes and the stored-row filters see it at once. Later pings
+are buffered, and a background thread in each process writes the latest
+position per collector every LIVE_POSITION_FLUSH_INTERVAL_SECONDS, which
+must stay below LIVE_POSITION_TTL_SECONDS so the last ping before a
+collector goes quiet is stored before its cache entry expires. Other
+worker processes only see the latest pings when LIVE_POSITION_CACHE_ALIAS
+is a shared cache.
+"""
+import atexit
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'collector-position'
+
+# Positions older than this are ignored and the stored row is used instead
+DEFAULT_TTL_SECONDS = 120
+
+# Longest time a ping waits in memory before being written to the database
+DEFAULT_FLUSH_INTERVAL_SECONDS = 30
+
+# Flush early once this many collectors have unsaved positions
+DEFAULT_FLUSH_BATCH_SIZE = 500
+
+COORDINATE_QUANTUM = Decimal('0.000001')
+
+
+def _cache():
+    return caches[getattr(settings, 'LIVE_POSITION_CACHE_ALIAS', 'default')]
+
+
+def _cache_key(collector_id: int) -> str:
+    return f'{CACHE_KEY_PREFIX}:{collector_id}'
+
+
+def _to_decimal(value: float) -> Decimal:
+    return Decimal(str(value)).quantize(COORDINATE_QUANTUM)
+
+
+class PositionBuffer:
+    """Latest unsaved position per collector, written out in batches"""
+
+    def __init__(self, flush_interval_seconds: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+                 flush_batch_size: int = DEFAULT_FLUSH_BATCH_SIZE):
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_batch_size = flush_batch_size
+        self._pending: Dict[int, Tuple[Decimal, Decimal]] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Thread] = None
+        self._timer_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, collector_id: int, latitude: Decimal, longitude: Decimal):
+        with self._lock:
+            self._pending[collector_id] = (latitude, longitude)
+        self._ensure_timer()
+
+    def discard(self, collector_id: int):
+        """Drop a collector's buffered position, superseded by a direct write"""
+        with self._lock:
+            self._pending.pop(collector_id, None)
+
+    def is_due(self) -> bool:
+        return (len(self._pending) >= self.flush_batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval_seconds)
+
+    def flush(self) -> int:
+        """
+        Write buffered positions with one bulk UPDATE per batch.
+
+        Only latitude and longitude are written, so ``updated_at``
+        and the rest of the row are left alone.
+
+        Returns:
+            Number of collectors written
+        """
+        from .models import Collector
+
+        # One flush at a time; a ping arriving meanwhile goes to the next one
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+
+            collectors = [
+                Collector(id=collector_id, latitude=lat, longitude=lon)
+                for collector_id, (lat, lon) in pending.items()
+            ]
+            try:
+                Collector.objects.bulk_update(
+                    collectors, ['latitude', 'longitude'], batch_size=500
+                )
+            except Exception:
+                # Put the positions back unless a newer ping replaced them
+                with self._lock:
+                    for collector_id, position in pending.items():
+                        self._pending.setdefault(collector_id, position)
+                raise
+            return len(collectors)
+        finally:
+            self._flush_lock.release()
+
+    def _ensure_timer(self):
+        if self._timer is None or not self._timer.is_alive():
+            with self._timer_lock:
+                if self._timer is None or not self._timer.is_alive():
+                    self._timer = threading.Thread(
+                        target=self._run, name='live-position-flush', daemon=True
+                    )
+                    self._timer.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval_seconds)
+            try:
+                written = self.flush()
+                if written:
+                    logger.debug(f"Flushed {written} live collector position(s)")
+            except Exception as e:
+                logger.error(f"Error flushing live collector positions: {e}")
+            finally:
+                # This thread's connection would otherwise stay open between flushes
+                connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_position_buffer() -> PositionBuffer:
+    """Get or create the process-wide position buffer"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                interval = getattr(settings, 'LIVE_POSITION_FLUSH_INTERVAL_SECONDS', DEFAULT_FLUSH_INTERVAL_SECONDS)
+                ttl = getattr(settings, 'LIVE_POSITION_TTL_SECONDS', DEFAULT_TTL_SECONDS)
+                _buffer = PositionBuffer(
+                    # Stored before the cached position expires
+                    flush_interval_seconds=min(interval, ttl / 2),
+                    flush_batch_size=getattr(settings, 'LIVE_POSITION_FLUSH_BATCH_SIZE', DEFAULT_FLUSH_BATCH_SIZE),
+                )
+                atexit.register(_flush_at_exit)
+    return _buffer
+
+
+def _flush_at_exit():
+    try:
+        flush_positions()
+    except Exception as e:
+        logger.error(f"Could not flush live collector positions on exit: {e}")
+
+
+def flush_positions() -> int:
+    """Write every buffered position in this process to the database"""
+    return get_position_buffer().flush()
+
+
+def record_position(collector, latitude: float, longitude: float):
+    """
+    Record a location ping for a collector.
+
+    The position is cached for other requests and applied to this process's
+    grid index. It is written to the database now if the collector had no
+    live position or no stored coordinates, and buffered for the next
+    batched write otherwise.
+    """
+    from .models import Collector
+    from .spatial_index import get_collector_index
+
+    lat, lon = _to_decimal(latitude), _to_decimal(longitude)
+    # Load the index before the cache holds the new position, so the ping
+    # can be compared with the collector's indexed cell
+    index = get_collector_index()
+    index.ensure_built()
+    ttl = getattr(settings, 'LIVE_POSITION_TTL_SECONDS', DEFAULT_TTL_SECONDS)
+    cache = _cache()
+    key = _cache_key(collector.id)
+    write_now = not collector.has_location() or cache.get(key) is None
+    cache.set(key, (float(lat), float(lon), time.time()), ttl)
+
+    collector.latitude = lat
+    collector.longitude = lon
+    index.update_collector(collector)
+
+    buffer = get_position_buffer()
+    if write_now:
+        Collector.objects.filter(pk=collector.id).update(latitude=lat, longitude=lon)
+        # An older buffered ping must not overwrite this one
+        buffer.discard(collector.id)
+        return
+
+    buffer.add(collector.id, lat, lon)
+    if buffer.is_due():
+        try:
+            written = buffer.flush()
+            if written:
+                logger.debug(f"Flushed {written} live collector position(s)")
+        except Exception as e:
+            logger.error(f"Error flushing live collector positions: {e}")
+
+
+def get_live_positions(collector_ids: Iterable[int]) -> Dict[int, Tuple[float, float]]:
+    """Cached (latitude, longitude) for the collectors that pinged recently"""
+    ids = list(collector_ids)
+    if not ids:
+        return {}
+    found = _cache().get_many([_cache_key(collector_id) for collector_id in ids])
+    positions = {}
+    for collector_id in ids:
+        entry = found.get(_cache_key(collector_id))
+        if entry is not None:
+            positions[collector_id] = (entry[0], entry[1])
+    return positions
+
+
+def apply_live_positions(collectors: Iterable) -> list:
+    """Overwrite the coordinates of Collector instances with live positions"""
+    collectors = list(collectors)
+    positions = get_live_positions(collector.id for collector in collectors)
+    for collector in collectors:
+        position = positions.get(collector.id)
+        if position is not None:
+            collector.latitude = _to_decimal(position[0])
+            collector.longitude = _to_decimal(position[1])
+    return collectors
+
+
+def get_live_position(collector) -> Optional[Tuple[float, float]]:
+    """Current position of one collector, live if available"""
+    position = get_live_positions([collector.id]).get(collector.id)
+    if position is not None:
+        return position
+    if collector.has_location():
+        return float(collector.latitude), float(collector.longitude)
+    return None
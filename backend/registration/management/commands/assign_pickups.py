@@ -0,0 +1,65 @@
+"""
+Management command to batch-assign pending pickups to collectors
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from registration.assignment import assign_pending_pickups
+
+
+class Command(BaseCommand):
+    help = 'Assigns all unassigned pending pickups to collectors, balancing distance and workload'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--capacity',
+            type=int,
+            default=None,
+            help='Maximum active pickups per collector (default: PICKUP_ASSIGNMENT_CAPACITY)',
+        )
+        parser.add_argument(
+            '--workload-weight',
+            type=float,
+            default=None,
+            help='Extra cost in km for each pickup already queued for a collector',
+        )
+        parser.add_argument(
+            '--max-distance',
+            type=float,
+            default=None,
+            help='Radius in km for collectors without a service radius',
+        )
+        parser.add_argument(
+            '--max-candidates',
+            type=int,
+            default=None,
+            help='Nearest collectors in range considered per pickup (default: PICKUP_ASSIGNMENT_MAX_CANDIDATES)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Plan assignments without saving them',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = assign_pending_pickups(
+            capacity=options['capacity'],
+            workload_weight_km=options['workload_weight'],
+            max_distance_km=options['max_distance'],
+            max_candidates=options['max_candidates'],
+            dry_run=options['dry_run'],
+        )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"Pending pickups with location: {result['pickups']}")
+        self.stdout.write(f"Available collectors with location: {result['collectors']}")
+        self.stdout.write(f"Solver: {result['solver']}")
+        for collector_id, pickup_ids in sorted(result['assignments'].items()):
+            self.stdout.write(f"  Collector {collector_id}: {len(pickup_ids)} pickup(s)")
+
+        verb = 'Would assign' if options['dry_run'] else 'Assigned'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['assigned']} pickup(s) in {elapsed:.2f}s"
+        ))
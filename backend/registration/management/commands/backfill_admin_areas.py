@@ -0,0 +1,92 @@
+"""
+Management command to fill household administrative areas from coordinates
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from registration.gazetteer import LEVELS
+from registration.models import Household
+from registration.reverse_geocoding import get_reverse_geocoder
+
+
+class Command(BaseCommand):
+    help = 'Fills province/district/sector/cell/village for geolocated households by reverse geocoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Households loaded and written per batch',
+        )
+        parser.add_argument(
+            '--overwrite',
+            action='store_true',
+            help='Replace areas that are already set instead of only filling gaps',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without saving',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        overwrite = options['overwrite']
+        dry_run = options['dry_run']
+        started = time.perf_counter()
+
+        geocoder = get_reverse_geocoder()
+        fields = [f'{level}_id' for level in LEVELS]
+
+        queryset = Household.objects.filter(latitude__isnull=False, longitude__isnull=False)
+        if not overwrite:
+            missing = Q()
+            for level in LEVELS:
+                missing |= Q(**{f'{level}__isnull': True})
+            queryset = queryset.filter(missing)
+
+        scanned = 0
+        updated = 0
+        filled = {level: 0 for level in LEVELS}
+        last_id = 0
+        while True:
+            # Keyset pagination keeps each query cheap and memory bounded
+            rows = list(
+                queryset.filter(id__gt=last_id).order_by('id').values_list('id', 'latitude', 'longitude', *fields)[:chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+
+            places = geocoder.lookup_many([row[1] for row in rows], [row[2] for row in rows])
+            changed = []
+            for row, place in zip(rows, places):
+                current = dict(zip(LEVELS, row[3:]))
+                new_ids = geocoder.admin_area_ids(place, current, overwrite=overwrite)
+                if new_ids == current:
+                    continue
+                for level in LEVELS:
+                    if new_ids[level] != current[level]:
+                        filled[level] += 1
+                changed.append(Household(id=row[0], **{f'{level}_id': new_ids[level] for level in LEVELS}))
+
+            if changed and not dry_run:
+                with transaction.atomic():
+                    Household.objects.bulk_update(changed, fields, batch_size=500)
+            updated += len(changed)
+
+            self.stdout.write(f"  Processed {scanned} household(s), {updated} updated so far")
+
+        elapsed = time.perf_counter() - started
+        for level in LEVELS:
+            self.stdout.write(f"  {level.capitalize()}: {filled[level]} filled")
+
+        verb = 'Would update' if dry_run else 'Updated'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {updated} of {scanned} household(s) in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,194 @@
+"""
+Management command to benchmark geo-matching on synthetic Rwanda-scale data
+"""
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from registration.clustering import invalidate_cluster_pyramid
+from registration.geocoding import (
+    auto_assign_collector,
+    find_nearby_collectors,
+    find_nearby_pickups,
+)
+from registration.models import Collector, Household, WasteCategory, WastePickupRequest
+from registration.spatial_index import get_collector_index
+
+# Rwanda's bounding box
+RWANDA_MIN_LAT, RWANDA_MAX_LAT = -2.84, -1.05
+RWANDA_MIN_LON, RWANDA_MAX_LON = 28.86, 30.90
+
+# Share of points concentrated around Kigali, the rest spread nationwide
+KIGALI = (-1.9441, 30.0619)
+KIGALI_SHARE = 0.4
+KIGALI_SPREAD_DEG = 0.06
+
+# Extra calls per function traced for query counts and peak memory
+PROFILED_CALLS = 20
+
+BATCH_SIZE = 5000
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks find_nearby_collectors, find_nearby_pickups and auto_assign_collector '
+            'on synthetic data that is rolled back afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collectors', type=int, default=1000, help='Synthetic collectors to create')
+        parser.add_argument('--pickups', type=int, default=10000, help='Synthetic pending pickups to create')
+        parser.add_argument('--queries', type=int, default=200, help='Timed calls per function')
+        parser.add_argument('--radius', type=float, default=10.0, help='Search radius in km')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the synthetic data')
+
+    def handle(self, *args, **options):
+        if options['collectors'] < 1 or options['pickups'] < 1 or options['queries'] < 1:
+            raise CommandError('--collectors, --pickups and --queries must be positive')
+
+        self.rng = np.random.default_rng(options['seed'])
+        self.tag = uuid.uuid4().hex[:8]
+
+        try:
+            with transaction.atomic():
+                self._create_data(options['collectors'], options['pickups'])
+                get_collector_index().invalidate()
+                invalidate_cluster_pyramid()
+                self._run(options['queries'], options['radius'])
+                raise _Rollback()
+        except _Rollback:
+            pass
+        finally:
+            # The index may have loaded synthetic collectors
+            get_collector_index().invalidate()
+            invalidate_cluster_pyramid()
+
+        self.stdout.write(self.style.SUCCESS('Synthetic data rolled back'))
+
+    def _points(self, count):
+        """Random coordinates inside Rwanda, partly clustered around Kigali"""
+        lats = self.rng.uniform(RWANDA_MIN_LAT, RWANDA_MAX_LAT, count)
+        lons = self.rng.uniform(RWANDA_MIN_LON, RWANDA_MAX_LON, count)
+        urban = self.rng.random(count) < KIGALI_SHARE
+        lats[urban] = np.clip(self.rng.normal(KIGALI[0], KIGALI_SPREAD_DEG, urban.sum()), RWANDA_MIN_LAT, RWANDA_MAX_LAT)
+        lons[urban] = np.clip(self.rng.normal(KIGALI[1], KIGALI_SPREAD_DEG, urban.sum()), RWANDA_MIN_LON, RWANDA_MAX_LON)
+        return np.round(lats, 6), np.round(lons, 6)
+
+    def _create_users(self, prefix, count):
+        users = [
+            User(username=f'bench-{self.tag}-{prefix}-{i}', password='!')
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        return list(User.objects.filter(
+            username__startswith=f'bench-{self.tag}-{prefix}-'
+        ).order_by('id').values_list('id', flat=True))
+
+    def _create_data(self, num_collectors, num_pickups):
+        started = time.perf_counter()
+        category = WasteCategory.objects.first() or WasteCategory.objects.create(name='Benchmark Waste')
+
+        lats, lons = self._points(num_collectors)
+        radii = self.rng.choice([5, 10, 15], num_collectors)
+        user_ids = self._create_users('c', num_collectors)
+        Collector.objects.bulk_create([
+            Collector(
+                user_id=user_id,
+                phone_number='+250780000000',
+                latitude=Decimal(str(lat)),
+                longitude=Decimal(str(lon)),
+                service_radius=Decimal(int(radius)),
+                is_available=True,
+            )
+            for user_id, lat, lon, radius in zip(user_ids, lats.tolist(), lons.tolist(), radii.tolist())
+        ], batch_size=BATCH_SIZE)
+
+        num_households = max(1, num_pickups // 10)
+        user_ids = self._create_users('h', num_households)
+        Household.objects.bulk_create([
+            Household(user_id=user_id, phone_number='+250780000000')
+            for user_id in user_ids
+        ], batch_size=BATCH_SIZE)
+        household_ids = list(Household.objects.filter(user_id__in=user_ids).values_list('id', flat=True))
+
+        for start in range(0, num_pickups, BATCH_SIZE):
+            count = min(BATCH_SIZE, num_pickups - start)
+            lats, lons = self._points(count)
+            owners = self.rng.integers(0, len(household_ids), count)
+            WastePickupRequest.objects.bulk_create([
+                WastePickupRequest(
+                    household_id=household_ids[owner],
+                    waste_category=category,
+                    address='Benchmark address',
+                    latitude=Decimal(str(lat)),
+                    longitude=Decimal(str(lon)),
+                )
+                for owner, lat, lon in zip(owners.tolist(), lats.tolist(), lons.tolist())
+            ])
+
+        self.stdout.write(
+            f"Created {num_collectors} collectors, {num_households} households and "
+            f"{num_pickups} pickups in {time.perf_counter() - started:.1f}s"
+        )
+
+    def _run(self, num_queries, radius):
+        lats, lons = self._points(num_queries + PROFILED_CALLS)
+        points = list(zip(lats.tolist(), lons.tolist()))
+
+        # Synthetic pickups are created in random locations, so id order is random enough
+        pickups = list(WastePickupRequest.objects.filter(
+            address='Benchmark address',
+            household__user__username__startswith=f'bench-{self.tag}-'
+        ).order_by('id')[:num_queries + PROFILED_CALLS])
+
+        # Warm up the in-process indexes so their build time is not measured
+        find_nearby_collectors(points[0][0], points[0][1], radius)
+
+        cases = [
+            ('find_nearby_collectors', lambda point: find_nearby_collectors(*point, max_distance_km=radius), points),
+            ('find_nearby_pickups', lambda point: find_nearby_pickups(*point, max_distance_km=radius), points),
+            ('auto_assign_collector', auto_assign_collector, pickups),
+        ]
+
+        self.stdout.write('')
+        self.stdout.write(
+            f"{'function':<24}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+            f"{'max ms':>10}{'queries':>9}{'peak KiB':>10}"
+        )
+        for name, call, args in cases:
+            timed = args[:-PROFILED_CALLS] if len(args) > PROFILED_CALLS else args
+            profiled = args[len(timed):]
+
+            timings = []
+            for arg in timed:
+                started = time.perf_counter()
+                call(arg)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            # Separate pass for query counts and memory, as tracing slows calls down
+            query_counts = []
+            peaks = []
+            for arg in profiled:
+                tracemalloc.start()
+                with CaptureQueriesContext(connection) as queries:
+                    call(arg)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                query_counts.append(len(queries))
+
+            p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+            self.stdout.write(
+                f"{name:<24}{len(timings):>7}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}{max(timings):>10.2f}"
+                f"{np.mean(query_counts) if query_counts else 0:>9.1f}"
+                f"{max(peaks) / 1024 if peaks else 0:>10.1f}"
+            )
+        self.stdout.write('')
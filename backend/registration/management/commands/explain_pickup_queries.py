@@ -0,0 +1,32 @@
+"""
+Management command to check that the hot pickup queries use their indexes
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from registration.query_plans import SUPPORTED_VENDORS, explain_hot_queries
+
+
+class Command(BaseCommand):
+    help = ('Runs EXPLAIN on the hot WastePickupRequest querysets and fails if any of them '
+            'does not use its index (SQLite and PostgreSQL)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            raise CommandError(f'Unsupported database: {connection.vendor}')
+
+        failures = []
+        for name, index, plan, used in explain_hot_queries():
+            if used:
+                self.stdout.write(self.style.SUCCESS(f'{name}: uses {index}'))
+            else:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: does not use {index}'))
+            if options['verbose_plans'] or not used:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'{len(failures)} query plan(s) without their index: {", ".join(failures)}')
@@ -0,0 +1,188 @@
+"""
+Management command to export the waste classifier as an int8 TorchScript model
+"""
+import json
+import os
+import platform
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from PIL import Image
+
+from registration.waste_classifier import (
+    INPUT_SIZE,
+    TORCH_AVAILABLE,
+    build_transform,
+    imagenet_category_index,
+    load_imagenet_class_names,
+    waste_scores,
+)
+
+if TORCH_AVAILABLE:
+    import torch
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+# Timed single-image forward passes per model
+LATENCY_RUNS = 50
+
+
+def _load_images(directory, limit):
+    paths = sorted(
+        path for path in Path(directory).rglob('*') if path.suffix.lower() in IMAGE_EXTENSIONS
+    )[:limit]
+    if not paths:
+        raise CommandError(f'No images found in {directory}')
+    transform = build_transform()
+    return [transform(Image.open(path).convert('RGB')).unsqueeze(0) for path in paths]
+
+
+def _latency_ms(model, sample):
+    with torch.no_grad():
+        for _ in range(5):
+            model(sample)
+        started = time.perf_counter()
+        for _ in range(LATENCY_RUNS):
+            model(sample)
+    return (time.perf_counter() - started) * 1000 / LATENCY_RUNS
+
+
+def _waste_category(probabilities, category_index):
+    """The category the classifier would return from the model, or None for the colour fallback"""
+    scores = waste_scores(probabilities, category_index)
+    return max(scores, key=scores.get) if scores else None
+
+
+def _model_size_mb(model, path):
+    torch.jit.save(model, path)
+    try:
+        return os.path.getsize(path) / (1024 * 1024)
+    finally:
+        os.remove(path)
+
+
+class Command(BaseCommand):
+    help = ('Quantizes MobileNetV2 to int8, saves it as TorchScript for CPU inference and '
+            'checks its waste categories and latency against the float model')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default=None,
+                            help='TorchScript file (default: CLASSIFIER_OPTIMIZED_MODEL_PATH)')
+        parser.add_argument('--mode', choices=('static', 'dynamic'), default='static',
+                            help='static: int8 convolutions and activations (fastest); '
+                                 'dynamic: int8 weights of the linear layers only')
+        parser.add_argument('--calibration-dir',
+                            help='Images to calibrate static quantization with (default: '
+                                 "torchvision's pre-quantized MobileNetV2 weights)")
+        parser.add_argument('--check-dir',
+                            help='Images for the accuracy check (default: the calibration images, '
+                                 'else random inputs)')
+        parser.add_argument('--max-images', type=int, default=200, help='Images read from each directory')
+        parser.add_argument('--min-agreement', type=float, default=0.9,
+                            help='Fail if the waste category (or colour fallback) the classifier would '
+                                 'return agrees with the float model less often than this')
+
+    def handle(self, *args, **options):
+        if not TORCH_AVAILABLE:
+            raise CommandError('PyTorch is not installed')
+        import torchvision.models as models
+        import torchvision.models.quantization as quantized_models
+
+        output = options['output'] or getattr(settings, 'CLASSIFIER_OPTIMIZED_MODEL_PATH', None)
+        if not output:
+            raise CommandError('Pass --output or set CLASSIFIER_OPTIMIZED_MODEL_PATH')
+        torch.set_grad_enabled(False)
+
+        class_names = load_imagenet_class_names()
+        if not class_names:
+            raise CommandError('ImageNet class names are not available from torchvision')
+        category_index = imagenet_category_index(class_names)
+
+        engine = 'qnnpack' if platform.machine().lower() in ('arm64', 'aarch64') else 'fbgemm'
+        if engine not in torch.backends.quantized.supported_engines:
+            raise CommandError(f'Quantized engine {engine} is not supported by this PyTorch build')
+        torch.backends.quantized.engine = engine
+
+        calibration = None
+        if options['calibration_dir']:
+            calibration = _load_images(options['calibration_dir'], options['max_images'])
+        real_check = bool(options['check_dir']) or calibration is not None
+        if options['check_dir']:
+            check = _load_images(options['check_dir'], options['max_images'])
+        elif calibration is not None:
+            check = calibration
+        else:
+            self.stderr.write(self.style.WARNING(
+                'No --check-dir: comparing on random inputs, which says little about real accuracy'
+            ))
+            check = [torch.randn(1, 3, *INPUT_SIZE) for _ in range(32)]
+
+        float_model = models.mobilenet_v2(weights='DEFAULT').eval()
+
+        self.stdout.write(f'Quantizing ({options["mode"]}, {engine})...')
+        if options['mode'] == 'dynamic':
+            quantized = torch.ao.quantization.quantize_dynamic(float_model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif calibration is None:
+            quantized = quantized_models.mobilenet_v2(weights='DEFAULT', quantize=True).eval()
+        else:
+            quantized = quantized_models.mobilenet_v2(weights='DEFAULT', quantize=False).eval()
+            quantized.fuse_model()
+            quantized.qconfig = torch.ao.quantization.get_default_qconfig(engine)
+            torch.ao.quantization.prepare(quantized, inplace=True)
+            for sample in calibration:
+                quantized(sample)
+            torch.ao.quantization.convert(quantized, inplace=True)
+
+        example = torch.randn(1, 3, *INPUT_SIZE)
+        scripted = torch.jit.freeze(torch.jit.trace(quantized, example).eval())
+        float_scripted = torch.jit.freeze(torch.jit.trace(float_model, example).eval())
+
+        # Accuracy check against the float model, on what the classifier
+        # returns: the mapped waste category, or None for the colour fallback
+        same_category = decided = top1 = 0
+        max_prob_diff = 0.0
+        for sample in check:
+            float_probs = torch.softmax(float_model(sample)[0], dim=0)
+            quant_probs = torch.softmax(scripted(sample)[0], dim=0)
+            float_category = _waste_category(float_probs, category_index)
+            same_category += float_category == _waste_category(quant_probs, category_index)
+            decided += float_category is not None
+            top1 += int(float_probs.argmax()) == int(quant_probs.argmax())
+            max_prob_diff = max(max_prob_diff, float((float_probs - quant_probs).abs().max()))
+        agreement = same_category / len(check)
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        report = {
+            'mode': options['mode'],
+            'quantized_engine': engine,
+            'calibration_images': len(calibration) if calibration is not None else None,
+            'check_images': len(check) if real_check else 'random',
+            'category_agreement': round(agreement, 4),
+            'model_decided_share': round(decided / len(check), 4),
+            'imagenet_top1_agreement': round(top1 / len(check), 4),
+            'max_probability_diff': round(max_prob_diff, 4),
+            'float_latency_ms': round(_latency_ms(float_scripted, example), 2),
+            'quantized_latency_ms': round(_latency_ms(scripted, example), 2),
+            'float_size_mb': round(_model_size_mb(float_scripted, f'{output}.float.tmp'), 2),
+            'quantized_size_mb': round(_model_size_mb(scripted, f'{output}.tmp'), 2),
+            'torch_version': torch.__version__,
+            'exported_at': timezone.now().isoformat(),
+        }
+        for key, value in report.items():
+            self.stdout.write(f'  {key}: {value}')
+
+        if real_check and agreement < options['min_agreement']:
+            raise CommandError(
+                f"Waste category agreement {agreement:.1%} is below --min-agreement "
+                f"{options['min_agreement']:.1%}; model not written"
+            )
+
+        torch.jit.save(scripted, output)
+        report['class_names'] = class_names
+        # Read by WasteClassifier.load_optimized_model, and kept as the accuracy record
+        with open(f'{output}.json', 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {output} and {output}.json'))
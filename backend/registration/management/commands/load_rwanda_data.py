@@ -2,6 +2,7 @@
 Management command to load Rwanda administrative divisions data
 """
 from django.core.management.base import BaseCommand
+from registration.hierarchy import bump_version
 from registration.models import Province, District, Sector, Cell, Village
 from registration.data.rwanda_admin_data import RWANDA_ADMIN_DATA
 
@@ -62,6 +63,9 @@ class Command(BaseCommand):
                             if created:
                                 total_villages += 1
         
+        # Cached dropdown data and gazetteers in running processes are now stale
+        bump_version()
+        
         self.stdout.write(self.style.SUCCESS('\n=== Loading Complete ==='))
         self.stdout.write(self.style.SUCCESS(f'Provinces: {total_provinces} created'))
         self.stdout.write(self.style.SUCCESS(f'Districts: {total_districts} created'))
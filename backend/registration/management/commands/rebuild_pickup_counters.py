@@ -0,0 +1,38 @@
+"""
+Management command to recompute household and collector pickup counters
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from registration.counters import rebuild_collector_stats, rebuild_household_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the HouseholdStats and CollectorStats counter tables from the pickup history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--households-only',
+            action='store_true',
+            help='Only rebuild household counters',
+        )
+        parser.add_argument(
+            '--collectors-only',
+            action='store_true',
+            help='Only rebuild collector counters',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        if not options['collectors_only']:
+            count = rebuild_household_stats()
+            self.stdout.write(f"Household counters rebuilt: {count}")
+        if not options['households_only']:
+            count = rebuild_collector_stats()
+            self.stdout.write(f"Collector counters rebuilt: {count}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Counters rebuilt in {time.perf_counter() - started:.2f}s"
+        ))
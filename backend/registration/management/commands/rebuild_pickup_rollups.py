@@ -0,0 +1,43 @@
+"""
+Management command to recompute the daily pickup rollups used by the admin analytics
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from registration.models import DailyPickupRollup
+from registration.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the DailyPickupRollup table from the pickup history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Only rebuild the most recent N days (default: all days)',
+        )
+        parser.add_argument(
+            '--initial',
+            action='store_true',
+            help='Rebuild all days if no rollups exist yet, ignoring --days (for deploy scripts)',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['initial'] and not DailyPickupRollup.objects.exists():
+            self.stdout.write('No rollups yet; rebuilding all days')
+        elif options['days'] is not None:
+            if options['days'] < 1:
+                raise CommandError('--days must be positive')
+            since = timezone.localdate() - timedelta(days=options['days'] - 1)
+
+        started = time.perf_counter()
+        count = rebuild_rollups(since=since)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollup rows rebuilt: {count} in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,30 @@
+"""
+Management command to serve waste classification over a Unix socket
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from registration.classifier_batching import get_batching_classifier
+from registration.classifier_server import ClassifierServer
+
+
+class Command(BaseCommand):
+    help = ('Loads the waste classifier once and serves classifications to the web workers '
+            'over a Unix socket (set CLASSIFIER_SOCKET for the web workers to use it)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=None, help='Socket path (default: CLASSIFIER_SOCKET)')
+
+    def handle(self, *args, **options):
+        socket_path = options['socket'] or getattr(settings, 'CLASSIFIER_SOCKET', '')
+        if not socket_path:
+            raise CommandError('Pass --socket or set CLASSIFIER_SOCKET')
+
+        classifier = get_batching_classifier()
+        model = classifier.classifier.model_kind or 'rule-based'
+        with ClassifierServer(socket_path, classifier) as server:
+            self.stdout.write(self.style.SUCCESS(f'Serving the {model} classifier on {socket_path}'))
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,52 @@
+"""
+Management command to send one notification to many households/collectors
+"""
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from registration.fanout import AUDIENCES, run_fanout
+
+
+class Command(BaseCommand):
+    help = ('Sends a notification to every household and/or collector in an administrative '
+            'area, optionally only those with a pickup in a given status')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--title', required=True, help='Notification title')
+        parser.add_argument('--message', required=True, help='Notification message')
+        parser.add_argument('--audience', choices=AUDIENCES, default='households', help='Who receives it')
+        parser.add_argument('--province', type=int, help='Only users in this province id')
+        parser.add_argument('--district', type=int, help='Only users in this district id')
+        parser.add_argument('--sector', type=int, help='Only users in this sector id')
+        parser.add_argument('--cell', type=int, help='Only users in this cell id')
+        parser.add_argument('--village', type=int, help='Only users in this village id')
+        parser.add_argument('--status', help='Only users with a pickup in this status')
+        parser.add_argument('--batch-size', type=int, default=None, help='Notifications inserted per statement')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        targeting = {
+            'audience': options['audience'],
+            'province_id': options['province'],
+            'district_id': options['district'],
+            'sector_id': options['sector'],
+            'cell_id': options['cell'],
+            'village_id': options['village'],
+            'pickup_status': options['status'],
+        }
+        started = time.perf_counter()
+        progress = run_fanout(uuid.uuid4().hex[:12], options['title'], options['message'],
+                              targeting, options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        if progress['status'] == 'failed':
+            raise CommandError(
+                f"Sent {progress['sent']} of {progress['total']} notification(s) before failing: {progress['error']}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {progress['sent']} notification(s) in {elapsed:.2f}s"
+        ))
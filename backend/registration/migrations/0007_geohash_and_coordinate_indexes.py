@@ -0,0 +1,31 @@
+# Generated migration for geohash columns and coordinate indexes
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0006_wastecategory_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collector',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Geohash of the coordinates', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='wastepickuprequest',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Geohash of the pickup location', max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='collector',
+            index=models.Index(fields=['latitude', 'longitude'], name='collector_lat_lon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastepickuprequest',
+            index=models.Index(fields=['latitude', 'longitude'], name='pickup_lat_lon_idx'),
+        ),
+    ]
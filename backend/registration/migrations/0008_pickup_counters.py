@@ -0,0 +1,50 @@
+# Generated by Django 4.2.27 on 2026-10-18 12:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0007_geohash_and_coordinate_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectorStats',
+            fields=[
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('scheduled_count', models.PositiveIntegerField(default=0)),
+                ('in_progress_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('total_weight', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('last_pickup_at', models.DateTimeField(blank=True, help_text='Most recent completed pickup', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('collector', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='registration.collector')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='HouseholdStats',
+            fields=[
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('scheduled_count', models.PositiveIntegerField(default=0)),
+                ('in_progress_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('total_weight', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('last_pickup_at', models.DateTimeField(blank=True, help_text='Most recent completed pickup', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('household', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='registration.household')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
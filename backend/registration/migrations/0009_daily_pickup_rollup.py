@@ -0,0 +1,35 @@
+# Generated by Django 4.2.27 on 2026-10-18 13:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0008_pickup_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPickupRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('created_count', models.IntegerField(default=0)),
+                ('created_weight', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('pending_count', models.IntegerField(default=0)),
+                ('scheduled_count', models.IntegerField(default=0)),
+                ('in_progress_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('completed_weight', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('district', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='registration.district')),
+                ('province', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='registration.province')),
+                ('waste_category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='registration.wastecategory')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'province', 'district', 'waste_category'], name='rollup_dimensions_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.27 on 2026-10-18 13:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0009_daily_pickup_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='collector',
+            index=models.Index(fields=['created_at', 'id'], name='collector_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='household',
+            index=models.Index(fields=['created_at', 'id'], name='household_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastepickuprequest',
+            index=models.Index(fields=['created_at', 'id'], name='pickup_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastepickuprequest',
+            index=models.Index(fields=['household', 'created_at', 'id'], name='pickup_household_created_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.27 on 2026-10-18 15:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    replaces = [('registration', '0012_pickup_filter_indexes'), ('registration', '0013_drop_overlapping_pickup_indexes')]
+
+    dependencies = [
+        ('registration', '0011_notification_unread_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wastepickuprequest',
+            index=models.Index(fields=['collector', 'created_at', 'id'], name='pickup_collector_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastepickuprequest',
+            index=models.Index(fields=['collector', 'status', 'latitude', 'longitude'], name='pickup_collector_geo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastepickuprequest',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='pickup_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastepickuprequest',
+            index=models.Index(fields=['status', 'scheduled_date'], name='pickup_status_scheduled_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='wastepickuprequest',
+            name='pickup_lat_lon_idx',
+        ),
+        migrations.AlterField(
+            model_name='wastepickuprequest',
+            name='collector',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_pickups', to='registration.collector'),
+        ),
+        migrations.AlterField(
+            model_name='wastepickuprequest',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, help_text='Geohash of the pickup location', max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='wastepickuprequest',
+            name='household',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='pickup_requests', to='registration.household'),
+        ),
+    ]
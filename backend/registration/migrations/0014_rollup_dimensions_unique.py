@@ -0,0 +1,40 @@
+# Generated by Django 4.2.27 on 2026-10-18 16:05
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+SUMMED_FIELDS = (
+    'created_count', 'created_weight', 'pending_count', 'scheduled_count', 'in_progress_count',
+    'completed_count', 'completed_weight', 'cancelled_count',
+)
+
+
+def merge_duplicate_rollups(apps, schema_editor):
+    """Fold rows that concurrent first writes created twice into one"""
+    DailyPickupRollup = apps.get_model('registration', 'DailyPickupRollup')
+    kept = {}
+    for row in DailyPickupRollup.objects.order_by('id').iterator():
+        key = (row.date, row.province_id, row.district_id, row.waste_category_id)
+        first = kept.get(key)
+        if first is None:
+            kept[key] = row
+            continue
+        for field in SUMMED_FIELDS:
+            setattr(first, field, getattr(first, field) + getattr(row, field))
+        first.save(update_fields=SUMMED_FIELDS)
+        row.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0012_pickup_filter_indexes_squashed_0013_drop_overlapping_pickup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailypickuprollup',
+            constraint=models.UniqueConstraint(models.F('date'), django.db.models.functions.comparison.Coalesce('province', models.Value(0)), django.db.models.functions.comparison.Coalesce('district', models.Value(0)), django.db.models.functions.comparison.Coalesce('waste_category', models.Value(0)), name='rollup_dimensions_unique'),
+        ),
+    ]
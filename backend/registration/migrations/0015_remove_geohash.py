@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-18 16:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0014_rollup_dimensions_unique'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='collector',
+            name='geohash',
+        ),
+        migrations.RemoveField(
+            model_name='wastepickuprequest',
+            name='geohash',
+        ),
+    ]
@@ -1,9 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import RegexValidator
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-
 class Province(models.Model):
     name = models.CharField(max_length=100)
     
@@ -61,6 +62,11 @@ class Household(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_verified = models.BooleanField(default=False)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='household_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username} - Household"
     
@@ -87,6 +93,12 @@ class Collector(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='collector_lat_lon_idx'),
+            models.Index(fields=['created_at', 'id'], name='collector_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username} - Collector"
     
@@ -145,8 +157,9 @@ class WasteCategory(models.Model):
 
 
 class WastePickupRequest(models.Model):
-    household = models.ForeignKey(Household, on_delete=models.CASCADE, related_name='pickup_requests')
-    collector = models.ForeignKey(Collector, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_pickups')
+    # Both foreign keys lead composite indexes below, so they need none of their own
+    household = models.ForeignKey(Household, on_delete=models.CASCADE, related_name='pickup_requests', db_index=False)
+    collector = models.ForeignKey(Collector, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_pickups', db_index=False)
     waste_category = models.ForeignKey(WasteCategory, on_delete=models.CASCADE)
     quantity = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     status = models.CharField(
@@ -169,6 +182,22 @@ class WastePickupRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Keyset pagination of the pickup lists (see pagination.py)
+            models.Index(fields=['created_at', 'id'], name='pickup_created_idx'),
+            models.Index(fields=['household', 'created_at', 'id'], name='pickup_household_created_idx'),
+            # Hot filters; `manage.py explain_pickup_queries` checks the plans
+            # Collector's own pickups, newest first
+            models.Index(fields=['collector', 'created_at', 'id'], name='pickup_collector_created_idx'),
+            # Collector workloads, and find_nearby_pickups: unassigned
+            # (collector IS NULL) open pickups by latitude range
+            models.Index(fields=['collector', 'status', 'latitude', 'longitude'], name='pickup_collector_geo_idx'),
+            # Available pickups, admin status lists, and missed pickups by scheduled date
+            models.Index(fields=['status', 'created_at', 'id'], name='pickup_status_created_idx'),
+            models.Index(fields=['status', 'scheduled_date'], name='pickup_status_scheduled_idx'),
+        ]
+    
     def __str__(self):
         return f"Pickup Request #{self.id} - {self.household.user.username} - {self.status}"
     
@@ -177,6 +206,78 @@ class WastePickupRequest(models.Model):
         return self.latitude is not None and self.longitude is not None
 
 
+class PickupCounters(models.Model):
+    """Running pickup totals, kept current by signal handlers in counters.py"""
+    pending_count = models.PositiveIntegerField(default=0)
+    scheduled_count = models.PositiveIntegerField(default=0)
+    in_progress_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    total_count = models.PositiveIntegerField(default=0)
+    total_weight = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    last_pickup_at = models.DateTimeField(null=True, blank=True, help_text="Most recent completed pickup")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        abstract = True
+
+
+class HouseholdStats(PickupCounters):
+    household = models.OneToOneField(Household, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    
+    def __str__(self):
+        return f"Stats for {self.household}"
+
+
+class CollectorStats(PickupCounters):
+    collector = models.OneToOneField(Collector, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    
+    def __str__(self):
+        return f"Stats for {self.collector}"
+
+
+class DailyPickupRollup(models.Model):
+    """
+    Pickup totals per day, province, district and waste category.
+    
+    Each pickup adds to ``created_count`` on the day it was created and to
+    one status column on the day it reached that status (completion date
+    for completed pickups, last update for cancelled ones, creation date
+    otherwise), so summing a status column gives the current total.
+    Maintained incrementally by rollups.py.
+    """
+    date = models.DateField()
+    province = models.ForeignKey(Province, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    district = models.ForeignKey(District, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    waste_category = models.ForeignKey(WasteCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_count = models.IntegerField(default=0)
+    created_weight = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    pending_count = models.IntegerField(default=0)
+    scheduled_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    completed_weight = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    cancelled_count = models.IntegerField(default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'province', 'district', 'waste_category'], name='rollup_dimensions_idx'),
+        ]
+        constraints = [
+            # One row per key; NULL dimensions compare equal through Coalesce
+            models.UniqueConstraint(
+                'date',
+                Coalesce('province', Value(0)),
+                Coalesce('district', Value(0)),
+                Coalesce('waste_category', Value(0)),
+                name='rollup_dimensions_unique',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Pickups on {self.date} ({self.district or self.province or 'unknown area'})"
+
+
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     title = models.CharField(max_length=200)
@@ -186,6 +287,10 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread count and latest-unread lookups per user
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notification_user_unread_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
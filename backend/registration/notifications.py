@@ -0,0 +1,71 @@
+"""
+Per-user notification summaries.
+
+The unread count and the latest unread notifications are cached per user
+and dropped whenever one of the user's notifications is created, changed or
+deleted (signals) or marked read through ``mark_read``. Pages get them from
+``context_processors.notifications``, so views no longer query them.
+"""
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+# Unread notifications listed in the page header
+LATEST_UNREAD_LIMIT = 5
+
+DEFAULT_CACHE_SECONDS = 300
+
+
+def _cache_key(user_id: int) -> str:
+    return f'notifications:{user_id}'
+
+
+def get_unread_summary(user_id: int) -> Dict[str, object]:
+    """
+    Unread count and latest unread notifications for a user.
+
+    Returns:
+        {'count': 3, 'latest': [{'id': 9, 'title': ..., 'message': ...,
+                                 'is_read': False, 'created_at': datetime}, ...]}
+    """
+    key = _cache_key(user_id)
+    summary = cache.get(key)
+    if summary is None:
+        from .models import Notification
+
+        unread = Notification.objects.filter(user_id=user_id, is_read=False)
+        summary = {
+            'count': unread.count(),
+            'latest': list(unread.order_by('-created_at').values(
+                'id', 'title', 'message', 'is_read', 'created_at'
+            )[:LATEST_UNREAD_LIMIT]),
+        }
+        cache.set(key, summary, getattr(settings, 'NOTIFICATION_CACHE_SECONDS', DEFAULT_CACHE_SECONDS))
+    return summary
+
+
+def invalidate(user_ids: Iterable[int]):
+    """Drop cached summaries once the current transaction commits"""
+    keys = [_cache_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def mark_read(user, notification_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Mark a user's notifications (all, or only the given ids) as read.
+
+    Returns:
+        Number of notifications that were unread
+    """
+    from .models import Notification
+
+    unread = Notification.objects.filter(user=user, is_read=False)
+    if notification_ids is not None:
+        unread = unread.filter(id__in=list(notification_ids))
+    updated = unread.update(is_read=True)
+    if updated:
+        invalidate([user.id])
+    return updated
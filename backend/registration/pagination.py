@@ -0,0 +1,169 @@
+"""
+Keyset (cursor) pagination for the long list pages.
+
+Lists are ordered newest first on ``(created_at, id)`` and a page is
+fetched with ``WHERE (created_at, id) < cursor ... LIMIT n``, so page 500
+costs the same index range scan as page 1, unlike OFFSET pagination.
+Cursors are opaque URL-safe strings holding the boundary row's
+``created_at`` and ``id`` plus the direction to read in.
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 25
+DEFAULT_MAX_PAGE_SIZE = 100
+
+CURSOR_PARAM = 'cursor'
+PAGE_SIZE_PARAM = 'page_size'
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded"""
+
+
+def encode_cursor(created_at: datetime, pk: int, forward: bool = True) -> str:
+    raw = f"{'n' if forward else 'p'}|{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, bool]:
+    """Decode a cursor into (created_at, id, forward)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        if direction not in ('n', 'p'):
+            raise ValueError(direction)
+        return datetime.fromisoformat(created_at), int(pk), direction == 'n'
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(f'Invalid cursor: {cursor!r}') from exc
+
+
+def get_page_size(request, default: Optional[int] = None) -> int:
+    """Page size from ``?page_size=``, clamped to 1..LIST_MAX_PAGE_SIZE"""
+    default = default or getattr(settings, 'LIST_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    maximum = getattr(settings, 'LIST_MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)
+    try:
+        size = int(request.GET.get(PAGE_SIZE_PARAM, default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+class KeysetPage:
+    """
+    One page of results.
+
+    Iterates, sizes and tests true like the list of items, so templates that
+    looped over the full queryset keep working unchanged.
+    """
+
+    def __init__(self, items: List, page_size: int, next_cursor: Optional[str], previous_cursor: Optional[str]):
+        self.items = items
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.next_url = None
+        self.previous_url = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def as_dict(self, results: List) -> dict:
+        """JSON body for a page, with ``results`` already serialized"""
+        return {
+            'results': results,
+            'page_size': self.page_size,
+            'next_cursor': self.next_cursor,
+            'previous_cursor': self.previous_cursor,
+            'success': True,
+        }
+
+
+def paginate_keyset(queryset, cursor: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE) -> KeysetPage:
+    """
+    Fetch one page of ``queryset`` newest first.
+
+    Args:
+        queryset: Any queryset over a model with ``created_at``; its own
+            ordering is replaced by ``-created_at, -id``
+        cursor: Cursor from a previous page (None for the first page)
+        page_size: Rows per page
+
+    Raises:
+        InvalidCursor: If the cursor cannot be decoded
+    """
+    forward = True
+    if cursor:
+        created_at, pk, forward = decode_cursor(cursor)
+        if forward:
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        else:
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+    ordering = ('-created_at', '-id') if forward else ('created_at', 'id')
+    # One extra row tells whether there is another page in this direction
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if not forward:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage([], page_size, None, None)
+
+    first, last = rows[0], rows[-1]
+    has_next = more if forward else True
+    has_previous = bool(cursor) if forward else more
+    return KeysetPage(
+        rows,
+        page_size,
+        encode_cursor(last.created_at, last.pk, forward=True) if has_next else None,
+        encode_cursor(first.created_at, first.pk, forward=False) if has_previous else None,
+    )
+
+
+def paginate_request(queryset, request, page_size: Optional[int] = None, strict: bool = False) -> KeysetPage:
+    """
+    Paginate ``queryset`` from the request's ``?cursor=`` and ``?page_size=``.
+
+    An invalid cursor falls back to the first page unless ``strict`` is set,
+    in which case InvalidCursor propagates. ``next_url`` and ``previous_url``
+    keep the request's other query parameters (filters).
+    """
+    size = get_page_size(request, page_size)
+    try:
+        page = paginate_keyset(queryset, request.GET.get(CURSOR_PARAM), size)
+    except InvalidCursor:
+        if strict:
+            raise
+        page = paginate_keyset(queryset, None, size)
+
+    for attr, cursor in (('next_url', page.next_cursor), ('previous_url', page.previous_cursor)):
+        if cursor is not None:
+            params = request.GET.copy()
+            params[CURSOR_PARAM] = cursor
+            setattr(page, attr, f'{request.path}?{params.urlencode()}')
+    return page
+
+
+def wants_json(request) -> bool:
+    """Whether a list page was requested as JSON (``?format=json``)"""
+    return request.GET.get('format') == 'json'
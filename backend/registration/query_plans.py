@@ -0,0 +1,86 @@
+"""
+Index checks for the hot pickup queries.
+
+``hot_queries`` lists the querysets the views run on WastePickupRequest
+with the one index each must use per database. ``explain_hot_queries``
+runs EXPLAIN on them; the ``pickup_query_indexes`` database check and
+``manage.py explain_pickup_queries`` both fail when a plan does not use
+its index.
+"""
+import re
+from typing import Iterator, Tuple
+
+from django.db import connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .assignment import ACTIVE_STATUSES
+from .geocoding import bounding_box_q
+from .models import WastePickupRequest
+
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+
+# A point in Kigali for the nearby-pickups bounding box
+KIGALI = (-1.9441, 30.0619)
+
+
+def hot_queries():
+    """
+    (name, queryset, {vendor: index name}) for the querysets the views run.
+
+    Keep these in step with the views when their filters change. Each query
+    names the one index it must use on each database; a plan that picks a
+    different index fails the check as much as a table scan does.
+    """
+    pickups = WastePickupRequest.objects.all()
+    return [
+        ('collector available pickups',
+         pickups.filter(status='Pending', collector__isnull=True).order_by('-created_at', '-id')[:26],
+         {'sqlite': 'pickup_status_created_idx', 'postgresql': 'pickup_status_created_idx'}),
+        ('find_nearby_pickups',
+         pickups.filter(
+             bounding_box_q(KIGALI[0], KIGALI[1], 10),
+             status__in=['Pending', 'Scheduled'],
+             latitude__isnull=False,
+             longitude__isnull=False,
+             collector__isnull=True,
+         ).values_list('id', 'latitude', 'longitude'),
+         {'sqlite': 'pickup_collector_geo_idx', 'postgresql': 'pickup_collector_geo_idx'}),
+        ('collector dashboard assigned pickups',
+         pickups.filter(collector_id=1).order_by('-created_at'),
+         {'sqlite': 'pickup_collector_created_idx', 'postgresql': 'pickup_collector_created_idx'}),
+        ('collector workloads',
+         pickups.filter(collector_id__in=[1, 2, 3], status__in=ACTIVE_STATUSES)
+         .values('collector_id').annotate(active=Count('id')),
+         {'sqlite': 'pickup_collector_geo_idx', 'postgresql': 'pickup_collector_geo_idx'}),
+        ('admin pickups by status',
+         pickups.filter(status='Pending').order_by('-created_at', '-id')[:26],
+         {'sqlite': 'pickup_status_created_idx', 'postgresql': 'pickup_status_created_idx'}),
+        ('admin missed pickups',
+         pickups.filter(status__in=ACTIVE_STATUSES, scheduled_date__lt=timezone.now()).order_by('scheduled_date'),
+         {'sqlite': 'pickup_status_scheduled_idx', 'postgresql': 'pickup_status_scheduled_idx'}),
+        ('household pickup requests',
+         pickups.filter(household_id=1).order_by('-created_at', '-id')[:26],
+         {'sqlite': 'pickup_household_created_idx', 'postgresql': 'pickup_household_created_idx'}),
+    ]
+
+
+def explain_hot_queries(using: str = 'default') -> Iterator[Tuple[str, str, str, bool]]:
+    """
+    EXPLAIN every hot query on a database.
+
+    Yields:
+        (query name, expected index, plan, whether the plan uses the index)
+    """
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        if connection.vendor == 'postgresql':
+            # Small tables make sequential scans cheapest; ask whether the
+            # planner *can* use an index, which is what matters at scale
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        for name, queryset, indexes in hot_queries():
+            index = indexes[connection.vendor]
+            plan = queryset.using(using).explain()
+            yield name, index, plan, re.search(rf'\b{index}\b', plan) is not None
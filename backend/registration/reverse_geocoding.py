@@ -0,0 +1,197 @@
+"""
+Reverse geocoding of coordinates to Rwandan administrative areas.
+
+Each level of the gazetteer (province down to village) gets its own nearest
+centroid index. A point resolves to the deepest area whose centroid is close
+enough for that level, and the area's ancestors fill in the levels above it.
+"""
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .gazetteer import LEVELS, Gazetteer, Place, get_gazetteer
+from .geocoding import KM_PER_DEGREE
+
+# SciPy provides a KD-tree; without it nearest centroids are found by brute force
+try:
+    from scipy.spatial import cKDTree
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+    logging.warning("SciPy not available. Reverse geocoding will use brute-force search.")
+
+logger = logging.getLogger(__name__)
+
+# How far (km) a point may be from an area's centroid and still belong to it
+MAX_DISTANCE_KM = {
+    'province': 100.0,
+    'district': 40.0,
+    'sector': 8.0,
+    'cell': 3.0,
+    'village': 1.5,
+}
+
+# Rwanda lies between 1°S and 3°S, so one reference latitude keeps the
+# equirectangular projection accurate to well under a percent
+REFERENCE_LATITUDE = -2.0
+
+# Points compared against all centroids at once in the brute-force search
+BRUTE_FORCE_CHUNK = 128
+
+
+def _project(lats, lons) -> np.ndarray:
+    """Project coordinates to an (n, 2) array of planar kilometres"""
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    scale = math.cos(math.radians(REFERENCE_LATITUDE))
+    return np.column_stack((lons * KM_PER_DEGREE * scale, lats * KM_PER_DEGREE))
+
+
+class _LevelIndex:
+    """Nearest-centroid search over the places of one administrative level"""
+
+    def __init__(self, places: List[Place]):
+        self.places = places
+        self.points = _project([p.latitude for p in places], [p.longitude for p in places])
+        self.tree = cKDTree(self.points) if SCIPY_AVAILABLE and places else None
+
+    def nearest(self, points: np.ndarray, max_distance_km: float) -> np.ndarray:
+        """Index of the nearest place per point, or -1 when none is close enough"""
+        result = np.full(len(points), -1, dtype=np.int64)
+        if not self.places or not len(points):
+            return result
+
+        if self.tree is not None:
+            distances, indices = self.tree.query(points, distance_upper_bound=max_distance_km)
+            found = np.isfinite(distances)
+            result[found] = indices[found]
+            return result
+
+        limit = max_distance_km ** 2
+        for start in range(0, len(points), BRUTE_FORCE_CHUNK):
+            chunk = points[start:start + BRUTE_FORCE_CHUNK]
+            d2 = ((chunk[:, np.newaxis, :] - self.points[np.newaxis, :, :]) ** 2).sum(axis=2)
+            best = np.argmin(d2, axis=1)
+            found = d2[np.arange(len(chunk)), best] <= limit
+            result[start:start + len(chunk)][found] = best[found]
+        return result
+
+
+class ReverseGeocoder:
+    """
+    Maps coordinates to the most specific administrative area nearby.
+
+    Only areas stored in the database with a centroid of their own are
+    indexed; areas that merely inherited their parent's centroid would
+    otherwise attract every point near the parent.
+    """
+
+    def __init__(self, gazetteer: Gazetteer):
+        self.gazetteer = gazetteer
+        self._levels: Dict[str, _LevelIndex] = {}
+        for level in LEVELS:
+            places = [
+                place for place in gazetteer.places
+                if place.level == level and place.db_id is not None
+                and place.has_location() and not place.inherited
+            ]
+            self._levels[level] = _LevelIndex(places)
+
+    def lookup_many(self, lats: Sequence, lons: Sequence) -> List[Optional[Place]]:
+        """Resolve many points at once; returns one Place (or None) per point"""
+        points = _project(lats, lons)
+        resolved: List[Optional[Place]] = [None] * len(points)
+        pending = np.arange(len(points))
+
+        # Deepest level first; each level only sees points still unresolved
+        for level in reversed(LEVELS):
+            if not len(pending):
+                break
+            index = self._levels[level]
+            nearest = index.nearest(points[pending], MAX_DISTANCE_KM[level])
+            found = nearest >= 0
+            for point, place_index in zip(pending[found].tolist(), nearest[found].tolist()):
+                resolved[point] = index.places[place_index]
+            pending = pending[~found]
+        return resolved
+
+    def lookup(self, latitude: float, longitude: float) -> Optional[Place]:
+        """Resolve a single point"""
+        return self.lookup_many([float(latitude)], [float(longitude)])[0]
+
+    def admin_area_ids(self, place: Optional[Place], current: Dict[str, Optional[int]],
+                       overwrite: bool = False) -> Dict[str, Optional[int]]:
+        """
+        Merge a resolved place into a record's existing area ids.
+
+        Walks the place's lineage from province down. Empty levels are filled;
+        a level that already disagrees with the lineage stops the walk so
+        that deeper levels never contradict what the record already says.
+
+        Args:
+            place: Place returned by lookup, or None
+            current: Existing ids keyed by level name
+            overwrite: Replace existing ids instead of keeping them
+
+        Returns:
+            New ids keyed by level name
+        """
+        updated = dict(current)
+        if place is None:
+            return updated
+        for ancestor in self.gazetteer.lineage(place):
+            if ancestor.db_id is None:
+                break
+            existing = current.get(ancestor.level)
+            if existing is not None and existing != ancestor.db_id and not overwrite:
+                break
+            updated[ancestor.level] = ancestor.db_id
+        return updated
+
+
+_reverse_geocoder = None
+_reverse_geocoder_lock = threading.Lock()
+
+
+def get_reverse_geocoder() -> ReverseGeocoder:
+    """Get the process-wide reverse geocoder, rebuilt with the gazetteer"""
+    global _reverse_geocoder
+    gazetteer = get_gazetteer()
+    if _reverse_geocoder is None or _reverse_geocoder.gazetteer is not gazetteer:
+        with _reverse_geocoder_lock:
+            if _reverse_geocoder is None or _reverse_geocoder.gazetteer is not gazetteer:
+                _reverse_geocoder = ReverseGeocoder(gazetteer)
+    return _reverse_geocoder
+
+
+def fill_household_admin_areas(household, latitude: Optional[float] = None,
+                               longitude: Optional[float] = None,
+                               overwrite: bool = False) -> List[str]:
+    """
+    Fill a household's province/district/sector/cell/village from coordinates.
+
+    Uses the household's own coordinates unless others are given. The
+    household is modified in place but not saved.
+
+    Returns:
+        Names of the fields that changed, suitable for ``update_fields``
+    """
+    if latitude is None or longitude is None:
+        if not household.has_location():
+            return []
+        latitude, longitude = household.latitude, household.longitude
+
+    geocoder = get_reverse_geocoder()
+    place = geocoder.lookup(latitude, longitude)
+    current = {level: getattr(household, f'{level}_id') for level in LEVELS}
+    updated = geocoder.admin_area_ids(place, current, overwrite=overwrite)
+
+    changed = []
+    for level in LEVELS:
+        if updated[level] != current[level]:
+            setattr(household, f'{level}_id', updated[level])
+            changed.append(level)
+    return changed
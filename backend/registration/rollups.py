@@ -0,0 +1,308 @@
+"""
+Daily pickup rollups for the admin analytics.
+
+Pickup saves and deletes are applied to DailyPickupRollup rows as ``F()``
+increments, so admin totals, category breakdowns and trends are sums over
+a small table of (day, province, district, category) rows instead of
+scans of the full pickup history.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DateTimeField, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .counters import STATUS_FIELDS
+
+# Weight column credited when a pickup is in a status
+STATUS_WEIGHT_FIELDS = {'Completed': 'completed_weight'}
+
+# (household_id, waste_category_id, status, quantity, created_at, completed_date, updated_at)
+Snapshot = Tuple[Optional[int], Optional[int], str, Decimal, Optional[object], Optional[object], Optional[object]]
+
+# (date, province_id, district_id, waste_category_id)
+RollupKey = Tuple[date, Optional[int], Optional[int], Optional[int]]
+
+TRACKED_FIELDS = ('household_id', 'waste_category_id', 'status', 'quantity',
+                  'created_at', 'completed_date', 'updated_at')
+
+REBUILD_BATCH_SIZE = 2000
+
+
+def snapshot(pickup) -> Optional[Snapshot]:
+    """Capture the fields a pickup's rollup contribution depends on (None if deferred)"""
+    values = pickup.__dict__
+    if any(name not in values for name in TRACKED_FIELDS):
+        return None
+    quantity = values['quantity']
+    return (
+        values['household_id'],
+        values['waste_category_id'],
+        values['status'],
+        Decimal(str(quantity)) if quantity is not None else Decimal('0'),
+        values['created_at'],
+        # Dates that do not affect the contribution are left out so that
+        # unrelated edits compare equal and cost nothing
+        values['completed_date'] if values['status'] == 'Completed' else None,
+        values['updated_at'] if values['status'] == 'Cancelled' else None,
+    )
+
+
+def _status_time(status, created_at, completed_date, updated_at):
+    """When a pickup reached its current status"""
+    if status == 'Completed' and completed_date is not None:
+        return completed_date
+    if status == 'Cancelled' and updated_at is not None:
+        return updated_at
+    return created_at
+
+
+def _day(value) -> date:
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def _household_areas(household_ids: Iterable[int]) -> Dict[int, Tuple[Optional[int], Optional[int]]]:
+    from .models import Household
+
+    return {
+        row[0]: (row[1], row[2])
+        for row in Household.objects.filter(id__in=set(household_ids)).values_list('id', 'province_id', 'district_id')
+    }
+
+
+def _contributions(state: Snapshot, areas, sign: int) -> List[Tuple[RollupKey, Dict[str, object]]]:
+    household_id, category_id, status, quantity, created_at, completed_date, updated_at = state
+    if created_at is None:
+        return []
+    province_id, district_id = areas.get(household_id, (None, None))
+
+    created_key = (_day(created_at), province_id, district_id, category_id)
+    status_key = (_day(_status_time(status, created_at, completed_date, updated_at)),
+                  province_id, district_id, category_id)
+
+    result = [(created_key, {'created_count': sign, 'created_weight': quantity * sign})]
+    status_delta = {}
+    if status in STATUS_FIELDS:
+        status_delta[STATUS_FIELDS[status]] = sign
+    if status in STATUS_WEIGHT_FIELDS:
+        status_delta[STATUS_WEIGHT_FIELDS[status]] = quantity * sign
+    if status_delta:
+        result.append((status_key, status_delta))
+    return result
+
+
+def _apply(deltas: Dict[RollupKey, Dict[str, object]]):
+    """Add deltas to rollup rows, creating rows that do not exist yet"""
+    from .models import DailyPickupRollup
+
+    for (day, province_id, district_id, category_id), delta in deltas.items():
+        delta = {field: value for field, value in delta.items() if value}
+        if not delta:
+            continue
+        lookup = {
+            'date': day,
+            'province_id': province_id,
+            'district_id': district_id,
+            'waste_category_id': category_id,
+        }
+        changes = {field: F(field) + value for field, value in delta.items()}
+        if DailyPickupRollup.objects.filter(**lookup).update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                DailyPickupRollup.objects.create(**lookup, **delta)
+        except IntegrityError:
+            # Another request created the row first (rollup_dimensions_unique)
+            DailyPickupRollup.objects.filter(**lookup).update(**changes)
+
+
+def apply_pickup_change(old: Optional[Snapshot], new: Optional[Snapshot]):
+    """
+    Move a pickup's contribution from its old state to its new state.
+
+    Both states are attributed to the household's current province and
+    district; ``rebuild_rollups`` corrects rows after households move.
+    """
+    if old == new:
+        return
+    households = [state[0] for state in (old, new) if state is not None]
+    areas = _household_areas(households)
+
+    deltas: Dict[RollupKey, Dict[str, object]] = {}
+    for state, sign in ((old, -1), (new, 1)):
+        if state is None:
+            continue
+        for key, delta in _contributions(state, areas, sign):
+            target = deltas.setdefault(key, {})
+            for field, value in delta.items():
+                target[field] = target.get(field, 0) + value
+    _apply(deltas)
+
+
+def record_pickup_saved(pickup, created: bool):
+    old = None if created else getattr(pickup, '_rollup_snapshot', None)
+    new = snapshot(pickup)
+    if new is not None and (old is not None or created):
+        apply_pickup_change(old, new)
+    # Otherwise the pickup was loaded with deferred fields and its previous
+    # state is unknown; rebuild_rollups corrects the affected days
+    pickup._rollup_snapshot = new
+
+
+def record_pickup_deleted(pickup):
+    old = getattr(pickup, '_rollup_snapshot', None) or snapshot(pickup)
+    if old is not None:
+        apply_pickup_change(old, None)
+
+
+def record_status_update(pickup_ids: Iterable[int], old_status: str, new_status: str):
+    """
+    Account for a queryset ``update()`` that moved pickups between open statuses.
+
+    Open statuses are dated by the pickup's creation day, so the count only
+    moves between columns of the same rows.
+    """
+    from .models import WastePickupRequest
+
+    old_field, new_field = STATUS_FIELDS[old_status], STATUS_FIELDS[new_status]
+    rows = WastePickupRequest.objects.filter(id__in=list(pickup_ids)).annotate(
+        day=TruncDate('created_at')
+    ).values('day', 'household__province_id', 'household__district_id', 'waste_category_id').annotate(
+        moved=Count('id')
+    ).order_by()
+
+    deltas = {}
+    for row in rows:
+        key = (row['day'], row['household__province_id'], row['household__district_id'], row['waste_category_id'])
+        deltas[key] = {old_field: -row['moved'], new_field: row['moved']}
+    _apply(deltas)
+
+
+def rebuild_rollups(since: Optional[date] = None) -> int:
+    """
+    Recompute rollup rows from the pickup table.
+
+    Args:
+        since: Only rebuild days from this date on (default: everything)
+
+    Returns:
+        Number of rollup rows written
+    """
+    from .models import DailyPickupRollup, WastePickupRequest
+
+    dims = ('household__province_id', 'household__district_id', 'waste_category_id')
+    weight = DecimalField(max_digits=14, decimal_places=2)
+    status_time = Case(
+        When(status='Completed', completed_date__isnull=False, then=F('completed_date')),
+        When(status='Cancelled', then=F('updated_at')),
+        default=F('created_at'),
+        output_field=DateTimeField(),
+    )
+
+    created = WastePickupRequest.objects.annotate(day=TruncDate('created_at'))
+    statuses = WastePickupRequest.objects.annotate(day=TruncDate(status_time))
+    if since is not None:
+        created = created.filter(day__gte=since)
+        statuses = statuses.filter(day__gte=since)
+
+    totals: Dict[RollupKey, Dict[str, object]] = {}
+
+    def add(row, values):
+        key = (row['day'],) + tuple(row[dim] for dim in dims)
+        totals.setdefault(key, {}).update(values)
+
+    for row in created.values('day', *dims).annotate(
+        created=Count('id'),
+        weight=Coalesce(Sum('quantity'), Value(Decimal('0.00')), output_field=weight),
+    ).order_by().iterator():
+        add(row, {'created_count': row['created'], 'created_weight': row['weight']})
+
+    aggregates = {field: Count('id', filter=Q(status=status)) for status, field in STATUS_FIELDS.items()}
+    aggregates['completed_weight'] = Coalesce(
+        Sum('quantity', filter=Q(status='Completed')), Value(Decimal('0.00')), output_field=weight
+    )
+    for row in statuses.values('day', *dims).annotate(**aggregates).order_by().iterator():
+        add(row, {field: row[field] for field in aggregates})
+
+    rollups = (
+        DailyPickupRollup(
+            date=day, province_id=province_id, district_id=district_id,
+            waste_category_id=category_id, **values
+        )
+        for (day, province_id, district_id, category_id), values in totals.items()
+    )
+    with transaction.atomic():
+        stale = DailyPickupRollup.objects.all()
+        if since is not None:
+            stale = stale.filter(date__gte=since)
+        stale.delete()
+        DailyPickupRollup.objects.bulk_create(rollups, batch_size=REBUILD_BATCH_SIZE)
+    return len(totals)
+
+
+def _rollups(province_id=None, district_id=None):
+    from .models import DailyPickupRollup
+
+    rollups = DailyPickupRollup.objects.all()
+    if province_id:
+        rollups = rollups.filter(province_id=province_id)
+    if district_id:
+        rollups = rollups.filter(district_id=district_id)
+    return rollups
+
+
+def get_pickup_totals(province_id=None, district_id=None) -> Dict[str, object]:
+    """
+    Current pickup totals, optionally limited to a province or district.
+
+    Returns:
+        {'total': 1200, 'pending': 40, 'scheduled': 12, 'in_progress': 3,
+         'completed': 1100, 'cancelled': 45, 'total_weight': Decimal(...),
+         'completed_weight': Decimal(...)}
+    """
+    row = _rollups(province_id, district_id).aggregate(
+        total=Sum('created_count'),
+        total_weight=Sum('created_weight'),
+        completed_weight=Sum('completed_weight'),
+        **{field[:-len('_count')]: Sum(field) for field in STATUS_FIELDS.values()}
+    )
+    return {key: value or 0 for key, value in row.items()}
+
+
+def get_pickups_by_category(province_id=None, district_id=None):
+    """Per-category totals in the shape the admin templates expect"""
+    return _rollups(province_id, district_id).values(
+        'waste_category__name', 'waste_category__id'
+    ).annotate(
+        total=Sum('created_count'),
+        pending=Sum('pending_count'),
+        scheduled=Sum('scheduled_count'),
+        in_progress=Sum('in_progress_count'),
+        completed=Sum('completed_count'),
+    ).filter(total__gt=0).order_by('-total')
+
+
+def get_daily_trend(days: int = 14, province_id=None, district_id=None) -> List[Dict[str, object]]:
+    """Pickups created and completed per day over the last ``days`` days, oldest first"""
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = _rollups(province_id, district_id).filter(date__gte=start).values('date').annotate(
+        created=Sum('created_count'),
+        completed=Sum('completed_count'),
+        cancelled=Sum('cancelled_count'),
+    )
+    by_day = {row['date']: row for row in rows}
+    trend = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        row = by_day.get(day, {})
+        trend.append({
+            'date': day,
+            'created': row.get('created') or 0,
+            'completed': row.get('completed') or 0,
+            'cancelled': row.get('cancelled') or 0,
+        })
+    return trend
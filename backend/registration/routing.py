@@ -0,0 +1,206 @@
+"""
+Route planning for collectors.
+
+Orders a collector's active pickups into a short driving sequence starting
+from the collector's current location: a nearest-neighbour tour is refined
+with 2-opt and Or-opt moves until no move shortens the route.
+"""
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .geocoding import calculate_distance_matrix
+from .live_positions import get_live_position
+
+# Pickup statuses that still need a visit
+ROUTE_STATUSES = ['Scheduled', 'In Progress']
+
+# Longest segment Or-opt tries to relocate
+OR_OPT_MAX_SEGMENT = 3
+
+# Improvements smaller than this (km) are treated as noise
+IMPROVEMENT_EPSILON = 1e-9
+
+# Stop refining after this long; the current route is still valid
+DEFAULT_TIME_LIMIT_SECONDS = 0.5
+
+
+def _build_matrix(start_lat, start_lon, stop_lats: Sequence, stop_lons: Sequence) -> np.ndarray:
+    """
+    Distance matrix over [start, stop_1..stop_n, end].
+
+    The end node is a dummy at zero distance from everything, which turns the
+    open route into a path with both ends fixed. Without a start location the
+    start node is a dummy as well, letting the route begin at any stop.
+    """
+    n = len(stop_lats)
+    matrix = np.zeros((n + 2, n + 2), dtype=np.float64)
+    matrix[1:n + 1, 1:n + 1] = calculate_distance_matrix(stop_lats, stop_lons, stop_lats, stop_lons)
+    if start_lat is not None and start_lon is not None:
+        from_start = calculate_distance_matrix([start_lat], [start_lon], stop_lats, stop_lons)[0]
+        matrix[0, 1:n + 1] = from_start
+        matrix[1:n + 1, 0] = from_start
+    return matrix
+
+
+def _nearest_neighbour(matrix: np.ndarray) -> np.ndarray:
+    """Seed path: always drive to the closest unvisited stop"""
+    n = matrix.shape[0] - 2
+    visited = np.zeros(n + 2, dtype=bool)
+    visited[0] = True
+    visited[n + 1] = True
+    path = [0]
+    current = 0
+    for _ in range(n):
+        row = np.where(visited, np.inf, matrix[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        path.append(current)
+    path.append(n + 1)
+    return np.array(path, dtype=np.int64)
+
+
+def _two_opt_pass(path: np.ndarray, matrix: np.ndarray) -> bool:
+    """Reverse path segments wherever that shortens the route"""
+    improved = False
+    last = len(path) - 2  # Index of the last movable node
+    for i in range(1, last):
+        a, b = path[i - 1], path[i]
+        c = path[i + 1:last + 1]
+        d = path[i + 2:last + 2]
+        delta = matrix[a, c] + matrix[b, d] - matrix[a, b] - matrix[c, d]
+        best = int(np.argmin(delta))
+        if delta[best] < -IMPROVEMENT_EPSILON:
+            j = i + 1 + best
+            path[i:j + 1] = path[i:j + 1][::-1].copy()
+            improved = True
+    return improved
+
+
+def _or_opt_pass(path: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Move short segments (optionally reversed) to their cheapest position"""
+    for length in range(1, OR_OPT_MAX_SEGMENT + 1):
+        i = 1
+        while i + length <= len(path) - 1:
+            segment = path[i:i + length]
+            first, last_node = segment[0], segment[-1]
+            prev_node, next_node = path[i - 1], path[i + length]
+            removal_gain = (matrix[prev_node, first] + matrix[last_node, next_node]
+                            - matrix[prev_node, next_node])
+
+            rest = np.concatenate([path[:i], path[i + length:]])
+            u, v = rest[:-1], rest[1:]
+            forward = matrix[u, first] + matrix[last_node, v] - matrix[u, v]
+            backward = matrix[u, last_node] + matrix[first, v] - matrix[u, v]
+            costs = np.minimum(forward, backward)
+            best = int(np.argmin(costs))
+
+            if removal_gain - costs[best] > IMPROVEMENT_EPSILON:
+                moved = segment if forward[best] <= backward[best] else segment[::-1]
+                path = np.concatenate([rest[:best + 1], moved, rest[best + 1:]])
+            else:
+                i += 1
+    return path
+
+
+def plan_route(start_lat: Optional[float], start_lon: Optional[float],
+               stop_lats: Sequence, stop_lons: Sequence,
+               time_limit: float = DEFAULT_TIME_LIMIT_SECONDS) -> List[int]:
+    """
+    Compute a short visiting order for a set of stops.
+
+    Args:
+        start_lat, start_lon: Starting point, or None to start anywhere
+        stop_lats, stop_lons: Stop coordinates
+        time_limit: Seconds to spend on improvement moves
+
+    Returns:
+        Indices into the stop sequences in visiting order
+    """
+    n = len(stop_lats)
+    if n == 0:
+        return []
+    if n == 1:
+        return [0]
+
+    matrix = _build_matrix(start_lat, start_lon, stop_lats, stop_lons)
+    path = _nearest_neighbour(matrix)
+
+    deadline = time.perf_counter() + time_limit
+    while time.perf_counter() < deadline:
+        improved = _two_opt_pass(path, matrix)
+        before = _path_length(path, matrix)
+        path = _or_opt_pass(path, matrix)
+        if not improved and _path_length(path, matrix) >= before - IMPROVEMENT_EPSILON:
+            break
+
+    return [int(node) - 1 for node in path[1:-1]]
+
+
+def _path_length(path: np.ndarray, matrix: np.ndarray) -> float:
+    return float(matrix[path[:-1], path[1:]].sum())
+
+
+def plan_collector_route(collector, pickups=None) -> Dict[str, object]:
+    """
+    Plan the visiting order for a collector's active pickups.
+
+    Args:
+        collector: Collector instance; its coordinates are the starting point
+        pickups: Optional iterable of pickups to order (defaults to the
+            collector's Scheduled/In Progress pickups)
+
+    Returns:
+        Dictionary with the ordered route:
+        {
+            'stops': [{'pickup': pickup, 'order': 1, 'leg_km': 1.2}, ...],
+            'unlocated': [pickup, ...],   # pickups without coordinates
+            'total_distance_km': 12.4,
+        }
+    """
+    from .models import WastePickupRequest
+
+    if pickups is None:
+        pickups = WastePickupRequest.objects.filter(
+            collector=collector,
+            status__in=ROUTE_STATUSES
+        ).select_related('household__user', 'waste_category').order_by('created_at')
+
+    located = []
+    unlocated = []
+    for pickup in pickups:
+        (located if pickup.has_location() else unlocated).append(pickup)
+
+    start = get_live_position(collector)
+    start_lat, start_lon = start if start else (None, None)
+
+    order = plan_route(
+        start_lat, start_lon,
+        [p.latitude for p in located],
+        [p.longitude for p in located]
+    )
+
+    stops = []
+    total = 0.0
+    prev_lat, prev_lon = start_lat, start_lon
+    for position, index in enumerate(order, start=1):
+        pickup = located[index]
+        lat, lon = float(pickup.latitude), float(pickup.longitude)
+        if prev_lat is None:
+            leg = 0.0
+        else:
+            leg = float(calculate_distance_matrix([prev_lat], [prev_lon], [lat], [lon])[0, 0])
+        total += leg
+        stops.append({
+            'pickup': pickup,
+            'order': position,
+            'leg_km': round(leg, 2),
+        })
+        prev_lat, prev_lon = lat, lon
+
+    return {
+        'stops': stops,
+        'unlocated': unlocated,
+        'total_distance_km': round(total, 2),
+    }
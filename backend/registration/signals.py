@@ -0,0 +1,64 @@
+"""
+Signal handlers keeping in-process caches and counter tables in sync with the database
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import counters, notifications, rollups
+from .hierarchy import bump_version
+from .models import Cell, Collector, District, Notification, Province, Sector, Village, WastePickupRequest
+from .spatial_index import get_collector_index
+
+
+@receiver(post_save, sender=Province)
+@receiver(post_save, sender=District)
+@receiver(post_save, sender=Sector)
+@receiver(post_save, sender=Cell)
+@receiver(post_save, sender=Village)
+@receiver(post_delete, sender=Province)
+@receiver(post_delete, sender=District)
+@receiver(post_delete, sender=Sector)
+@receiver(post_delete, sender=Cell)
+@receiver(post_delete, sender=Village)
+def bump_hierarchy_version(sender, instance, **kwargs):
+    """Administrative areas changed: cached dropdown data and gazetteers are stale"""
+    transaction.on_commit(bump_version)
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_notification_summary(sender, instance, **kwargs):
+    """The user's cached unread count and latest list are stale"""
+    notifications.invalidate([instance.user_id])
+
+
+@receiver(post_save, sender=Collector)
+def sync_collector_index_on_save(sender, instance, **kwargs):
+    """Move the collector to its new grid cell once the write is committed"""
+    transaction.on_commit(lambda: get_collector_index().update_collector(instance))
+
+
+@receiver(post_delete, sender=Collector)
+def sync_collector_index_on_delete(sender, instance, **kwargs):
+    collector_id = instance.id
+    transaction.on_commit(lambda: get_collector_index().remove_collector(collector_id))
+
+
+@receiver(post_init, sender=WastePickupRequest)
+def remember_pickup_state(sender, instance, **kwargs):
+    """Keep the loaded state so the next save can be turned into increments"""
+    instance._counter_snapshot = counters.snapshot(instance)
+    instance._rollup_snapshot = rollups.snapshot(instance)
+
+
+@receiver(post_save, sender=WastePickupRequest)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    counters.record_pickup_saved(instance, created)
+    rollups.record_pickup_saved(instance, created)
+
+
+@receiver(post_delete, sender=WastePickupRequest)
+def update_counters_on_delete(sender, instance, **kwargs):
+    counters.record_pickup_deleted(instance)
+    rollups.record_pickup_deleted(instance)
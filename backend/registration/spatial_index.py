@@ -0,0 +1,256 @@
+"""
+In-process spatial index over collector positions.
+
+Collectors are bucketed into a uniform latitude/longitude grid so that
+radius queries only look at the cells around the search point instead of
+every collector in the country. Collectors sharing a service radius get
+their own grid, and each grid is searched with that radius (or the
+requested one for collectors without a radius), so one wide service area
+does not widen every query.
+
+A version counter in the Django cache is bumped whenever a collector joins,
+leaves or changes cell; processes compare it on every query and rebuild
+when another process moved it. Moves within a cell do not bump it: the
+latest positions are read from the live position cache at query time.
+
+With the default per-process cache bumps are not visible to other workers;
+they pick changes up after COLLECTOR_INDEX_MAX_AGE_SECONDS instead.
+"""
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .geocoding import bounding_box, calculate_distances
+
+# ~5.5km cells keep a 10km radius query within a 5x5 block of cells
+DEFAULT_CELL_SIZE_DEG = 0.05
+
+VERSION_CACHE_KEY = 'collector-index-version'
+
+# Safety net for processes that cannot see version bumps (per-process cache)
+DEFAULT_MAX_AGE_SECONDS = 300
+
+
+def current_version() -> int:
+    """Version counter of the collector index, created on first use"""
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        # Start from the clock so a counter lost from the cache never comes
+        # back at a value some process already built against
+        cache.add(VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+def bump_version() -> int:
+    """Mark every process's collector index as stale and return the new version"""
+    try:
+        return cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        current_version()
+        return cache.incr(VERSION_CACHE_KEY)
+
+
+class CollectorGridIndex:
+    """
+    Uniform grids of available collectors keyed by service radius, then
+    by (row, col) cell.
+
+    Each entry stores the collector's coordinates and service radius so that
+    distance filtering can happen without touching the database.
+    """
+
+    def __init__(self, cell_size_deg: float = DEFAULT_CELL_SIZE_DEG,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        self.cell_size_deg = cell_size_deg
+        self.max_age_seconds = max_age_seconds
+        self._grids: Dict[Optional[float], Dict[Tuple[int, int], Set[int]]] = {}
+        self._entries: Dict[int, Tuple[float, float, Optional[float]]] = {}
+        self._version: Optional[int] = None
+        self._built_at: Optional[float] = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _cell_for(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (
+            int(math.floor(lat / self.cell_size_deg)),
+            int(math.floor(lon / self.cell_size_deg)),
+        )
+
+    def _add(self, collector_id: int, lat: float, lon: float, service_radius):
+        radius = float(service_radius) if service_radius else None
+        self._entries[collector_id] = (lat, lon, radius)
+        cells = self._grids.setdefault(radius, {})
+        cells.setdefault(self._cell_for(lat, lon), set()).add(collector_id)
+
+    def _discard(self, collector_id: int):
+        entry = self._entries.pop(collector_id, None)
+        if entry is None:
+            return
+        cells = self._grids[entry[2]]
+        cell = self._cell_for(entry[0], entry[1])
+        members = cells.get(cell)
+        if members is not None:
+            members.discard(collector_id)
+            if not members:
+                del cells[cell]
+        if not cells:
+            del self._grids[entry[2]]
+
+    def _publish(self):
+        """
+        Bump the shared version after a local change that moves the grids.
+
+        The index keeps the new version (and skips a rebuild) only if no
+        other process bumped it since this index was built.
+        """
+        version = bump_version()
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+
+    def build(self):
+        """(Re)load every available collector with coordinates from the database."""
+        from .live_positions import get_live_positions
+        from .models import Collector
+
+        version = current_version()
+        rows = list(Collector.objects.filter(
+            is_available=True,
+            latitude__isnull=False,
+            longitude__isnull=False
+        ).values_list('id', 'latitude', 'longitude', 'service_radius'))
+
+        # Recent pings may not have been written to the database yet
+        live = get_live_positions(row[0] for row in rows)
+
+        with self._lock:
+            self._grids = {}
+            self._entries = {}
+            for collector_id, lat, lon, service_radius in rows:
+                lat, lon = live.get(collector_id, (lat, lon))
+                self._add(collector_id, float(lat), float(lon), service_radius)
+            self._version = version
+            self._built_at = time.monotonic()
+
+    def is_stale(self) -> bool:
+        if self._built_at is None or self._version != current_version():
+            return True
+        return time.monotonic() - self._built_at > self.max_age_seconds
+
+    def ensure_built(self):
+        if self.is_stale():
+            self.build()
+
+    def invalidate(self):
+        """Force a rebuild on the next query."""
+        with self._lock:
+            self._built_at = None
+
+    def update_collector(self, collector):
+        """
+        Apply a saved Collector instance to the index.
+
+        Other processes are told to rebuild unless this index is current and
+        the collector only moved within its cell.
+        """
+        with self._lock:
+            current = not self.is_stale()
+            old = self._entries.get(collector.id)
+            self._discard(collector.id)
+            if collector.is_available and collector.has_location():
+                self._add(
+                    collector.id,
+                    float(collector.latitude),
+                    float(collector.longitude),
+                    collector.service_radius
+                )
+            new = self._entries.get(collector.id)
+            if current and old is None and new is None:
+                return
+            if (current and old is not None and new is not None and old[2] == new[2]
+                    and self._cell_for(old[0], old[1]) == self._cell_for(new[0], new[1])):
+                return
+            self._publish()
+
+    def remove_collector(self, collector_id: int):
+        with self._lock:
+            self._discard(collector_id)
+            self._publish()
+
+    def candidates(self, lat: float, lon: float, radius_km: float) -> List[Tuple[int, float, float, Optional[float]]]:
+        """
+        Return index entries in the cells that may hold a collector covering
+        the point.
+
+        Each service radius grid is searched within that radius of the point;
+        collectors without a radius are searched within ``radius_km``.
+
+        Returns:
+            List of (collector_id, latitude, longitude, service_radius) tuples
+        """
+        found = []
+        with self._lock:
+            for service_radius, cells in self._grids.items():
+                min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, service_radius or radius_km)
+                min_row, min_col = self._cell_for(min_lat, min_lon)
+                max_row, max_col = self._cell_for(max_lat, max_lon)
+                for row in range(min_row, max_row + 1):
+                    for col in range(min_col, max_col + 1):
+                        for collector_id in cells.get((row, col), ()):
+                            entry = self._entries[collector_id]
+                            found.append((collector_id,) + entry)
+        return found
+
+    def query(self, lat: float, lon: float, max_distance_km: float) -> List[Tuple[int, float]]:
+        """
+        Find collectors whose service radius covers the given point.
+
+        Collectors without a service radius fall back to ``max_distance_km``,
+        matching ``find_nearby_collectors``.
+
+        Returns:
+            List of (collector_id, distance_km) tuples sorted by distance
+        """
+        from .live_positions import get_live_positions
+
+        self.ensure_built()
+        candidates = self.candidates(lat, lon, max_distance_km)
+        if not candidates:
+            return []
+
+        ids, lats, lons, radii = zip(*candidates)
+        # Pings handled by other processes only move collectors within their cell
+        live = get_live_positions(ids)
+        if live:
+            lats = [live[i][0] if i in live else v for i, v in zip(ids, lats)]
+            lons = [live[i][1] if i in live else v for i, v in zip(ids, lons)]
+        distances = calculate_distances(lat, lon, lats, lons)
+        limits = np.array([radius or max_distance_km for radius in radii], dtype=np.float64)
+
+        within = np.flatnonzero(distances <= limits)
+        within = within[np.argsort(distances[within], kind='stable')]
+        return [(ids[i], float(distances[i])) for i in within]
+
+
+_collector_index = None
+_collector_index_lock = threading.Lock()
+
+
+def get_collector_index() -> CollectorGridIndex:
+    """Get or create the process-wide collector index"""
+    global _collector_index
+    if _collector_index is None:
+        with _collector_index_lock:
+            if _collector_index is None:
+                _collector_index = CollectorGridIndex(
+                    cell_size_deg=getattr(settings, 'COLLECTOR_INDEX_CELL_SIZE_DEG', DEFAULT_CELL_SIZE_DEG),
+                    max_age_seconds=getattr(settings, 'COLLECTOR_INDEX_MAX_AGE_SECONDS', DEFAULT_MAX_AGE_SECONDS),
+                )
+    return _collector_index
@@ -0,0 +1,65 @@
+"""
+Pickup statistics shown on the household and collector pages.
+
+Reads the denormalized counter rows maintained by counters.py, so a page
+costs one primary-key lookup however long the pickup history is.
+"""
+from typing import Dict
+
+from .counters import STATUS_FIELDS, compute_counters
+
+PICKUP_STATUSES = list(STATUS_FIELDS)
+
+
+def _stats_dict(row) -> Dict[str, object]:
+    return {
+        'total_requests': row.total_count,
+        'total_weight': row.total_weight,
+        'status_counts': {status: getattr(row, field) for status, field in STATUS_FIELDS.items()},
+        'last_pickup_at': row.last_pickup_at,
+    }
+
+
+def get_household_stats(household) -> Dict[str, object]:
+    """
+    Get pickup statistics for a household.
+
+    Returns:
+        Dictionary with the statistics:
+        {
+            'total_requests': 12,
+            'total_weight': Decimal('48.50'),
+            'status_counts': {'Pending': 2, 'Scheduled': 1, ..., 'Completed': 8},
+            'last_pickup_at': datetime or None,
+        }
+    """
+    from .models import HouseholdStats
+
+    row = HouseholdStats.objects.filter(household_id=household.id).first()
+    if row is None:
+        # Counted without saving; the row is written with the next pickup change
+        row = compute_counters('household_id', household.id)
+    return _stats_dict(row)
+
+
+def get_collector_stats(collector) -> Dict[str, object]:
+    """Get statistics for the pickups assigned to a collector (same shape as above)"""
+    from .models import CollectorStats
+
+    row = CollectorStats.objects.filter(collector_id=collector.id).first()
+    if row is None:
+        row = compute_counters('collector_id', collector.id)
+    return _stats_dict(row)
+
+
+def household_stats_context(household) -> Dict[str, object]:
+    """Template variables shared by the household pages"""
+    stats = get_household_stats(household)
+    return {
+        'total_requests': stats['total_requests'],
+        'completed_requests': stats['status_counts']['Completed'],
+        'pending_requests': stats['status_counts']['Pending'],
+        'total_weight': stats['total_weight'],
+        'status_counts': stats['status_counts'],
+        'last_pickup_at': stats['last_pickup_at'],
+    }
@@ -17,6 +17,7 @@ urlpatterns = [
     path('household/dashboard/', views.household_dashboard, name='household_dashboard'),
     path('household/requests/', views.household_requests, name='household_requests'),
     path('household/notifications/', views.household_notifications, name='household_notifications'),
+    path('notifications/mark-read/', views.mark_notifications_read, name='mark_notifications_read'),
     path('household/profile/', views.household_profile, name='household_profile'),
     path('household/history/', views.household_history, name='household_history'),
     path('household/settings/', views.household_settings, name='household_settings'),
@@ -37,6 +38,12 @@ urlpatterns = [
     path('portal-admin/households/', views.admin_households, name='admin_households'),
     path('portal-admin/collectors/', views.admin_collectors, name='admin_collectors'),
     path('portal-admin/quick-actions/', views.admin_quick_actions, name='admin_quick_actions'),
+    path('portal-admin/quick-actions/assign-pickups/', views.admin_assign_pickups, name='admin_assign_pickups'),
+    path('portal-admin/assignments/<str:job_id>/', views.admin_assignment_progress, name='admin_assignment_progress'),
+    path('portal-admin/pickups/export/', views.admin_export_pickups, name='admin_export_pickups'),
+    path('portal-admin/classifier/stats/', views.admin_classifier_stats, name='admin_classifier_stats'),
+    path('portal-admin/quick-actions/notify/', views.admin_send_notification, name='admin_send_notification'),
+    path('portal-admin/notifications/<str:job_id>/', views.admin_notification_progress, name='admin_notification_progress'),
     
     # Password reset (shared by all user types)
     path('password-reset/', views.CustomPasswordResetView.as_view(), name='password_reset'),
@@ -61,6 +68,7 @@ urlpatterns = [
     path('api/sectors/', views.get_sectors, name='get_sectors'),
     path('api/cells/', views.get_cells, name='get_cells'),
     path('api/villages/', views.get_villages, name='get_villages'),
+    path('api/admin-areas/', views.get_admin_areas, name='admin_areas'),
     path('api/analyze-waste-image/', views.analyze_waste_image, name='analyze_waste_image'),
     
     # OTP endpoints
@@ -76,6 +84,8 @@ urlpatterns = [
     path('api/nearby-collectors/', views.get_nearby_collectors, name='nearby_collectors'),
     path('api/nearby-pickups/', views.get_nearby_pickups, name='nearby_pickups'),
     path('api/update-location/', views.update_location, name='update_location'),
+    path('api/collector-route/', views.get_collector_route, name='collector_route'),
+    path('api/map-clusters/', views.get_map_clusters, name='map_clusters'),
     
     # AI waste classification endpoint
     path('api/classify-waste/', views.classify_waste_image, name='classify_waste'),
@@ -4,24 +4,95 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.views import PasswordResetView
 from django.contrib import messages
 from django.db import transaction, OperationalError
-from django.db.models import Q, Count
-from django.http import JsonResponse, HttpResponseRedirect
+from django.db.models import Q, Count, Prefetch
+from django.http import JsonResponse, HttpResponseRedirect, StreamingHttpResponse
 from django.utils import translation, timezone
 from django.conf import settings
-from django.urls import translate_url, reverse_lazy
+from django.urls import translate_url, reverse, reverse_lazy
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
 from django.contrib.auth.models import User
 import json
 import logging
 from .models import (
-    Household, Collector, Admin, Province, District, Sector, Cell, Village,
+    Household, Collector, Admin,
     WasteCategory, WastePickupRequest, Notification, OTP
 )
+from .exports import CONTENT_TYPES as EXPORT_CONTENT_TYPES, FORMATS as EXPORT_FORMATS, filter_pickups, iter_export
+from .hierarchy import get_admin_hierarchy
+from .notifications import mark_read
+from .pagination import InvalidCursor, paginate_request, wants_json
+from .rollups import get_daily_trend, get_pickup_totals, get_pickups_by_category
+from .stats import get_collector_stats, household_stats_context
 
 logger = logging.getLogger(__name__)
 
 
+def _display_name(user):
+    return user.get_full_name() or user.username
+
+
+def _pickup_json(pickup):
+    return {
+        'id': pickup.id,
+        'household_name': _display_name(pickup.household.user),
+        'collector_name': _display_name(pickup.collector.user) if pickup.collector_id else None,
+        'waste_category': pickup.waste_category.name,
+        'quantity': float(pickup.quantity),
+        'status': pickup.status,
+        'address': pickup.address,
+        'scheduled_date': pickup.scheduled_date.isoformat() if pickup.scheduled_date else None,
+        'completed_date': pickup.completed_date.isoformat() if pickup.completed_date else None,
+        'created_at': pickup.created_at.isoformat(),
+    }
+
+
+def _household_json(household):
+    return {
+        'id': household.id,
+        'name': _display_name(household.user),
+        'phone_number': household.phone_number,
+        'province': household.province.name if household.province_id else None,
+        'district': household.district.name if household.district_id else None,
+        'sector': household.sector.name if household.sector_id else None,
+        'cell': household.cell.name if household.cell_id else None,
+        'village': household.village.name if household.village_id else None,
+        'is_verified': household.is_verified,
+        'created_at': household.created_at.isoformat(),
+    }
+
+
+def _collector_json(collector):
+    return {
+        'id': collector.id,
+        'name': _display_name(collector.user),
+        'phone_number': collector.phone_number,
+        'province': collector.province.name if collector.province_id else None,
+        'district': collector.district.name if collector.district_id else None,
+        'is_verified': collector.is_verified,
+        'is_available': collector.is_available,
+        'created_at': collector.created_at.isoformat(),
+    }
+
+
+def _paginated(request, queryset, serialize):
+    """
+    Keyset-paginate a list page.
+    
+    Returns (page, response): for ``?format=json`` requests ``response`` is
+    the JSON page to return directly, otherwise it is None and ``page`` goes
+    into the template context.
+    """
+    if not wants_json(request):
+        return paginate_request(queryset, request), None
+    try:
+        page = paginate_request(queryset, request, strict=True)
+    except InvalidCursor as e:
+        return None, JsonResponse({'error': str(e), 'success': False}, status=400)
+    return page, JsonResponse(page.as_dict([serialize(item) for item in page]), status=200)
+
+
 def set_language(request):
     """Set language preference"""
     if request.method == 'POST':
@@ -41,7 +112,7 @@ def landing_page(request):
     """Landing page view"""
     from django.contrib.messages import get_messages
     
-    provinces = Province.objects.all()
+    provinces = get_admin_hierarchy().provinces
     
     # Handle case where WasteCategory table doesn't exist yet (migrations not run)
     # Convert to list immediately to trigger query in try-catch, not in template
@@ -87,7 +158,7 @@ def registration_selection(request):
 # Household Views
 def household_signup(request):
     """Household registration view with OTP verification"""
-    provinces = Province.objects.all()
+    provinces = get_admin_hierarchy().provinces
     
     # Define context early so it's available in all code paths
     context = {
@@ -225,15 +296,8 @@ def household_dashboard(request):
         messages.error(request, "Household profile not found.")
         return redirect('registration:household_login')
     
-    # Get full queryset for statistics (before slicing)
     all_pickup_requests = WastePickupRequest.objects.filter(household=household).order_by('-created_at')
     
-    # Calculate statistics using the full queryset
-    total_requests = all_pickup_requests.count()
-    completed_requests = all_pickup_requests.filter(status='Completed').count()
-    pending_requests = all_pickup_requests.filter(status='Pending').count()
-    total_weight = sum([req.quantity for req in all_pickup_requests])
-    
     # Calculate statistics by waste category
     from django.db.models import Sum, Count
     category_stats = WastePickupRequest.objects.filter(household=household).values(
@@ -311,7 +375,6 @@ def household_dashboard(request):
     # Slice for display (only the first 10)
     pickup_requests = all_pickup_requests[:10]
     
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
     waste_categories = WasteCategory.objects.all()
     
     context = {
@@ -319,12 +382,8 @@ def household_dashboard(request):
         'pickup_requests': pickup_requests,
         'scheduled_pickups': scheduled_pickups,
         'pending_for_calendar': pending_for_calendar,
-        'notifications': notifications,
         'waste_categories': waste_categories,
-        'total_requests': total_requests,
-        'completed_requests': completed_requests,
-        'pending_requests': pending_requests,
-        'total_weight': total_weight,
+        **household_stats_context(household),
         'category_stats': category_stats,
         'current_page': 'dashboard',
         'calendar_days': calendar_days,
@@ -343,26 +402,20 @@ def household_requests(request):
         messages.error(request, "Household profile not found.")
         return redirect('registration:household_login')
     
-    all_requests = WastePickupRequest.objects.filter(household=household).select_related('waste_category', 'collector', 'collector__user').order_by('-created_at')
-    
-    # Calculate statistics
-    total_requests = all_requests.count()
-    completed_requests = all_requests.filter(status='Completed').count()
-    pending_requests = all_requests.filter(status='Pending').count()
-    total_weight = sum([req.quantity for req in all_requests])
+    all_requests = WastePickupRequest.objects.filter(household=household).select_related(
+        'household__user', 'waste_category', 'collector', 'collector__user'
+    )
+    pickup_requests, response = _paginated(request, all_requests, _pickup_json)
+    if response is not None:
+        return response
     
     waste_categories = WasteCategory.objects.all()
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
     
     context = {
         'household': household,
-        'pickup_requests': all_requests,
+        'pickup_requests': pickup_requests,
         'waste_categories': waste_categories,
-        'notifications': notifications,
-        'total_requests': total_requests,
-        'completed_requests': completed_requests,
-        'pending_requests': pending_requests,
-        'total_weight': total_weight,
+        **household_stats_context(household),
         'current_page': 'requests',
     }
     return render(request, 'registration/household_dashboard.html', context)
@@ -379,28 +432,34 @@ def household_notifications(request):
     
     all_notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
     
-    # Calculate statistics
-    all_pickup_requests = WastePickupRequest.objects.filter(household=household)
-    total_requests = all_pickup_requests.count()
-    completed_requests = all_pickup_requests.filter(status='Completed').count()
-    pending_requests = all_pickup_requests.filter(status='Pending').count()
-    total_weight = sum([req.quantity for req in all_pickup_requests])
-    
     waste_categories = WasteCategory.objects.all()
     
     context = {
         'household': household,
         'notifications': all_notifications,
         'waste_categories': waste_categories,
-        'total_requests': total_requests,
-        'completed_requests': completed_requests,
-        'pending_requests': pending_requests,
-        'total_weight': total_weight,
+        **household_stats_context(household),
         'current_page': 'notifications',
     }
     return render(request, 'registration/household_dashboard.html', context)
 
 
+@require_http_methods(["POST"])
+@login_required
+def mark_notifications_read(request):
+    """Mark the user's notifications as read (all, or the ids posted as `ids`)"""
+    ids = request.POST.getlist('ids')
+    try:
+        notification_ids = [int(value) for value in ids] if ids else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid notification id', 'success': False}, status=400)
+    mark_read(request.user, notification_ids)
+    
+    if hasattr(request.user, 'collector_profile'):
+        return redirect('registration:collector_dashboard')
+    return redirect('registration:household_notifications')
+
+
 @login_required
 def household_profile(request):
     """Household profile view"""
@@ -410,24 +469,12 @@ def household_profile(request):
         messages.error(request, "Household profile not found.")
         return redirect('registration:household_login')
     
-    # Calculate statistics
-    all_pickup_requests = WastePickupRequest.objects.filter(household=household)
-    total_requests = all_pickup_requests.count()
-    completed_requests = all_pickup_requests.filter(status='Completed').count()
-    pending_requests = all_pickup_requests.filter(status='Pending').count()
-    total_weight = sum([req.quantity for req in all_pickup_requests])
-    
     waste_categories = WasteCategory.objects.all()
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
     
     context = {
         'household': household,
         'waste_categories': waste_categories,
-        'notifications': notifications,
-        'total_requests': total_requests,
-        'completed_requests': completed_requests,
-        'pending_requests': pending_requests,
-        'total_weight': total_weight,
+        **household_stats_context(household),
         'current_page': 'profile',
     }
     return render(request, 'registration/household_dashboard.html', context)
@@ -447,25 +494,13 @@ def household_history(request):
         status='Completed'
     ).select_related('waste_category', 'collector', 'collector__user').order_by('-completed_date', '-created_at')
     
-    # Calculate statistics
-    all_pickup_requests = WastePickupRequest.objects.filter(household=household)
-    total_requests = all_pickup_requests.count()
-    completed_count = completed_requests.count()
-    pending_requests = all_pickup_requests.filter(status='Pending').count()
-    total_weight = sum([req.quantity for req in all_pickup_requests])
-    
     waste_categories = WasteCategory.objects.all()
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
     
     context = {
         'household': household,
         'pickup_requests': completed_requests,
         'waste_categories': waste_categories,
-        'notifications': notifications,
-        'total_requests': total_requests,
-        'completed_requests': completed_count,
-        'pending_requests': pending_requests,
-        'total_weight': total_weight,
+        **household_stats_context(household),
         'current_page': 'history',
     }
     return render(request, 'registration/household_dashboard.html', context)
@@ -480,24 +515,12 @@ def household_settings(request):
         messages.error(request, "Household profile not found.")
         return redirect('registration:household_login')
     
-    # Calculate statistics
-    all_pickup_requests = WastePickupRequest.objects.filter(household=household)
-    total_requests = all_pickup_requests.count()
-    completed_requests = all_pickup_requests.filter(status='Completed').count()
-    pending_requests = all_pickup_requests.filter(status='Pending').count()
-    total_weight = sum([req.quantity for req in all_pickup_requests])
-    
     waste_categories = WasteCategory.objects.all()
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
     
     context = {
         'household': household,
         'waste_categories': waste_categories,
-        'notifications': notifications,
-        'total_requests': total_requests,
-        'completed_requests': completed_requests,
-        'pending_requests': pending_requests,
-        'total_weight': total_weight,
+        **household_stats_context(household),
         'current_page': 'settings',
     }
     return render(request, 'registration/household_dashboard.html', context)
@@ -512,14 +535,7 @@ def household_help(request):
         messages.error(request, "Household profile not found.")
         return redirect('registration:household_login')
     
-    all_pickup_requests = WastePickupRequest.objects.filter(household=household)
-    total_requests = all_pickup_requests.count()
-    completed_requests = all_pickup_requests.filter(status='Completed').count()
-    pending_requests = all_pickup_requests.filter(status='Pending').count()
-    total_weight = sum([req.quantity for req in all_pickup_requests])
-    
     waste_categories = WasteCategory.objects.all()
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
     
     faqs = [
         {
@@ -539,11 +555,7 @@ def household_help(request):
     context = {
         'household': household,
         'waste_categories': waste_categories,
-        'notifications': notifications,
-        'total_requests': total_requests,
-        'completed_requests': completed_requests,
-        'pending_requests': pending_requests,
-        'total_weight': total_weight,
+        **household_stats_context(household),
         'faqs': faqs,
         'current_page': 'help',
     }
@@ -553,7 +565,7 @@ def household_help(request):
 # Collector Views
 def collector_signup(request):
     """Collector registration view with OTP verification"""
-    provinces = Province.objects.all()
+    provinces = get_admin_hierarchy().provinces
     
     # Define context early so it's available in all code paths
     context = {
@@ -699,13 +711,12 @@ def collector_dashboard(request):
     
     assigned_pickups = WastePickupRequest.objects.filter(collector=collector).order_by('-created_at')
     available_pickups = WastePickupRequest.objects.filter(status='Pending', collector__isnull=True).order_by('-created_at')
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
     
     context = {
         'collector': collector,
+        'collector_stats': get_collector_stats(collector),
         'assigned_pickups': assigned_pickups,
         'available_pickups': available_pickups,
-        'notifications': notifications,
         'current_page': 'dashboard',
     }
     return render(request, 'registration/collector_dashboard.html', context)
@@ -720,15 +731,20 @@ def collector_available(request):
         messages.error(request, "Collector profile not found.")
         return redirect('registration:collector_login')
 
+    available = WastePickupRequest.objects.filter(status='Pending', collector__isnull=True).select_related(
+        'household__user', 'waste_category'
+    )
+    available_pickups, response = _paginated(request, available, _pickup_json)
+    if response is not None:
+        return response
     assigned_pickups = WastePickupRequest.objects.filter(collector=collector).order_by('-created_at')
-    available_pickups = WastePickupRequest.objects.filter(status='Pending', collector__isnull=True).order_by('-created_at')
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
 
     context = {
         'collector': collector,
+        'collector_stats': get_collector_stats(collector),
         'assigned_pickups': assigned_pickups,
         'available_pickups': available_pickups,
-        'notifications': notifications,
+        'available_count': available.count(),
         'current_page': 'available',
     }
     return render(request, 'registration/collector_dashboard.html', context)
@@ -743,15 +759,26 @@ def collector_assigned(request):
         messages.error(request, "Collector profile not found.")
         return redirect('registration:collector_login')
 
-    assigned_pickups = WastePickupRequest.objects.filter(collector=collector).order_by('-created_at')
+    assigned_pickups = WastePickupRequest.objects.filter(collector=collector).select_related(
+        'household__user', 'waste_category'
+    ).order_by('-created_at')
     available_pickups = WastePickupRequest.objects.filter(status='Pending', collector__isnull=True).order_by('-created_at')
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
+    
+    # Show active pickups in planned driving order, followed by everything else
+    from .routing import ROUTE_STATUSES, plan_collector_route
+    assigned_list = list(assigned_pickups)
+    route = plan_collector_route(collector, [p for p in assigned_list if p.status in ROUTE_STATUSES])
+    routed = [stop['pickup'] for stop in route['stops']] + route['unlocated']
+    routed_ids = {p.id for p in routed}
+    ordered_pickups = routed + [p for p in assigned_list if p.id not in routed_ids]
 
     context = {
         'collector': collector,
-        'assigned_pickups': assigned_pickups,
+        'collector_stats': get_collector_stats(collector),
+        'assigned_pickups': ordered_pickups,
         'available_pickups': available_pickups,
-        'notifications': notifications,
+        'route_stops': {stop['pickup'].id: stop for stop in route['stops']},
+        'route_distance_km': route['total_distance_km'],
         'current_page': 'assigned',
     }
     return render(request, 'registration/collector_dashboard.html', context)
@@ -768,13 +795,12 @@ def collector_profile_view(request):
 
     assigned_pickups = WastePickupRequest.objects.filter(collector=collector).order_by('-created_at')
     available_pickups = WastePickupRequest.objects.filter(status='Pending', collector__isnull=True).order_by('-created_at')
-    notifications = Notification.objects.filter(user=request.user, is_read=False).order_by('-created_at')[:5]
 
     context = {
         'collector': collector,
+        'collector_stats': get_collector_stats(collector),
         'assigned_pickups': assigned_pickups,
         'available_pickups': available_pickups,
-        'notifications': notifications,
         'current_page': 'profile',
     }
     return render(request, 'registration/collector_dashboard.html', context)
@@ -838,9 +864,10 @@ def admin_dashboard(request):
     # Statistics
     total_households = Household.objects.count()
     total_collectors = Collector.objects.count()
-    total_pickups = WastePickupRequest.objects.count()
-    pending_pickups = WastePickupRequest.objects.filter(status='Pending').count()
-    completed_pickups = WastePickupRequest.objects.filter(status='Completed').count()
+    pickup_totals = get_pickup_totals()
+    total_pickups = pickup_totals['total']
+    pending_pickups = pickup_totals['pending']
+    completed_pickups = pickup_totals['completed']
     
     recent_pickups = WastePickupRequest.objects.all().order_by('-created_at')[:10]
     recent_households = Household.objects.all().order_by('-created_at')[:5]
@@ -856,6 +883,7 @@ def admin_dashboard(request):
         'recent_pickups': recent_pickups,
         'recent_households': recent_households,
         'recent_collectors': recent_collectors,
+        'pickup_trend': get_daily_trend(days=14),
         'current_page': 'dashboard',
     }
     return render(request, 'registration/admin_dashboard.html', context)
@@ -876,20 +904,16 @@ def admin_pickups(request):
     # Get all pickup requests with related data
     all_pickups = WastePickupRequest.objects.select_related(
         'household__user', 'collector__user', 'waste_category'
-    ).all().order_by('-created_at')
+    ).all()
     
-    # Filter by status if provided
+    # Filter by status and province/district if provided
     status_filter = request.GET.get('status')
-    if status_filter:
-        all_pickups = all_pickups.filter(status=status_filter)
-    
-    # Filter by province/district if provided
     province_id = request.GET.get('province')
     district_id = request.GET.get('district')
-    if province_id:
-        all_pickups = all_pickups.filter(household__province_id=province_id)
-    if district_id:
-        all_pickups = all_pickups.filter(household__district_id=district_id)
+    all_pickups = filter_pickups(all_pickups, status_filter, province_id, district_id)
+    all_pickups, response = _paginated(request, all_pickups, _pickup_json)
+    if response is not None:
+        return response
     
     # Categorize pickups
     pending_pickups = WastePickupRequest.objects.filter(status='Pending').select_related(
@@ -928,53 +952,52 @@ def admin_pickups(request):
             'days_overdue': days_overdue
         })
     
-    # Assigned collectors with their pickup assignments
-    assigned_collectors = Collector.objects.filter(
-        assigned_pickups__isnull=False
-    ).distinct().select_related('user', 'province', 'district').prefetch_related(
-        'assigned_pickups__household__user', 'assigned_pickups__waste_category'
-    )
+    # Assigned collectors with their open assignments: one grouped query for
+    # the counts plus one prefetch for the rows, whatever the number of collectors
+    open_statuses = ['Scheduled', 'In Progress']
+    assigned_collectors = Collector.objects.annotate(
+        total_assigned=Count('assigned_pickups', filter=Q(assigned_pickups__status__in=open_statuses)),
+        scheduled_count=Count('assigned_pickups', filter=Q(assigned_pickups__status='Scheduled')),
+        in_progress_count=Count('assigned_pickups', filter=Q(assigned_pickups__status='In Progress')),
+    ).filter(total_assigned__gt=0).select_related('user', 'province', 'district').prefetch_related(
+        Prefetch(
+            'assigned_pickups',
+            queryset=WastePickupRequest.objects.filter(status__in=open_statuses).select_related(
+                'household__user', 'waste_category'
+            ).order_by('scheduled_date'),
+            to_attr='open_assignments',
+        )
+    ).order_by('id')
     
     # Group assignments by collector
-    collector_assignments = []
-    for collector in assigned_collectors:
-        assignments = WastePickupRequest.objects.filter(
-            collector=collector,
-            status__in=['Scheduled', 'In Progress']
-        ).select_related('household__user', 'waste_category').order_by('scheduled_date')
-        if assignments.exists():
-            collector_assignments.append({
-                'collector': collector,
-                'assignments': assignments,
-                'total_assigned': assignments.count(),
-                'pending_count': assignments.filter(status='Scheduled').count(),
-                'in_progress_count': assignments.filter(status='In Progress').count(),
-            })
+    collector_assignments = [
+        {
+            'collector': collector,
+            'assignments': collector.open_assignments,
+            'total_assigned': collector.total_assigned,
+            'pending_count': collector.scheduled_count,
+            'in_progress_count': collector.in_progress_count,
+        }
+        for collector in assigned_collectors
+    ]
     
     # Pickups by waste category
-    from django.db.models import Count
-    pickups_by_category = WastePickupRequest.objects.values(
-        'waste_category__name', 'waste_category__id'
-    ).annotate(
-        total=Count('id'),
-        pending=Count('id', filter=Q(status='Pending')),
-        scheduled=Count('id', filter=Q(status='Scheduled')),
-        in_progress=Count('id', filter=Q(status='In Progress')),
-        completed=Count('id', filter=Q(status='Completed')),
-    ).order_by('-total')
+    pickups_by_category = get_pickups_by_category()
     
     # Get all provinces for filter dropdown
-    all_provinces = Province.objects.all().order_by('name')
+    hierarchy = get_admin_hierarchy()
+    all_provinces = hierarchy.provinces
     districts = []
     if province_id:
-        districts = District.objects.filter(province_id=province_id).order_by('name')
+        districts = hierarchy.children('province', province_id)
     
     # Statistics
     total_households = Household.objects.count()
     total_collectors = Collector.objects.count()
-    total_pickups = WastePickupRequest.objects.count()
-    pending_count = WastePickupRequest.objects.filter(status='Pending').count()
-    completed_count = WastePickupRequest.objects.filter(status='Completed').count()
+    pickup_totals = get_pickup_totals()
+    total_pickups = pickup_totals['total']
+    pending_count = pickup_totals['pending']
+    completed_count = pickup_totals['completed']
 
     context = {
         'admin_profile': admin_profile,
@@ -1034,38 +1057,42 @@ def admin_households(request):
     if village_id:
         households_query = households_query.filter(village_id=village_id)
     
-    # Order by province, district, then name
-    all_households = households_query.order_by('province__name', 'district__name', 'user__first_name', 'user__last_name', 'user__username')
+    # Newest first, one page at a time
+    all_households, response = _paginated(request, households_query, _household_json)
+    if response is not None:
+        return response
     
     # Get all provinces for filter dropdown
-    all_provinces = Province.objects.all().order_by('name')
+    hierarchy = get_admin_hierarchy()
+    all_provinces = hierarchy.provinces
     
     # Get districts for selected province (if any)
     districts = []
     if province_id:
-        districts = District.objects.filter(province_id=province_id).order_by('name')
+        districts = hierarchy.children('province', province_id)
     
     # Get sectors for selected district (if any)
     sectors = []
     if district_id:
-        sectors = Sector.objects.filter(district_id=district_id).order_by('name')
+        sectors = hierarchy.children('district', district_id)
     
     # Get cells for selected sector (if any)
     cells = []
     if sector_id:
-        cells = Cell.objects.filter(sector_id=sector_id).order_by('name')
+        cells = hierarchy.children('sector', sector_id)
     
     # Get villages for selected cell (if any)
     villages = []
     if cell_id:
-        villages = Village.objects.filter(cell_id=cell_id).order_by('name')
+        villages = hierarchy.children('cell', cell_id)
     
     # Statistics
     total_households = Household.objects.count()
     total_collectors = Collector.objects.count()
-    total_pickups = WastePickupRequest.objects.count()
-    pending_pickups = WastePickupRequest.objects.filter(status='Pending').count()
-    completed_pickups = WastePickupRequest.objects.filter(status='Completed').count()
+    pickup_totals = get_pickup_totals()
+    total_pickups = pickup_totals['total']
+    pending_pickups = pickup_totals['pending']
+    completed_pickups = pickup_totals['completed']
 
     context = {
         'admin_profile': admin_profile,
@@ -1124,38 +1151,42 @@ def admin_collectors(request):
     if village_id:
         collectors_query = collectors_query.filter(district__sectors__cells__villages__id=village_id).distinct()
     
-    # Order by province, district, then name
-    all_collectors = collectors_query.order_by('province__name', 'district__name', 'user__first_name', 'user__last_name', 'user__username')
+    # Newest first, one page at a time
+    all_collectors, response = _paginated(request, collectors_query, _collector_json)
+    if response is not None:
+        return response
     
     # Get all provinces for filter dropdown
-    all_provinces = Province.objects.all().order_by('name')
+    hierarchy = get_admin_hierarchy()
+    all_provinces = hierarchy.provinces
     
     # Get districts for selected province (if any)
     districts = []
     if province_id:
-        districts = District.objects.filter(province_id=province_id).order_by('name')
+        districts = hierarchy.children('province', province_id)
     
     # Get sectors for selected district (if any)
     sectors = []
     if district_id:
-        sectors = Sector.objects.filter(district_id=district_id).order_by('name')
+        sectors = hierarchy.children('district', district_id)
     
     # Get cells for selected sector (if any)
     cells = []
     if sector_id:
-        cells = Cell.objects.filter(sector_id=sector_id).order_by('name')
+        cells = hierarchy.children('sector', sector_id)
     
     # Get villages for selected cell (if any)
     villages = []
     if cell_id:
-        villages = Village.objects.filter(cell_id=cell_id).order_by('name')
+        villages = hierarchy.children('cell', cell_id)
     
     # Statistics
     total_households = Household.objects.count()
     total_collectors = Collector.objects.count()
-    total_pickups = WastePickupRequest.objects.count()
-    pending_pickups = WastePickupRequest.objects.filter(status='Pending').count()
-    completed_pickups = WastePickupRequest.objects.filter(status='Completed').count()
+    pickup_totals = get_pickup_totals()
+    total_pickups = pickup_totals['total']
+    pending_pickups = pickup_totals['pending']
+    completed_pickups = pickup_totals['completed']
 
     context = {
         'admin_profile': admin_profile,
@@ -1194,9 +1225,10 @@ def admin_quick_actions(request):
 
     total_households = Household.objects.count()
     total_collectors = Collector.objects.count()
-    total_pickups = WastePickupRequest.objects.count()
-    pending_pickups = WastePickupRequest.objects.filter(status='Pending').count()
-    completed_pickups = WastePickupRequest.objects.filter(status='Completed').count()
+    pickup_totals = get_pickup_totals()
+    total_pickups = pickup_totals['total']
+    pending_pickups = pickup_totals['pending']
+    completed_pickups = pickup_totals['completed']
 
     recent_pickups = WastePickupRequest.objects.all().order_by('-created_at')[:10]
     recent_households = Household.objects.all().order_by('-created_at')[:5]
@@ -1212,11 +1244,151 @@ def admin_quick_actions(request):
         'recent_pickups': recent_pickups,
         'recent_households': recent_households,
         'recent_collectors': recent_collectors,
+        'all_provinces': get_admin_hierarchy().provinces,
         'current_page': 'quick_actions',
     }
     return render(request, 'registration/admin_dashboard.html', context)
 
 
+@require_http_methods(["POST"])
+@login_required
+def admin_assign_pickups(request):
+    """Admin quick action - batch-assign pending pickups to collectors in the background"""
+    try:
+        request.user.admin_profile
+    except Admin.DoesNotExist:
+        if not request.user.is_superuser:
+            messages.error(request, "Admin profile not found.")
+            return redirect('registration:admin_login')
+    
+    from .assignment import start_assignment
+    job_id = start_assignment()
+    messages.success(
+        request,
+        f"Assigning pending pickups in the background (job {job_id}). "
+        f"Result: {reverse('registration:admin_assignment_progress', args=[job_id])}"
+    )
+    return redirect('registration:admin_quick_actions')
+
+
+@require_http_methods(["GET"])
+@login_required
+def admin_assignment_progress(request, job_id):
+    """Progress of a background pickup assignment job"""
+    if not (request.user.is_superuser or Admin.objects.filter(user=request.user).exists()):
+        return JsonResponse({'error': 'Admin access required', 'success': False}, status=403)
+    
+    from .assignment import get_assignment_progress
+    progress = get_assignment_progress(job_id)
+    if progress is None:
+        return JsonResponse({'error': 'Unknown job', 'success': False}, status=404)
+    return JsonResponse(dict(progress, success=True), status=200)
+
+
+@require_http_methods(["POST"])
+@login_required
+def admin_send_notification(request):
+    """Admin quick action - notify every household/collector in an area in the background"""
+    try:
+        request.user.admin_profile
+    except Admin.DoesNotExist:
+        if not request.user.is_superuser:
+            messages.error(request, "Admin profile not found.")
+            return redirect('registration:admin_login')
+    
+    title = request.POST.get('title', '').strip()
+    message = request.POST.get('message', '').strip()
+    if not title or not message:
+        messages.error(request, "A title and a message are required.")
+        return redirect('registration:admin_quick_actions')
+    
+    from .fanout import start_fanout
+    try:
+        job_id = start_fanout(
+            title, message,
+            audience=request.POST.get('audience', 'households'),
+            province_id=request.POST.get('province') or None,
+            district_id=request.POST.get('district') or None,
+            pickup_status=request.POST.get('pickup_status') or None,
+        )
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('registration:admin_quick_actions')
+    
+    messages.success(
+        request,
+        f"Sending \"{title}\" in the background (job {job_id}). "
+        f"Progress: {reverse('registration:admin_notification_progress', args=[job_id])}"
+    )
+    return redirect('registration:admin_quick_actions')
+
+
+@require_http_methods(["GET"])
+@login_required
+def admin_notification_progress(request, job_id):
+    """Progress of a background notification fan-out job"""
+    if not (request.user.is_superuser or Admin.objects.filter(user=request.user).exists()):
+        return JsonResponse({'error': 'Admin access required', 'success': False}, status=403)
+    
+    from .fanout import get_fanout_progress
+    progress = get_fanout_progress(job_id)
+    if progress is None:
+        return JsonResponse({'error': 'Unknown job', 'success': False}, status=404)
+    return JsonResponse(dict(progress, success=True), status=200)
+
+
+@require_http_methods(["GET"])
+@login_required
+def admin_classifier_stats(request):
+    """Waste classifier cache and batching counters (of the classifier server if configured)"""
+    if not (request.user.is_superuser or Admin.objects.filter(user=request.user).exists()):
+        return JsonResponse({'error': 'Admin access required', 'success': False}, status=403)
+    
+    from .classifier_server import ClassifierUnavailable, classifier_stats, get_classifier_client
+    client = get_classifier_client()
+    if client is not None:
+        try:
+            return JsonResponse(dict(client.stats(), server=client.socket_path), status=200)
+        except ClassifierUnavailable as e:
+            return JsonResponse({'error': str(e), 'success': False}, status=503)
+    
+    from .classifier_batching import get_batching_classifier
+    return JsonResponse(dict(classifier_stats(get_batching_classifier()), server=None, success=True), status=200)
+
+
+@require_http_methods(["GET"])
+@login_required
+def admin_export_pickups(request):
+    """Admin view - stream pickups matching the pickups page filters as CSV or JSON Lines"""
+    try:
+        request.user.admin_profile
+    except Admin.DoesNotExist:
+        if not request.user.is_superuser:
+            messages.error(request, "Admin profile not found.")
+            return redirect('registration:admin_login')
+    
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({
+            'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}",
+            'success': False
+        }, status=400)
+    
+    pickups = filter_pickups(
+        WastePickupRequest.objects.all(),
+        request.GET.get('status'),
+        request.GET.get('province'),
+        request.GET.get('district'),
+    )
+    response = StreamingHttpResponse(
+        iter_export(pickups, export_format),
+        content_type=EXPORT_CONTENT_TYPES[export_format],
+    )
+    filename = f"pickups-{timezone.localdate().isoformat()}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 # Utility views
 @login_required
 def create_pickup_request(request):
@@ -1228,14 +1400,31 @@ def create_pickup_request(request):
             lat = request.POST.get('latitude')
             lon = request.POST.get('longitude')
             
+            # Without GPS, fall back to the household's location, its admin area
+            # or a place named in the address; with none of them the pickup has
+            # no coordinates and is not auto-assigned
+            if not lat or not lon:
+                from .geocoding import geocode_household
+                coords = geocode_household(household)
+                if coords is None and address:
+                    from .gazetteer import get_gazetteer
+                    coords = get_gazetteer().geocode(address)
+                lat, lon = coords if coords else (None, None)
+            elif household.village_id is None:
+                # Raw GPS: fill any admin areas the household is still missing
+                from .reverse_geocoding import fill_household_admin_areas
+                changed = fill_household_admin_areas(household, float(lat), float(lon))
+                if changed:
+                    household.save(update_fields=changed + ['updated_at'])
+            
             pickup_request = WastePickupRequest.objects.create(
                 household=household,
                 waste_category_id=request.POST.get('waste_category'),
                 quantity=request.POST.get('quantity', 0),
                 address=address,
                 notes=request.POST.get('notes', ''),
-                latitude=float(lat) if lat else None,
-                longitude=float(lon) if lon else None,
+                latitude=round(float(lat), 6) if lat else None,
+                longitude=round(float(lon), 6) if lon else None,
             )
             
             # Try to auto-assign nearest collector
@@ -1275,64 +1464,64 @@ def assign_pickup(request, pickup_id):
 
 
 # AJAX Endpoints for Cascading Dropdowns
-@require_http_methods(["GET"])
+def _hierarchy_etag(request, *args, **kwargs):
+    return get_admin_hierarchy().etag
+
+
+def _hierarchy_endpoint(view):
+    """GET-only, ETag-validated and briefly browser-cached hierarchy response"""
+    max_age = getattr(settings, 'ADMIN_HIERARCHY_BROWSER_MAX_AGE_SECONDS', 60)
+    view = cache_control(public=True, max_age=max_age, must_revalidate=True)(view)
+    view = condition(etag_func=_hierarchy_etag)(view)
+    return require_http_methods(["GET"])(view)
+
+
+def _hierarchy_children(request, parent_level, param, key, label):
+    parent_id = request.GET.get(param)
+    if not parent_id:
+        return JsonResponse({'error': f'{label} ID is required'}, status=400)
+    return JsonResponse({key: get_admin_hierarchy().children(parent_level, parent_id)})
+
+
+@_hierarchy_endpoint
 def get_districts(request):
     """Get districts for a province"""
-    province_id = request.GET.get('province_id')
-    if not province_id:
-        return JsonResponse({'error': 'Province ID is required'}, status=400)
-    
-    try:
-        districts = District.objects.filter(province_id=province_id).order_by('name')
-        districts_data = [{'id': d.id, 'name': d.name} for d in districts]
-        return JsonResponse({'districts': districts_data})
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    return _hierarchy_children(request, 'province', 'province_id', 'districts', 'Province')
 
 
-@require_http_methods(["GET"])
+@_hierarchy_endpoint
 def get_sectors(request):
     """Get sectors for a district"""
-    district_id = request.GET.get('district_id')
-    if not district_id:
-        return JsonResponse({'error': 'District ID is required'}, status=400)
-    
-    try:
-        sectors = Sector.objects.filter(district_id=district_id).order_by('name')
-        sectors_data = [{'id': s.id, 'name': s.name} for s in sectors]
-        return JsonResponse({'sectors': sectors_data})
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    return _hierarchy_children(request, 'district', 'district_id', 'sectors', 'District')
 
 
-@require_http_methods(["GET"])
+@_hierarchy_endpoint
 def get_cells(request):
     """Get cells for a sector"""
-    sector_id = request.GET.get('sector_id')
-    if not sector_id:
-        return JsonResponse({'error': 'Sector ID is required'}, status=400)
-    
-    try:
-        cells = Cell.objects.filter(sector_id=sector_id).order_by('name')
-        cells_data = [{'id': c.id, 'name': c.name} for c in cells]
-        return JsonResponse({'cells': cells_data})
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    return _hierarchy_children(request, 'sector', 'sector_id', 'cells', 'Sector')
 
 
-@require_http_methods(["GET"])
+@_hierarchy_endpoint
 def get_villages(request):
     """Get villages for a cell"""
-    cell_id = request.GET.get('cell_id')
-    if not cell_id:
-        return JsonResponse({'error': 'Cell ID is required'}, status=400)
+    return _hierarchy_children(request, 'cell', 'cell_id', 'villages', 'Cell')
+
+
+@_hierarchy_endpoint
+def get_admin_areas(request):
+    """
+    Get a whole branch of the hierarchy in one response.
     
-    try:
-        villages = Village.objects.filter(cell_id=cell_id).order_by('name')
-        villages_data = [{'id': v.id, 'name': v.name} for v in villages]
-        return JsonResponse({'villages': villages_data})
-    except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+    Without parameters returns every province with its nested districts,
+    sectors, cells and villages; with one of province_id, district_id,
+    sector_id or cell_id returns the nested areas below that area.
+    """
+    hierarchy = get_admin_hierarchy()
+    for level in ('cell', 'sector', 'district', 'province'):
+        area_id = request.GET.get(f'{level}_id')
+        if area_id:
+            return JsonResponse({'level': level, 'id': area_id, 'areas': hierarchy.subtree(level, area_id)})
+    return JsonResponse({'level': None, 'id': None, 'areas': hierarchy.subtree()})
 
 
 def _classify_waste_from_metadata(file_name, content_type):
@@ -1534,9 +1723,8 @@ def classify_waste_image(request):
         
         # Classify waste
         try:
-            from .waste_classifier import get_waste_classifier
-            classifier = get_waste_classifier()
-            result = classifier.classify_from_bytes(image_bytes)
+            from .classifier_server import classify_image_bytes
+            result = classify_image_bytes(image_bytes)
         except Exception as e:
             logger.error(f"Error importing or using waste classifier: {e}")
             # Return a default classification
@@ -1599,6 +1787,9 @@ def update_location(request):
                 household = request.user.household_profile
                 household.latitude = float(lat)
                 household.longitude = float(lon)
+                # Link GPS-only households to their administrative areas
+                from .reverse_geocoding import fill_household_admin_areas
+                fill_household_admin_areas(household)
                 household.save()
                 return JsonResponse({
                     'message': 'Location updated successfully',
@@ -1612,9 +1803,9 @@ def update_location(request):
         elif user_type == 'collector':
             try:
                 collector = request.user.collector_profile
-                collector.latitude = float(lat)
-                collector.longitude = float(lon)
-                collector.save()
+                # Pings are cached; the first is stored at once, later ones in batches
+                from .live_positions import record_position
+                record_position(collector, float(lat), float(lon))
                 return JsonResponse({
                     'message': 'Location updated successfully',
                     'success': True
@@ -1696,6 +1887,8 @@ def get_nearby_pickups(request):
     """Get nearby pickup requests for a collector"""
     try:
         collector = request.user.collector_profile
+        from .live_positions import apply_live_positions
+        apply_live_positions([collector])
         
         if not collector.has_location():
             return JsonResponse({
@@ -1740,6 +1933,104 @@ def get_nearby_pickups(request):
         }, status=500)
 
 
+@require_http_methods(["GET"])
+@login_required
+def get_collector_route(request):
+    """Get the planned visiting order for a collector's active pickups"""
+    try:
+        collector = request.user.collector_profile
+        from .live_positions import apply_live_positions
+        apply_live_positions([collector])
+        
+        from .routing import plan_collector_route
+        route = plan_collector_route(collector)
+        
+        def pickup_data(pickup):
+            return {
+                'id': pickup.id,
+                'household_name': pickup.household.user.get_full_name() or pickup.household.user.username,
+                'address': pickup.address,
+                'waste_category': pickup.waste_category.name,
+                'quantity': float(pickup.quantity),
+                'status': pickup.status,
+                'latitude': float(pickup.latitude) if pickup.latitude is not None else None,
+                'longitude': float(pickup.longitude) if pickup.longitude is not None else None,
+            }
+        
+        stops_data = [dict(pickup_data(stop['pickup']), order=stop['order'], leg_km=stop['leg_km'])
+                      for stop in route['stops']]
+        
+        return JsonResponse({
+            'stops': stops_data,
+            'unlocated': [pickup_data(pickup) for pickup in route['unlocated']],
+            'total_distance_km': route['total_distance_km'],
+            'start': {
+                'latitude': float(collector.latitude),
+                'longitude': float(collector.longitude),
+            } if collector.has_location() else None,
+            'success': True
+        }, status=200)
+        
+    except Collector.DoesNotExist:
+        return JsonResponse({
+            'error': 'Collector profile not found',
+            'success': False
+        }, status=404)
+    except Exception as e:
+        return JsonResponse({
+            'error': f'Error: {str(e)}',
+            'success': False
+        }, status=500)
+
+
+@require_http_methods(["GET"])
+@login_required
+def get_map_clusters(request):
+    """Get aggregated map clusters of pickups or collectors inside a bounding box"""
+    user = request.user
+    if not (user.is_superuser or hasattr(user, 'admin_profile') or hasattr(user, 'collector_profile')):
+        return JsonResponse({
+            'error': 'Map clusters are only available to admins and collectors',
+            'success': False
+        }, status=403)
+
+    try:
+        min_lat = float(request.GET['min_lat'])
+        min_lon = float(request.GET['min_lon'])
+        max_lat = float(request.GET['max_lat'])
+        max_lon = float(request.GET['max_lon'])
+        zoom = int(request.GET.get('zoom', 10))
+    except (KeyError, ValueError):
+        return JsonResponse({
+            'error': 'min_lat, min_lon, max_lat, max_lon and zoom are required numbers',
+            'success': False
+        }, status=400)
+
+    layer = request.GET.get('layer', 'pickups')
+    from .clustering import LAYERS, get_cluster_pyramid
+    if layer not in LAYERS:
+        return JsonResponse({
+            'error': f"Invalid layer. Use one of: {', '.join(LAYERS)}",
+            'success': False
+        }, status=400)
+
+    try:
+        pyramid = get_cluster_pyramid(layer)
+        used_zoom, clusters = pyramid.clusters(min_lat, min_lon, max_lat, max_lon, zoom)
+        return JsonResponse({
+            'layer': layer,
+            'zoom': used_zoom,
+            'clusters': clusters,
+            'total_points': sum(cluster['count'] for cluster in clusters),
+            'success': True
+        }, status=200)
+    except Exception as e:
+        return JsonResponse({
+            'error': f'Error: {str(e)}',
+            'success': False
+        }, status=500)
+
+
 class CustomPasswordResetView(PasswordResetView):
     """Custom password reset view with better error handling"""
     template_name = 'registration/password_reset_form.html'
@@ -3,7 +3,10 @@ AI-powered waste classification service
 Uses a pre-trained model to classify waste from images
 """
 
+import json
 import os
+import warnings
+from io import BytesIO
 from PIL import Image
 import numpy as np
 from typing import Dict, List, Tuple, Optional
@@ -36,38 +39,179 @@ WASTE_CATEGORY_MAPPING = {
 # Category confidence thresholds
 MIN_CONFIDENCE = 0.3
 
+# ImageNet classes (as named in torchvision's weight metadata) that identify
+# a waste category. The pre-trained MobileNetV2 predicts ImageNet classes; a
+# photo is classified from the model when these classes hold at least
+# MIN_CONFIDENCE of its probability, and by colour otherwise.
+IMAGENET_WASTE_CLASSES = {
+    'Organic Waste': (
+        'banana', 'orange', 'lemon', 'Granny Smith', 'pineapple', 'strawberry', 'pomegranate',
+        'fig', 'corn', 'ear', 'cucumber', 'head cabbage', 'broccoli', 'cauliflower',
+        'bell pepper', 'zucchini', 'acorn squash', 'butternut squash', 'mushroom', 'hay',
+    ),
+    'Plastic Waste': (
+        'water bottle', 'pop bottle', 'plastic bag', 'pill bottle', 'lotion', 'soap dispenser',
+        'water jug',
+    ),
+    'Paper Waste': (
+        'carton', 'envelope', 'paper towel', 'toilet tissue', 'notebook', 'book jacket',
+        'comic book', 'menu', 'packet',
+    ),
+    'Glass Waste': ('beer bottle', 'wine bottle', 'beer glass', 'goblet', 'vase', 'perfume'),
+    'Metal Waste': ('milk can', 'frying pan', 'wok', 'chain', 'nail', 'screw', 'padlock', 'safety pin'),
+    'General Waste': ('ashcan', 'crate'),
+}
+
+# Input size and ImageNet normalisation the models were trained with
+INPUT_SIZE = (224, 224)
+NORMALIZE_MEAN = [0.485, 0.456, 0.406]
+NORMALIZE_STD = [0.229, 0.224, 0.225]
+
+
+# Uploads with more pixels are rejected from the header, before decoding
+# (a 10MB compressed file can otherwise expand to gigabytes)
+MAX_IMAGE_PIXELS = 50_000_000
+
+
+class ImageRejected(ValueError):
+    """Raised for images that are too large to decode safely"""
+
+
+def decode_image(source, size: Tuple[int, int] = INPUT_SIZE) -> Image.Image:
+    """
+    Decode an upload straight to a ``size`` RGB image
+    
+    The image size is checked from the header first. JPEGs are decoded with
+    ``draft()``, which lets libjpeg scale by 1/2, 1/4 or 1/8 while decoding,
+    so a 12MP phone photo never exists at full resolution; the result is
+    then reduced once to ``size``. Both the colour heuristics and the model
+    transform use the returned image as-is.
+    
+    Args:
+        source: Image bytes, a file path or a file object
+        size: Output (width, height)
+        
+    Raises:
+        ImageRejected: If the image has more than MAX_IMAGE_PIXELS pixels
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            image = Image.open(source)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning) as e:
+        raise ImageRejected(str(e)) from e
+    
+    width, height = image.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ImageRejected(
+            f"Image too large: {width}x{height} pixels (maximum {MAX_IMAGE_PIXELS:,})"
+        )
+    
+    if image.format == 'JPEG':
+        image.draft('RGB', size)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    if image.size != size:
+        image = image.resize(size, Image.BILINEAR, reducing_gap=2.0)
+    return image
+
+
+def imagenet_category_index(class_names: List[str]) -> Dict[str, List[int]]:
+    """Output indices of the ImageNet classes behind each waste category"""
+    positions = {name: i for i, name in enumerate(class_names)}
+    return {
+        category: [positions[name] for name in names if name in positions]
+        for category, names in IMAGENET_WASTE_CLASSES.items()
+    }
+
+
+def load_imagenet_class_names() -> Optional[List[str]]:
+    """ImageNet class names in MobileNetV2 output order, from torchvision"""
+    try:
+        from torchvision.models import MobileNet_V2_Weights
+        return list(MobileNet_V2_Weights.DEFAULT.meta['categories'])
+    except Exception as e:
+        logger.warning(f"ImageNet class names unavailable: {e}")
+        return None
+
+
+def waste_scores(probabilities, category_index: Dict[str, List[int]]) -> Dict[str, float]:
+    """
+    Waste category scores from one image's ImageNet probabilities
+    
+    Each category scores the probability mass of its ImageNet classes.
+    Empty when the waste classes together hold less than MIN_CONFIDENCE,
+    i.e. the model does not recognise a known waste object.
+    """
+    scores = {
+        category: float(probabilities[indices].sum())
+        for category, indices in category_index.items() if indices
+    }
+    if sum(scores.values()) < MIN_CONFIDENCE:
+        return {}
+    return {category: score for category, score in scores.items() if score > 0.01}
+
+
+def get_optimized_model_path() -> Optional[str]:
+    """Where ``export_waste_classifier`` writes the quantized TorchScript model"""
+    try:
+        from django.conf import settings
+        return getattr(settings, 'CLASSIFIER_OPTIMIZED_MODEL_PATH', None)
+    except Exception:
+        return os.environ.get('CLASSIFIER_OPTIMIZED_MODEL_PATH')
+
+
+def build_transform():
+    """Image preprocessing shared by the classifier and the model export"""
+    return transforms.Compose([
+        transforms.Resize(INPUT_SIZE),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=NORMALIZE_MEAN, std=NORMALIZE_STD)
+    ])
+
 
 class WasteClassifier:
     """
     Waste classification service using a pre-trained model
     """
     
-    def __init__(self, model_path: Optional[str] = None):
+    def __init__(self, model_path: Optional[str] = None, optimized_model_path: Optional[str] = None):
         """
         Initialize the waste classifier
         
         Args:
             model_path: Path to a custom trained model (optional)
+            optimized_model_path: Quantized TorchScript model to prefer over
+                the float MobileNetV2 (defaults to CLASSIFIER_OPTIMIZED_MODEL_PATH)
         """
         self.model = None
         self.model_loaded = False
+        self.model_kind = None
+        # Waste category -> ImageNet output indices; None when the model's
+        # outputs cannot be mapped (custom models), which classifies by colour
+        self.category_index = None
         
         if TORCH_AVAILABLE:
             self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
             # Image preprocessing transforms
-            self.transform = transforms.Compose([
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=[0.485, 0.456, 0.406], 
-                                   std=[0.229, 0.224, 0.225])
-            ])
+            self.transform = build_transform()
+            # For images decode_image already brought to INPUT_SIZE
+            self.sized_transform = transforms.Compose(self.transform.transforms[1:])
         else:
             self.device = None
             self.transform = None
+            self.sized_transform = None
+        
+        if optimized_model_path is None:
+            optimized_model_path = get_optimized_model_path()
         
         # Try to load model if path provided
         if model_path and os.path.exists(model_path):
             self.load_model(model_path)
+        elif TORCH_AVAILABLE and optimized_model_path and os.path.exists(optimized_model_path):
+            self.load_optimized_model(optimized_model_path)
         else:
             # Use a lightweight approach with a pre-trained model
             self._init_lightweight_model()
@@ -93,6 +237,10 @@ class WasteClassifier:
             self.model.eval()
             self.model.to(self.device)
             self.model_loaded = True
+            self.model_kind = 'float'
+            class_names = load_imagenet_class_names()
+            if class_names:
+                self.category_index = imagenet_category_index(class_names)
             logger.info("Lightweight model initialized (MobileNetV2)")
         except Exception as e:
             logger.warning(f"Could not load model: {e}. Using rule-based classification.")
@@ -105,11 +253,50 @@ class WasteClassifier:
             self.model.eval()
             self.model.to(self.device)
             self.model_loaded = True
+            self.model_kind = 'custom'
             logger.info(f"Custom model loaded from {model_path}")
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
             self._init_lightweight_model()
     
+    def load_optimized_model(self, model_path: str):
+        """
+        Load a quantized TorchScript model written by ``export_waste_classifier``
+        
+        Quantized kernels only run on CPU. Falls back to the float model if
+        the artifact cannot be loaded.
+        """
+        try:
+            # Use the quantized engine the model was exported for
+            metadata_path = f"{model_path}.json"
+            metadata = {}
+            if os.path.exists(metadata_path):
+                with open(metadata_path) as f:
+                    metadata = json.load(f)
+                engine = metadata.get('quantized_engine')
+                if engine and engine in torch.backends.quantized.supported_engines:
+                    torch.backends.quantized.engine = engine
+            
+            self.device = torch.device('cpu')
+            self.model = torch.jit.load(model_path, map_location=self.device)
+            self.model.eval()
+            self.model_loaded = True
+            self.model_kind = 'quantized'
+            class_names = metadata.get('class_names') or load_imagenet_class_names()
+            if class_names:
+                self.category_index = imagenet_category_index(class_names)
+            logger.info(f"Quantized TorchScript model loaded from {model_path}")
+        except Exception as e:
+            logger.error(f"Failed to load optimized model: {e}. Using the float model.")
+            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+            self._init_lightweight_model()
+    
+    @property
+    def uses_model(self) -> bool:
+        """Whether classification runs the model (a loaded model whose outputs map to categories)"""
+        return (TORCH_AVAILABLE and self.model_loaded and self.model is not None
+                and self.category_index is not None)
+    
     def preprocess_image(self, image: Image.Image):
         """
         Preprocess image for model input
@@ -128,7 +315,8 @@ class WasteClassifier:
             image = image.convert('RGB')
         
         # Apply transforms
-        tensor = self.transform(image)
+        transform = self.sized_transform if image.size == INPUT_SIZE else self.transform
+        tensor = transform(image)
         return tensor.unsqueeze(0)  # Add batch dimension
     
     def classify_by_color_and_features(self, image: Image.Image) -> Dict[str, float]:
@@ -141,7 +329,8 @@ class WasteClassifier:
             image = image.convert('RGB')
         
         # Resize for faster processing
-        image = image.resize((224, 224))
+        if image.size != INPUT_SIZE:
+            image = image.resize(INPUT_SIZE)
         img_array = np.array(image)
         
         # Calculate average color
@@ -192,63 +381,83 @@ class WasteClassifier:
                 ]
             }
         """
-        try:
-            if TORCH_AVAILABLE and self.model_loaded and self.model is not None:
-                # Use ML model
-                try:
-                    with torch.no_grad():
-                        tensor = self.preprocess_image(image)
-                        if tensor is not None:
-                            tensor = tensor.to(self.device)
-                            
-                            # Get predictions
-                            outputs = self.model(tensor)
-                            probabilities = torch.nn.functional.softmax(outputs[0], dim=0)
-                            
-                            # Map to waste categories (this would need to match your model's output)
-                            # For now, use rule-based as fallback
-                            predictions = self.classify_by_color_and_features(image)
-                        else:
-                            predictions = self.classify_by_color_and_features(image)
-                except Exception as e:
-                    logger.warning(f"Error using ML model: {e}. Falling back to rule-based.")
-                    predictions = self.classify_by_color_and_features(image)
-            else:
-                # Use rule-based classification
-                predictions = self.classify_by_color_and_features(image)
-            
-            # Sort by confidence
-            sorted_predictions = sorted(
-                predictions.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )
-            
-            # Get top prediction
-            top_category, top_confidence = sorted_predictions[0] if sorted_predictions else ('General Waste', 0.5)
-            
-            # Format results
-            result = {
-                'category': top_category,
-                'confidence': float(top_confidence),
-                'all_predictions': [
-                    {'category': cat, 'confidence': float(conf)}
-                    for cat, conf in sorted_predictions[:3]  # Top 3
-                ],
-                'success': True
-            }
-            
-            return result
+        return self.classify_batch([image])[0]
+    
+    def classify_batch(self, images: List[Image.Image], tensors: Optional[List] = None) -> List[Dict[str, any]]:
+        """
+        Classify several images with a single forward pass through the model
+        
+        Args:
+            images: PIL Image objects
+            tensors: Their ``preprocess_image`` outputs, if the caller already
+                computed them (e.g. on the request thread)
             
-        except Exception as e:
-            logger.error(f"Classification error: {e}")
-            return {
-                'category': 'General Waste',
-                'confidence': 0.0,
-                'all_predictions': [],
-                'success': False,
-                'error': str(e)
-            }
+        Returns:
+            One result per image, in the same shape as ``classify``
+        """
+        predictions = None
+        if self.uses_model:
+            # Use ML model
+            try:
+                with torch.no_grad():
+                    if tensors is None:
+                        tensors = [self.preprocess_image(image) for image in images]
+                    batch = torch.cat(tensors).to(self.device)
+                    
+                    # Get predictions, one row per image
+                    outputs = self.model(batch)
+                    probabilities = torch.nn.functional.softmax(outputs, dim=1).cpu()
+                    
+                    # Map ImageNet classes to waste categories; empty when the
+                    # model does not recognise a waste object
+                    predictions = [waste_scores(row, self.category_index) for row in probabilities]
+            except Exception as e:
+                logger.warning(f"Error using ML model: {e}. Falling back to rule-based.")
+        
+        results = []
+        for i, image in enumerate(images):
+            try:
+                if predictions is not None and predictions[i]:
+                    image_predictions = predictions[i]
+                else:
+                    # Use rule-based classification
+                    image_predictions = self.classify_by_color_and_features(image)
+                results.append(self._format_result(image_predictions))
+            except Exception as e:
+                logger.error(f"Classification error: {e}")
+                results.append(self._error_result(e))
+        return results
+    
+    def _format_result(self, predictions: Dict[str, float]) -> Dict[str, any]:
+        # Sort by confidence
+        sorted_predictions = sorted(
+            predictions.items(),
+            key=lambda x: x[1],
+            reverse=True
+        )
+        
+        # Get top prediction
+        top_category, top_confidence = sorted_predictions[0] if sorted_predictions else ('General Waste', 0.5)
+        
+        return {
+            'category': top_category,
+            'confidence': float(top_confidence),
+            'all_predictions': [
+                {'category': cat, 'confidence': float(conf)}
+                for cat, conf in sorted_predictions[:3]  # Top 3
+            ],
+            'success': True
+        }
+    
+    @staticmethod
+    def _error_result(error: Exception) -> Dict[str, any]:
+        return {
+            'category': 'General Waste',
+            'confidence': 0.0,
+            'all_predictions': [],
+            'success': False,
+            'error': str(error)
+        }
     
     def classify_from_file(self, image_path: str) -> Dict[str, any]:
         """
@@ -261,7 +470,7 @@ class WasteClassifier:
             Classification results
         """
         try:
-            image = Image.open(image_path)
+            image = decode_image(image_path)
             return self.classify(image)
         except Exception as e:
             logger.error(f"Error loading image: {e}")
@@ -283,8 +492,7 @@ class WasteClassifier:
             Classification results
         """
         try:
-            from io import BytesIO
-            image = Image.open(BytesIO(image_bytes))
+            image = decode_image(image_bytes)
             return self.classify(image)
         except Exception as e:
             logger.error(f"Error processing image bytes: {e}")